@@ -0,0 +1,219 @@
+"""
+The circuits of the examples, scaled to grids of any size so the benchmarks can build them at several resolutions. The
+positions of the examples are given on a grid of 101 x 101 cells, and they are multiplied by (size - 1) / 100.
+"""
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from sympy import Symbol
+
+from src import Circuit, CoordinateSystem, VoltageSource, Wire
+
+BATTERY_VOLTAGE = 1.0
+HIGH_WIRE_RESISTANCE = 1.0
+LOW_WIRE_RESISTANCE = 0.01
+
+cartesian_variables = Symbol("x"), Symbol("y")
+polar_variables = Symbol("r"), Symbol("theta")
+
+
+def _circle_points(
+        precision: int,
+        start: Tuple[float, float],
+        stop: Tuple[float, float],
+        center: Tuple[float, float],
+        upper: bool
+) -> List[Tuple[float, float]]:
+    """
+    Points of an arc of circle with equal increments of x, as the circle functions of "examples/circle_function.py".
+    """
+    radius = np.hypot(start[0] - center[0], start[1] - center[1])
+    sign = 1 if upper else -1
+    return [
+        (start[0] + (stop[0] - start[0]) / precision * i,
+         center[1] + sign * np.sqrt(radius ** 2 - (start[0] + (stop[0] - start[0]) / precision * i - center[0]) ** 2))
+        for i in range(precision + 1)
+    ]
+
+
+def _scale(size: int) -> Callable[[Tuple[float, float]], Tuple[float, float]]:
+    factor = (size - 1) / 100
+    return lambda position: (position[0] * factor, position[1] * factor)
+
+
+def circuit_a(size: int) -> Circuit:
+    """
+    Rectangular circuit with two high resistance wires, from "examples/circuit a cartesian.py".
+    """
+    x, y = cartesian_variables
+    vertical_eqs, horizontal_eqs = (0 * x, y), (x, 0 * y)
+    p = _scale(size)
+
+    wires = [
+        Wire(p((26, 26)), p((26, 74)), vertical_eqs, cartesian_variables, LOW_WIRE_RESISTANCE),
+        Wire(p((26, 74)), p((60, 74)), horizontal_eqs, cartesian_variables, LOW_WIRE_RESISTANCE),
+        Wire(p((60, 74)), p((74, 74)), horizontal_eqs, cartesian_variables, HIGH_WIRE_RESISTANCE),
+        Wire(p((74, 74)), p((74, 40)), vertical_eqs, cartesian_variables, LOW_WIRE_RESISTANCE),
+        Wire(p((74, 40)), p((74, 26)), vertical_eqs, cartesian_variables, HIGH_WIRE_RESISTANCE),
+        Wire(p((74, 26)), p((40, 26)), horizontal_eqs, cartesian_variables, LOW_WIRE_RESISTANCE),
+        VoltageSource(p((40, 26)), p((26, 26)), horizontal_eqs, cartesian_variables, BATTERY_VOLTAGE)
+    ]
+    return Circuit(wires, p((40, 26)))
+
+
+def circuit_b(size: int) -> Circuit:
+    """
+    Three loops circuit with two voltage sources, from "examples/circuit b cartesian.py".
+    """
+    x, y = cartesian_variables
+    vertical_eqs, horizontal_eqs = (0 * x, y), (x, 0 * y)
+    p = _scale(size)
+
+    segments = [
+        ((20, 20), (20, 45), vertical_eqs, LOW_WIRE_RESISTANCE),
+        ((20, 45), (20, 60), vertical_eqs, None),
+        ((20, 60), (20, 80), vertical_eqs, LOW_WIRE_RESISTANCE),
+        ((20, 80), (40, 80), horizontal_eqs, LOW_WIRE_RESISTANCE),
+        ((40, 80), (40, 60), vertical_eqs, LOW_WIRE_RESISTANCE),
+        ((40, 60), (40, 45), vertical_eqs, HIGH_WIRE_RESISTANCE),
+        ((40, 45), (40, 20), vertical_eqs, LOW_WIRE_RESISTANCE),
+        ((40, 20), (20, 20), horizontal_eqs, LOW_WIRE_RESISTANCE),
+        ((40, 80), (60, 80), horizontal_eqs, LOW_WIRE_RESISTANCE),
+        ((60, 80), (60, 60), vertical_eqs, LOW_WIRE_RESISTANCE),
+        ((60, 60), (60, 45), vertical_eqs, HIGH_WIRE_RESISTANCE),
+        ((60, 45), (60, 20), vertical_eqs, LOW_WIRE_RESISTANCE),
+        ((60, 20), (40, 20), horizontal_eqs, LOW_WIRE_RESISTANCE),
+        ((60, 20), (80, 20), horizontal_eqs, LOW_WIRE_RESISTANCE),
+        ((80, 20), (80, 45), vertical_eqs, LOW_WIRE_RESISTANCE),
+        ((80, 45), (80, 60), vertical_eqs, None),
+        ((80, 60), (80, 80), vertical_eqs, LOW_WIRE_RESISTANCE),
+        ((80, 80), (60, 80), horizontal_eqs, LOW_WIRE_RESISTANCE),
+    ]
+    wires = [
+        VoltageSource(p(start), p(stop), eqs, cartesian_variables, BATTERY_VOLTAGE) if resistance is None
+        else Wire(p(start), p(stop), eqs, cartesian_variables, resistance)
+        for start, stop, eqs, resistance in segments
+    ]
+    return Circuit(wires, p((20, 45)))
+
+
+def circuit_c(size: int, precision: int = 30) -> Circuit:
+    """
+    Circular circuit made of straight segments, from "examples/circuit c cartesian.py".
+    """
+    x, y = cartesian_variables
+    diagonal_eqs = (x, y)
+    p = _scale(size)
+
+    arcs = [
+        (True, (35, 70), (65, 70), Wire, HIGH_WIRE_RESISTANCE),
+        (True, (65, 70), (75, 50), Wire, LOW_WIRE_RESISTANCE),
+        (False, (75, 50), (65, 30), Wire, LOW_WIRE_RESISTANCE),
+        (False, (65, 30), (35, 30), VoltageSource, BATTERY_VOLTAGE),
+        (False, (35, 30), (25, 50), Wire, LOW_WIRE_RESISTANCE),
+        (True, (25, 50), (35, 70), Wire, LOW_WIRE_RESISTANCE),
+    ]
+    wires = []
+    for upper, start, stop, component_type, value in arcs:
+        points = _circle_points(precision, start, stop, (50, 50), upper)
+        for k in range(precision):
+            wires.append(component_type(
+                p(points[k]), p(points[k + 1]), diagonal_eqs, cartesian_variables, value / precision
+            ))
+    return Circuit(wires, p((65, 30)))
+
+
+def circuit_c_arcs(size: int) -> Circuit:
+    """
+    Circular circuit of "examples/circuit c cartesian.py" made of six arcs instead of straight segments, which are
+    rasterized exactly without sympy.
+    """
+    p = _scale(size)
+    center = p((50, 50))
+
+    arcs = [
+        ((35, 70), (65, 70), Wire, HIGH_WIRE_RESISTANCE),
+        ((65, 70), (75, 50), Wire, LOW_WIRE_RESISTANCE),
+        ((75, 50), (65, 30), Wire, LOW_WIRE_RESISTANCE),
+        ((65, 30), (35, 30), VoltageSource, BATTERY_VOLTAGE),
+        ((35, 30), (25, 50), Wire, LOW_WIRE_RESISTANCE),
+        ((25, 50), (35, 70), Wire, LOW_WIRE_RESISTANCE),
+    ]
+    wires = [
+        component_type.arc(p(start), p(stop), center, value, clockwise=True)
+        for start, stop, component_type, value in arcs
+    ]
+    return Circuit(wires, p((65, 30)))
+
+
+def circuit_d(size: int, precision: int = 10) -> Circuit:
+    """
+    Arch shaped circuit made of straight segments, from "examples/circuit d cartesian.py".
+    """
+    x, y = cartesian_variables
+    diagonal_eqs = (x, y)
+    p = _scale(size)
+
+    battery_length, high_resistance_length = 1, 2
+    low_wire_resistance = LOW_WIRE_RESISTANCE / (2 * precision + 2 - battery_length - high_resistance_length)
+    # arc extérieur, puis arc intérieur dans l'autre sens, fermés par deux segments radiaux
+    outer = _circle_points(precision, (5 / 13 * 100, 12 / 13 * 100), (12 / 13 * 100, 5 / 13 * 100), (0, 0), True)
+    inner = _circle_points(precision, (12 / 13 * 70, 5 / 13 * 70), (5 / 13 * 70, 12 / 13 * 70), (0, 0), True)
+    arch = outer + inner + [outer[0]]
+
+    high_resistance_keys = range(int((precision - high_resistance_length) / 2),
+                                 int((precision + high_resistance_length) / 2))
+    battery_keys = range(int(3 / 2 * precision + 1 - battery_length / 2),
+                         int(3 / 2 * precision + 1 + battery_length / 2))
+    wires = []
+    for key in range(2 * precision + 2):
+        if key in high_resistance_keys:
+            component = Wire(p(arch[key]), p(arch[key + 1]), diagonal_eqs, cartesian_variables,
+                             HIGH_WIRE_RESISTANCE / high_resistance_length)
+        elif key in battery_keys:
+            component = VoltageSource(p(arch[key]), p(arch[key + 1]), diagonal_eqs, cartesian_variables,
+                                      BATTERY_VOLTAGE / battery_length)
+        else:
+            component = Wire(p(arch[key]), p(arch[key + 1]), diagonal_eqs, cartesian_variables, low_wire_resistance)
+        wires.append(component)
+    return Circuit(wires, p(arch[battery_keys[0]]))
+
+
+def circuit_d_polar(size: int) -> Circuit:
+    """
+    Annular sector circuit in polar coordinates, from "examples/circuit d polaire.py". Only the radii are scaled, the
+    angles stay the same.
+    """
+    r, theta = polar_variables
+    tangential_eqs, radial_eqs = (0 * r, theta), (r, 0 * theta)
+    factor = (size - 1) / 100
+
+    def p(radius, angle):
+        return radius * factor, angle * np.pi / (2 * 101)
+
+    segments = [
+        ((40, 15), (40, 40), tangential_eqs, LOW_WIRE_RESISTANCE),
+        ((40, 40), (40, 50), tangential_eqs, None),
+        ((40, 50), (40, 75), tangential_eqs, LOW_WIRE_RESISTANCE),
+        ((40, 75), (60, 75), radial_eqs, LOW_WIRE_RESISTANCE),
+        ((60, 75), (60, 50), tangential_eqs, LOW_WIRE_RESISTANCE),
+        ((60, 50), (60, 40), tangential_eqs, HIGH_WIRE_RESISTANCE),
+        ((60, 40), (60, 15), tangential_eqs, LOW_WIRE_RESISTANCE),
+        ((60, 15), (40, 15), radial_eqs, LOW_WIRE_RESISTANCE),
+    ]
+    wires = [
+        VoltageSource(p(*start), p(*stop), eqs, polar_variables, BATTERY_VOLTAGE) if resistance is None
+        else Wire(p(*start), p(*stop), eqs, polar_variables, resistance)
+        for start, stop, eqs, resistance in segments
+    ]
+    return Circuit(wires, p(40, 40))
+
+
+CIRCUITS: Dict[str, Tuple[Callable[[int], Circuit], CoordinateSystem]] = {
+    "a": (circuit_a, CoordinateSystem.CARTESIAN),
+    "b": (circuit_b, CoordinateSystem.CARTESIAN),
+    "c": (circuit_c, CoordinateSystem.CARTESIAN),
+    "c-arcs": (circuit_c_arcs, CoordinateSystem.CARTESIAN),
+    "d": (circuit_d, CoordinateSystem.CARTESIAN),
+    "d-polar": (circuit_d_polar, CoordinateSystem.POLAR),
+}
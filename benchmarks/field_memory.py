@@ -0,0 +1,101 @@
+"""
+Memory benchmark of the scalar and vector fields along the World.compute pipeline. Run it from the repository root
+with
+
+    python -m benchmarks.field_memory
+
+It reports, with tracemalloc, the peak memory allocated by the fields' constructors and component accessors and by
+each stage of World.compute, as well as the memory still held by the result of each stage.
+"""
+import argparse
+import tracemalloc
+
+import numpy as np
+from sympy import Symbol
+
+from src import Circuit, CoordinateSystem, VoltageSource, Wire, World
+from src.biot_savart_equation_solver import BiotSavartEquationSolver
+from src.fields import ScalarField, VectorField
+from src.laplace_equation_solver import LaplaceEquationSolver
+
+
+def build_world(size: int) -> World:
+    """
+    Build the world of the example circuit 'a' scaled to a grid of the given size.
+    """
+    cartesian_variables = Symbol("x"), Symbol("y")
+    x, y = cartesian_variables
+    vertical_eqs = (0 * x, y)
+    horizontal_eqs = (x, 0 * y)
+
+    def position(q1, q2):
+        return round(q1 * (size - 1) / 100), round(q2 * (size - 1) / 100)
+
+    wires = [
+        Wire(position(26, 60), position(26, 74), vertical_eqs, cartesian_variables, 0.01),
+        Wire(position(26, 74), position(74, 74), horizontal_eqs, cartesian_variables, 0.01),
+        Wire(position(74, 74), position(74, 60), vertical_eqs, cartesian_variables, 0.01),
+        Wire(position(74, 60), position(74, 40), vertical_eqs, cartesian_variables, 1.0),
+        Wire(position(74, 40), position(74, 26), vertical_eqs, cartesian_variables, 0.01),
+        Wire(position(74, 26), position(26, 26), horizontal_eqs, cartesian_variables, 0.01),
+        Wire(position(26, 26), position(26, 40), vertical_eqs, cartesian_variables, 0.01),
+        VoltageSource(position(26, 40), position(26, 60), vertical_eqs, cartesian_variables, 1.0)
+    ]
+    circuit = Circuit(wires, position(26, 40))
+    return World(circuit=circuit, coordinate_system=CoordinateSystem.CARTESIAN, shape=(size, size))
+
+
+def measure(function):
+    """
+    Return the result of the given function, the peak memory, in bytes, allocated while it runs and the memory still
+    allocated when it returns.
+    """
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    result = function()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak - start, current - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory benchmark of the fields along the World.compute pipeline.")
+    parser.add_argument("--size", type=int, default=101, help="Size of the square world (default = 101).")
+    parser.add_argument("--iterations", type=int, default=100, help="Number of relaxation iterations (default = 100).")
+    arguments = parser.parse_args()
+
+    size = arguments.size
+    scalar_array = np.zeros((size, size))
+    vector_array = np.zeros((size, size, 3))
+    vector_field = VectorField(vector_array)
+
+    results = {
+        "ScalarField(array)": measure(lambda: ScalarField(scalar_array)),
+        "VectorField(array)": measure(lambda: VectorField(vector_array)),
+        "VectorField.x/.y/.z": measure(lambda: (vector_field.x, vector_field.y, vector_field.z)),
+    }
+
+    world = build_world(size)
+    coordinate_system, delta_q1, delta_q2 = world._coordinate_system, world.delta_q1, world.delta_q2
+
+    results["Laplace relaxation"] = measure(lambda: LaplaceEquationSolver(arguments.iterations).solve(
+        world._circuit_voltage, coordinate_system, delta_q1, delta_q2
+    ))
+    potential = results["Laplace relaxation"][0]
+    results["Gradient"] = measure(lambda: -potential.gradient())
+    electric_field = results["Gradient"][0]
+    results["Biot-Savart"] = measure(lambda: BiotSavartEquationSolver().solve(
+        world._circuit_current, coordinate_system, delta_q1, delta_q2
+    ))
+    magnetic_field = results["Biot-Savart"][0]
+    results["Cross product"] = measure(lambda: electric_field.cross(magnetic_field))
+    results["World.compute"] = measure(lambda: world.compute(arguments.iterations))
+
+    print(f"Grid of {size}x{size}, one float64 scalar field is {scalar_array.nbytes / 2**20:.3f} MiB")
+    print(f"{'':<24}{'peak':>12}{'held':>12}")
+    for name, (_, peak, held) in results.items():
+        print(f"{name:<24}{peak / 2**20:>8.3f} MiB{held / 2**20:>8.3f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark of the import time of the package. Run it from the repository root with
+
+    python -m benchmarks.import_time
+
+It imports the modules in fresh interpreters, as the worker processes of src.runner do, and reports the best import
+time of each. It exits with status 1 if an import loads one of the heavy modules which are only needed to show or
+display, e.g. matplotlib, or if it is slower than the given limit, e.g.
+
+    python -m benchmarks.import_time --limit 0.3
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import List
+
+# modules qui ne doivent être importés qu'au premier affichage ou à la première lecture d'une expression
+DEFERRED_MODULES = ("matplotlib", "networkx", "sympy", "scipy.ndimage", "scipy.constants")
+
+MODULES = ("src", "src.world", "src.runner", "src.netlist")
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [name for name in {deferred!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, repeats: int = 5) -> dict:
+    """
+    Import a module in fresh interpreters.
+
+    Returns
+    -------
+    result : dict
+        The module, its best import time in seconds, and the deferred modules loaded by its import.
+    """
+    best, loaded = float("inf"), []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", _SCRIPT.format(module=module, deferred=DEFERRED_MODULES)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        measure = json.loads(output.splitlines()[-1])
+        best = min(best, measure["seconds"])
+        loaded = measure["loaded"]
+    return {"module": module, "seconds": best, "loaded": loaded}
+
+
+def main(arguments: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark of the import time of the package.")
+    parser.add_argument("--modules", default=",".join(MODULES),
+                        help=f"Comma separated modules to import (default = {','.join(MODULES)}).")
+    parser.add_argument("--repeats", type=int, default=5, help="Number of imports of each module (default = 5).")
+    parser.add_argument("--limit", type=float, help="Maximum import time in seconds of each module.")
+    arguments = parser.parse_args(arguments)
+
+    failed = False
+    for module in arguments.modules.split(","):
+        result = measure_import(module, arguments.repeats)
+        loaded = f"  loads {', '.join(result['loaded'])}" if result["loaded"] else ""
+        print(f"{module:<16}{result['seconds']:>10.4f} s{loaded}")
+        if result["loaded"] or (arguments.limit is not None and result["seconds"] > arguments.limit):
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark suite of the solvers and of the world construction. Run it from the repository root with
+
+    python -m benchmarks.suite --output results.json
+
+It builds the example circuits a-d in cartesian coordinates, c with exact arcs and d in polar coordinates at several
+grid sizes, and times each stage of the pipeline, from the construction of the world to the energy flux. The peak
+memory of each stage is measured with tracemalloc in a separate run, since tracing slows the pure Python loops down.
+The results are printed and written as JSON. Given a previous output as baseline,
+
+    python -m benchmarks.suite --baseline results.json --threshold 0.2
+
+reports the stages which are more than 20 % slower or use more than 20 % more memory, and exits with status 1 if any.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from benchmarks.circuits import CIRCUITS
+from benchmarks.field_memory import measure
+from src import World
+from src.biot_savart_equation_solver import BiotSavartEquationSolver
+from src.laplace_equation_solver import LaplaceEquationSolver
+
+# durée, en secondes, sous laquelle les variations de temps sont considérées comme du bruit
+NOISE_FLOOR = 1e-3
+
+
+def time_stage(function: Callable, repeats: int) -> float:
+    """
+    Return the best wall time, in seconds, of the given function over the repeats.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_case(
+        circuit_name: str,
+        size: int,
+        nb_relaxation_iterations: int,
+        repeats: int = 1,
+        memory: bool = True
+) -> List[dict]:
+    """
+    Benchmark the stages of the pipeline for a circuit on a square grid of the given size.
+
+    Returns
+    -------
+    results : List[dict]
+        One record per stage, with its time in seconds and its peak memory in bytes (None if not measured).
+    """
+    build_circuit, coordinate_system = CIRCUITS[circuit_name]
+    shape = (size, size)
+
+    world = World(build_circuit(size), coordinate_system, shape)
+    circuit, delta_q1, delta_q2 = world._circuit, world.delta_q1, world.delta_q2
+    laplace_solver = LaplaceEquationSolver(nb_relaxation_iterations)
+    potential = laplace_solver.solve(world._circuit_voltage, coordinate_system, delta_q1, delta_q2)
+    electric_field = -potential.gradient()
+    magnetic_field = BiotSavartEquationSolver().solve(world._circuit_current, coordinate_system, delta_q1, delta_q2)
+
+    stages = {
+        # la construction rasterise les composants, les étapes suivantes réutilisent la rasterisation
+        "world_construction": lambda: World(build_circuit(size), coordinate_system, shape),
+        "circuit_solve": circuit.solve,
+        "voltage_and_current_fields": lambda: circuit.get_voltage_and_current_fields(
+            shape, world.minimum, world.maximum
+        ),
+        "laplace": lambda: laplace_solver.solve(world._circuit_voltage, coordinate_system, delta_q1, delta_q2),
+        "gradient": lambda: -potential.gradient(),
+        "biot_savart": lambda: BiotSavartEquationSolver().solve(
+            world._circuit_current, coordinate_system, delta_q1, delta_q2
+        ),
+        "cross_product": lambda: electric_field.cross(magnetic_field),
+    }
+
+    results = []
+    for stage, function in stages.items():
+        seconds = time_stage(function, repeats)
+        peak = measure(function)[1] if memory else None
+        results.append({
+            "circuit": circuit_name,
+            "coordinate_system": coordinate_system.name,
+            "size": size,
+            "nb_relaxation_iterations": nb_relaxation_iterations,
+            "stage": stage,
+            "seconds": seconds,
+            "peak_bytes": peak
+        })
+
+    return results
+
+
+def _case_key(result: dict) -> tuple:
+    return (result["circuit"], result["coordinate_system"], result["size"], result["nb_relaxation_iterations"],
+            result["stage"])
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> List[dict]:
+    """
+    Compare results with a baseline and return the regressions, i.e. the stages whose time or peak memory exceeds the
+    baseline's by more than the threshold, a fraction of the baseline. Times below NOISE_FLOOR are not compared.
+
+    Returns
+    -------
+    regressions : List[dict]
+        One record per regression, with the stage, the metric, the baseline and current values and their ratio.
+    """
+    baseline_by_case = {_case_key(result): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        reference = baseline_by_case.get(_case_key(result))
+        if reference is None:
+            continue
+
+        for metric in ("seconds", "peak_bytes"):
+            value, reference_value = result[metric], reference[metric]
+            if value is None or reference_value is None:
+                continue
+            if metric == "seconds" and max(value, reference_value) < NOISE_FLOOR:
+                continue
+            if value > reference_value * (1 + threshold):
+                regressions.append({
+                    **{key: result[key] for key in ("circuit", "coordinate_system", "size", "stage")},
+                    "metric": metric,
+                    "baseline": reference_value,
+                    "current": value,
+                    "ratio": value / reference_value if reference_value else float("inf")
+                })
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite of the solvers and of the world construction.")
+    parser.add_argument("--circuits", default=",".join(CIRCUITS),
+                        help=f"Comma separated circuits among {', '.join(CIRCUITS)} (default = all).")
+    parser.add_argument("--sizes", default="51,101", help="Comma separated grid sizes (default = 51,101).")
+    parser.add_argument("--iterations", type=int, default=100, help="Number of relaxation iterations (default = 100).")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of timed runs of each stage (default = 3).")
+    parser.add_argument("--no-memory", action="store_true", help="Do not measure the peak memory.")
+    parser.add_argument("--output", help="Path of the JSON results.")
+    parser.add_argument("--baseline", help="Path of JSON results to compare with.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative increase over the baseline reported as a regression (default = 0.2).")
+    arguments = parser.parse_args()
+
+    results = []
+    for circuit_name in arguments.circuits.split(","):
+        if circuit_name not in CIRCUITS:
+            parser.error(f"Unknown circuit '{circuit_name}'.")
+        for size in map(int, arguments.sizes.split(",")):
+            for result in run_case(circuit_name, size, arguments.iterations, arguments.repeats,
+                                   not arguments.no_memory):
+                results.append(result)
+                peak = "" if result["peak_bytes"] is None else f"{result['peak_bytes'] / 2**20:>10.3f} MiB"
+                print(f"{circuit_name:<8}{result['coordinate_system']:<10}{size:>5} {result['stage']:<28}"
+                      f"{result['seconds']:>10.4f} s{peak}")
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor()
+        },
+        "results": results
+    }
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=4)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)["results"]
+
+        regressions = compare(results, baseline, arguments.threshold)
+        for regression in regressions:
+            print(f"Regression of {regression['circuit']} {regression['coordinate_system']} {regression['size']} "
+                  f"{regression['stage']}: {regression['metric']} {regression['baseline']:.4g} -> "
+                  f"{regression['current']:.4g} (x{regression['ratio']:.2f})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression above {arguments.threshold:.0%} of the baseline.")
+
+
+if __name__ == "__main__":
+    main()
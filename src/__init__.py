@@ -1,7 +1,40 @@
+from src.checkpoint import RelaxationCheckpoint
 from src.circuit import Circuit
 from src.coordinate_and_position import CoordinateSystem
 from src.electrical_components import Wire, VoltageSource
+from src.geometry import Arc, Segment
+from src.grid import StretchedGrid
+from src.magnetic_field_cache import MagneticFieldCache
+from src.netlist import load_netlist, load_netlists, save_netlist, save_netlists
+from src.profiling import Profiler
+from src.progress import CancellationToken, ComputationCancelled, Progress
+from src.rendering import FieldAnimation, FieldRenderer, render_worlds
+from src.tiling import TiledStorage
 from src.world import World
+from src.world_cache import WorldCache
 
-__all__ = ["Circuit", "CoordinateSystem", "VoltageSource", "Wire", "World"]
-
+__all__ = [
+    "Arc",
+    "CancellationToken",
+    "Circuit",
+    "ComputationCancelled",
+    "CoordinateSystem",
+    "FieldAnimation",
+    "FieldRenderer",
+    "MagneticFieldCache",
+    "Profiler",
+    "Progress",
+    "RelaxationCheckpoint",
+    "Segment",
+    "StretchedGrid",
+    "TiledStorage",
+    "VoltageSource",
+    "Wire",
+    "World",
+    "WorldCache",
+    "load_netlist",
+    "load_netlists",
+    "render_worlds",
+    "save_netlist",
+    "save_netlists"
+]
@@ -1,24 +1,33 @@
+from typing import Tuple
+
 import numpy as np
-from scipy.constants import mu_0, pi
-import matplotlib.pyplot as plt
-from scipy import ndimage
 
 from src.coordinate_and_position import CoordinateSystem
-from src.fields import VectorField
+from src.fields import OutOfPlaneVectorField, VectorField
+from src.grid import StretchedGrid
+from src.progress import CancellationToken, ProgressCallback, report_progress
+from src.tiling import TiledStorage
 import warnings
 warnings.filterwarnings('ignore', category=RuntimeWarning)
 
 class BiotSavartEquationSolver:
     """
     A Biot–Savart law solver used to compute the resultant magnetic field B in 2D-space generated by a constant current
-    field I (for example due to wires).
+    field I (for example due to wires). The magnetic field is computed in the dtype of the current field, e.g. float32
+    for visualization-grade runs, while the sum over the circuit is accumulated in float64.
     """
+
+    # nombre de paires (cible, source) calculées à la fois hors des tuiles
+    TARGETS_BLOCK_SIZE = 2**21
+
     def _solve_in_cartesian_coordinate(
         self,
         electric_current: VectorField,
         delta_x: float,
-        delta_y: float
-    ) -> VectorField:
+        delta_y: float,
+        progress: ProgressCallback = None,
+        cancellation_token: CancellationToken = None
+    ) -> OutOfPlaneVectorField:
         """
         Solve the Biot–Savart equation to compute the magnetic field given an electric current field.
 
@@ -32,39 +41,28 @@ class BiotSavartEquationSolver:
             Small discretization of the x-axis.
         delta_y : float
             Small discretization of the y-axis.
+        progress : ProgressCallback
+            Function called with the progress after each block of rows of the field (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each block of rows of the field to cancel the computation (default = None).
 
         Returns
         -------
-        magnetic_field : VectorField
+        magnetic_field : OutOfPlaneVectorField
             A vector field B : ℝ² → ℝ³ ; (x, y) → (B_x(x, y), B_y(x, y), B_z(x, y)), where B_x(x, y), B_y(x, y) and
             B_z(x, y) are the 3 components of the magnetic vector at a given point (x, y) in space. Note that
-            B_x = B_y = 0 is always True in our 2D world.
-        """
-        #coordonnés du cirucuit dans un numpy array
-        circuit_coords = np.array([(x, y) for x, row in enumerate(electric_current) for y, val in enumerate(row) if val.any()])
-        #on initialise le champ_B comme 0
-        champ_B = np.zeros((electric_current.shape[0], electric_current.shape[1], 3))
-        for x in range(electric_current.shape[0]):
-            for y in range(electric_current.shape[1]):
-                # on aligne verticalement avec stack un numpy qui représente les distance r entre un point (x,y) et le circuit
-                r = np.stack((circuit_coords[:, 0] - x, circuit_coords[:, 1] - y, np.zeros(len(circuit_coords[:, 0]))), axis=-1)
-                
-                # on calcule le module de
-                module_r = np.sqrt((r ** 2).sum(axis=-1))
-                
-                #on calcule B avec la loi de Biot-Savart, c'est à dire un produit vectoriel
-                B = np.cross(r, electric_current[circuit_coords[:, 0], circuit_coords[:, 1]])[:, 2] / (module_r ** 3)
-                # on rajoute l'élément B trouvé à sa position (x,y) dans le champ_B (champ total)
-                champ_B[x, y][2] = np.sum(B, axis=0)
-                
-        return VectorField(np.nan_to_num(mu_0 * champ_B / (4 * pi), nan=0))
+            B_x = B_y = 0 is always True in our 2D world, so only B_z is stored.
+        """
+        return self._solve_by_rows(electric_current, progress, cancellation_token)
 
     def _solve_in_polar_coordinate(
             self,
             electric_current: VectorField,
             delta_r: float,
-            delta_theta: float
-    ) -> VectorField:
+            delta_theta: float,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None
+    ) -> OutOfPlaneVectorField:
         """
         Solve the Biot–Savart equation to compute the magnetic field given an electric current field.
 
@@ -78,40 +76,277 @@ class BiotSavartEquationSolver:
             Small discretization of the r-axis.
         delta_theta : float
             Small discretization of the θ-axis.
+        progress : ProgressCallback
+            Function called with the progress after each block of rows of the field (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each block of rows of the field to cancel the computation (default = None).
 
         Returns
         -------
-        magnetic_field : VectorField
+        magnetic_field : OutOfPlaneVectorField
             A vector field B : ℝ² → ℝ³ ; (r, θ) → (B_r(r, θ), B_θ(r, θ), B_z(r, θ)), where B_r(r, θ), B_θ(r, θ) and
             B_z(r, θ) are the 3 components of the magnetic vector at a given point (r, θ) in space. Note that
-            B_r = B_θ = 0 is always True in our 2D world.
-        """
-        #coordonnés du cirucuit dans un numpy array
-        circuit_coords = np.array([(r, theta) for r, row in enumerate(electric_current) for theta, val in enumerate(row) if val.any()])
-        #on initialise le champ_B comme 0
-        champ_B = np.zeros((electric_current.shape[0], electric_current.shape[1], 3))
-        for r in range(electric_current.shape[0]):
-            for theta in range(electric_current.shape[1]):
-                # on aligne verticalement avec stack un numpy qui représente les distance r entre un point (x,y) et le circuit
-                r_vec = np.stack((r - circuit_coords[:, 0], theta - circuit_coords[:, 1], np.zeros(len(circuit_coords[:, 0]))), axis=-1)
-                # on calcule le modul de r_vec
-                module_r = np.sqrt((r_vec ** 2).sum(axis=-1))
-                # on définit un vecteur représentant le courant
-                I_vec = np.stack((electric_current[circuit_coords[:, 0], circuit_coords[:, 1], 0], electric_current[circuit_coords[:, 0], circuit_coords[:, 1], 1], np.zeros(len(circuit_coords[:, 0]))), axis=-1)
-                # on calule le champ magnétique avec Bio-Savart (un produit vectoriel)
-                B_vec = np.cross(I_vec, r_vec)
-                # on rajoute l'élément B trouvé à sa position (x,y) dans le champ_B (champ total)
-                champ_B[r, theta][2] = np.sum(B_vec[:, 2] / (module_r ** 3), axis=0)
-                
-        return VectorField(np.nan_to_num(mu_0 * champ_B / (4 * pi), nan=0))
+            B_r = B_θ = 0 is always True in our 2D world, so only B_z is stored.
+        """
+        return self._solve_by_rows(electric_current, progress, cancellation_token)
+
+    def _solve_by_rows(
+            self,
+            electric_current: VectorField,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None
+    ) -> OutOfPlaneVectorField:
+        """
+        Solve the Biot–Savart equation on the grid indices of a field held in memory, as in both coordinates systems.
+        The target cells are summed by blocks of rows of the field, so the vectorized sum over the circuit never uses
+        more than about TARGETS_BLOCK_SIZE pairs of a target and a source at once.
+
+        Returns
+        -------
+        magnetic_field : OutOfPlaneVectorField
+            A vector field B : ℝ² → ℝ³ representing the magnetic field in the 2D world. Only B_z is stored.
+        """
+        shape, dtype = electric_current.shape[:2], electric_current.dtype
+        sources, courants = self._get_sources(electric_current)
+
+        # seule la composante z du champ B est non nulle, on ne stocke qu'elle
+        champ_B = np.zeros(shape, dtype=dtype)
+
+        lignes_par_bloc = max(1, self.TARGETS_BLOCK_SIZE // (max(1, len(sources)) * shape[1]))
+        colonnes = np.arange(shape[1])
+        for debut in range(0, shape[0], lignes_par_bloc):
+            fin = min(debut + lignes_par_bloc, shape[0])
+            lignes = np.arange(debut, fin)
+            cibles = np.stack((np.repeat(lignes, shape[1]), np.tile(colonnes, len(lignes))), axis=-1)
+            champ_B[debut:fin] = self._biot_savart_sum(sources, courants, cibles).reshape(len(lignes), shape[1])
+
+            report_progress(
+                progress, cancellation_token, "biot_savart", fin, shape[0], lambda: OutOfPlaneVectorField(champ_B)
+            )
+
+        return OutOfPlaneVectorField(champ_B)
+
+    @staticmethod
+    def _biot_savart_sum(
+            source_positions: np.ndarray,
+            source_currents: np.ndarray,
+            target_positions: np.ndarray
+    ) -> np.ndarray:
+        """
+        Sum the Biot–Savart contributions of current sources at target positions. The positions are given in grid
+        indices, as in the grid solvers, or in physical coordinates on a non-uniform grid. The field is null at a target
+        which coincides with a source.
+
+        Parameters
+        ----------
+        source_positions : np.ndarray
+            The (K, 2) array of the sources' positions.
+        source_currents : np.ndarray
+            The (K, 2) array of the sources' current vectors. Their dtype is used for the computation.
+        target_positions : np.ndarray
+            The (T, 2) array of the targets' positions.
+
+        Returns
+        -------
+        magnetic_field : np.ndarray
+            The (T,) array of the z component of the magnetic field at each target, accumulated in float64.
+        """
+        from scipy.constants import mu_0, pi
+
+        dtype = source_currents.dtype
+        sources = source_positions.astype(dtype, copy=False)
+        targets = target_positions.astype(dtype, copy=False)
+
+        # vecteurs r entre chaque cible (lignes) et chaque source du circuit (colonnes)
+        r_q1 = sources[np.newaxis, :, 0] - targets[:, np.newaxis, 0]
+        r_q2 = sources[np.newaxis, :, 1] - targets[:, np.newaxis, 1]
+        module_r = np.sqrt(r_q1 ** 2 + r_q2 ** 2)
+
+        # composante z du produit vectoriel r × I
+        B = (r_q1 * source_currents[:, 1] - r_q2 * source_currents[:, 0]) / (module_r ** 3)
+        champ_B = np.sum(B, axis=1, dtype=np.float64)
+        champ_B *= mu_0
+        champ_B /= 4 * pi
+
+        return np.nan_to_num(champ_B, copy=False, nan=0)
+
+    def _solve_by_tiles(
+            self,
+            electric_current: VectorField,
+            storage: TiledStorage,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None
+    ) -> OutOfPlaneVectorField:
+        """
+        Solve the Biot–Savart equation to compute the magnetic field given an electric current field, for worlds larger
+        than the memory. The circuit's cells are gathered by tiles of rows of the current field, then the magnetic field
+        is computed by streaming over tiles of target cells small enough for the memory budget of the storage.
+
+        Parameters
+        ----------
+        electric_current : VectorField
+            A vector field I : ℝ² → ℝ³ representing currents in the 2D world.
+        storage : TiledStorage
+            Storage of the memory-mapped magnetic field, which also bounds the size of the tiles.
+        progress : ProgressCallback
+            Function called with the progress after each tile of targets (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each tile of targets to cancel the computation (default = None).
+
+        Returns
+        -------
+        magnetic_field : OutOfPlaneVectorField
+            The memory-mapped vector field B : ℝ² → ℝ³ representing the magnetic field in the 2D world. Only B_z is
+            stored.
+        """
+        shape, dtype = electric_current.shape[:2], electric_current.dtype
+
+        # coordonnés et courants du circuit, lus par tuiles
+        sources, courants = [], []
+        for debut, fin in storage.row_tiles(shape[0], shape[1] * electric_current.itemsize * 2, nb_buffers=2):
+            tuile = np.asarray(electric_current[debut:fin])
+            q1, q2 = np.nonzero(tuile.any(axis=-1))
+            sources.append(np.stack((q1 + debut, q2), axis=-1))
+            courants.append(tuile[q1, q2])
+        sources, courants = np.concatenate(sources), np.concatenate(courants)
+
+        champ_B = storage.allocate("magnetic_field", shape, dtype, OutOfPlaneVectorField)
+        champ_B_plat = champ_B.reshape(-1)
+
+        # chaque cible utilise environ 6 tableaux de la taille du circuit
+        cibles_par_tuile = max(1, storage.memory_budget // (6 * max(1, len(sources)) * electric_current.itemsize))
+        nb_tuiles = -(-champ_B_plat.size // cibles_par_tuile)
+        for k, debut in enumerate(range(0, champ_B_plat.size, cibles_par_tuile)):
+            fin = min(debut + cibles_par_tuile, champ_B_plat.size)
+            cibles = np.stack(np.divmod(np.arange(debut, fin), shape[1]), axis=-1)
+            champ_B_plat[debut:fin] = self._biot_savart_sum(sources, courants, cibles)
+
+            report_progress(progress, cancellation_token, "biot_savart", k + 1, nb_tuiles, lambda: champ_B)
+
+        return champ_B
+
+    def _solve_on_grid(
+            self,
+            electric_current: VectorField,
+            grid: StretchedGrid,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None
+    ) -> OutOfPlaneVectorField:
+        """
+        Solve the Biot–Savart equation to compute the magnetic field given an electric current field defined on a
+        non-uniform cartesian grid. The sources and the targets are placed at their physical coordinates and each
+        component of a source's current is weighted by the size of its cell along the same axis, so the field stays
+        linear in the current and, on a uniform grid of unit spacing, the result is the same as
+        _solve_in_cartesian_coordinate.
+
+        Parameters
+        ----------
+        electric_current : VectorField
+            A vector field I : ℝ² → ℝ³ representing currents in the 2D world.
+        grid : StretchedGrid
+            The non-uniform grid on which the current field is defined.
+        progress : ProgressCallback
+            Function called with the progress after each block of targets (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each block of targets to cancel the computation (default = None).
+
+        Returns
+        -------
+        magnetic_field : OutOfPlaneVectorField
+            A vector field B : ℝ² → ℝ³ representing the magnetic field in the 2D world. Only B_z is stored.
+        """
+        shape, dtype = electric_current.shape[:2], electric_current.dtype
+        sources, courants = self._get_sources(electric_current, grid)
+
+        champ_B = np.zeros(shape, dtype=dtype)
+        champ_B_plat = champ_B.reshape(-1)
+
+        cibles_par_tuile = max(1, self.TARGETS_BLOCK_SIZE // max(1, len(sources)))
+        nb_tuiles = -(-champ_B_plat.size // cibles_par_tuile)
+        for k, debut in enumerate(range(0, champ_B_plat.size, cibles_par_tuile)):
+            fin = min(debut + cibles_par_tuile, champ_B_plat.size)
+            i, j = np.divmod(np.arange(debut, fin), shape[1])
+            cibles = np.stack((grid.q1_values[i], grid.q2_values[j]), axis=-1)
+            champ_B_plat[debut:fin] = self._biot_savart_sum(sources, courants, cibles)
+
+            report_progress(
+                progress, cancellation_token, "biot_savart", k + 1, nb_tuiles, lambda: OutOfPlaneVectorField(champ_B)
+            )
+
+        return OutOfPlaneVectorField(champ_B)
+
+    @staticmethod
+    def _get_sources(electric_current: VectorField, grid: StretchedGrid = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and current vectors of the cells of the circuit, i.e. the cells where the current is not null. The
+        positions are grid indices, or physical coordinates on a non-uniform grid, where each component of a current is
+        then multiplied by the size of its cell along the same axis to give the current element I dl.
+
+        Returns
+        -------
+        positions, currents : Tuple[np.ndarray, np.ndarray]
+            The (K, 2) arrays of the sources' positions and current vectors, in the dtype of the current field.
+        """
+        courant = np.asarray(electric_current)
+        q1, q2 = np.nonzero(courant.any(axis=-1))
+        if grid is None:
+            return np.stack((q1, q2), axis=-1), courant[q1, q2]
+
+        # coordonnés physiques et élément de courant I dl, chaque composante est multipliée par la taille de la
+        # cellule sur son axe
+        tailles_q1, tailles_q2 = grid.cell_sizes
+        positions = np.stack((grid.q1_values[q1], grid.q2_values[q2]), axis=-1)
+        courants = courant[q1, q2].astype(np.float64) * np.stack((tailles_q1[q1], tailles_q2[q2]), axis=-1)
+        return positions, courants.astype(courant.dtype)
+
+    def evaluate_at(
+            self,
+            electric_current: VectorField,
+            points: np.ndarray,
+            grid: StretchedGrid = None
+    ) -> np.ndarray:
+        """
+        Evaluate the magnetic field given an electric current field only at some points, e.g. sensor locations, without
+        solving the Biot–Savart equation on the whole grid. The direct sum over the circuit's cells costs O(P·K) for P
+        points and K cells of the circuit, and the points do not need to be on the grid.
+
+        Parameters
+        ----------
+        electric_current : VectorField
+            A vector field I : ℝ² → ℝ³ representing currents in the 2D world.
+        points : np.ndarray
+            The (P, 2) array of the points' positions, in (possibly fractional) grid indices as in the grid solvers of
+            both coordinates systems, or in physical coordinates if a non-uniform grid is given.
+        grid : StretchedGrid
+            Non-uniform grid on which the current field is defined (default = None).
+
+        Returns
+        -------
+        magnetic_field : np.ndarray
+            The (P,) array of the z component of the magnetic field at each point, in the dtype of the current field.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        sources, courants = self._get_sources(electric_current, grid)
+
+        champ_B = np.empty(len(points), dtype=electric_current.dtype)
+        points_par_bloc = max(1, self.TARGETS_BLOCK_SIZE // max(1, len(sources)))
+        for debut in range(0, len(points), points_par_bloc):
+            fin = min(debut + points_par_bloc, len(points))
+            champ_B[debut:fin] = self._biot_savart_sum(sources, courants, points[debut:fin])
+
+        return champ_B
 
     def solve(
             self,
             electric_current: VectorField,
             coordinate_system: CoordinateSystem,
             delta_q1: float,
-            delta_q2: float
-    ) -> VectorField:
+            delta_q2: float,
+            storage: TiledStorage = None,
+            grid: StretchedGrid = None,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None
+    ) -> OutOfPlaneVectorField:
         """
         Solve the Biot–Savart equation to compute the magnetic field given an electric current field.
 
@@ -125,15 +360,40 @@ class BiotSavartEquationSolver:
             Small discretization of the first axis.
         delta_q2 : float
             Small discretization of the second axis.
+        storage : TiledStorage
+            Storage used to solve worlds larger than the memory by tiles. The magnetic field is then a memory-mapped
+            field of this storage (default = None).
+        grid : StretchedGrid
+            Non-uniform grid on which the current field is defined. The discretizations delta_q1 and delta_q2 are then
+            ignored. Only the cartesian coordinates system is implemented on non-uniform grids (default = None).
+        progress : ProgressCallback
+            Function called with the progress of the sum, i.e. the fraction of the rows, tiles or blocks of target cells
+            done, after each of them (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each block of rows, tile or block of target cells. If it is cancelled,
+            ComputationCancelled is raised with the magnetic field of the target cells done so far, the others being
+            null (default = None).
 
         Returns
         -------
-        magnetic_field : VectorField
-            A vector field B : ℝ² → ℝ³ representing the magnetic field in the 2D world.
+        magnetic_field : OutOfPlaneVectorField
+            A vector field B : ℝ² → ℝ³ representing the magnetic field in the 2D world. Only B_z is stored.
         """
+        if grid is not None:
+            if coordinate_system != CoordinateSystem.CARTESIAN or storage is not None:
+                raise NotImplementedError("Only the cartesian coordinates system is implemented on non-uniform grids.")
+            return self._solve_on_grid(electric_current, grid, progress, cancellation_token)
+
+        if storage is not None:
+            if coordinate_system not in (CoordinateSystem.CARTESIAN, CoordinateSystem.POLAR):
+                raise NotImplementedError("Only the cartesian and polar coordinates solvers are implemented.")
+            return self._solve_by_tiles(electric_current, storage, progress, cancellation_token)
+
         if coordinate_system == CoordinateSystem.CARTESIAN:
-            return self._solve_in_cartesian_coordinate(electric_current, delta_q1, delta_q2)
+            return self._solve_in_cartesian_coordinate(
+                electric_current, delta_q1, delta_q2, progress, cancellation_token
+            )
         elif coordinate_system == CoordinateSystem.POLAR:
-            return self._solve_in_polar_coordinate(electric_current, delta_q1, delta_q2)
+            return self._solve_in_polar_coordinate(electric_current, delta_q1, delta_q2, progress, cancellation_token)
         else:
             raise NotImplementedError("Only the cartesian and polar coordinates solvers are implemented.")
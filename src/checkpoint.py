@@ -0,0 +1,128 @@
+import glob
+import os
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class RelaxationCheckpoint:
+    """
+    Checkpoints of a relaxation of the potential, so a long run interrupted e.g. by the pre-emption of its node can be
+    resumed from its last checkpoint instead of from the start. Each checkpoint is a .npy file of the working potential
+    whose name holds the key of the relaxation's inputs and the number of iterations done. It is written to a temporary
+    file which is then renamed, so a checkpoint is either complete or absent, never partially written.
+
+    The relaxation is deterministic, so resuming from a checkpoint gives exactly the potential of an uninterrupted run.
+    """
+
+    def __init__(self, directory: str, every_iterations: int = None, every_seconds: float = None):
+        """
+        Relaxation checkpoint constructor.
+
+        Parameters
+        ----------
+        directory : str
+            Directory in which the checkpoints are written. It is created if it does not exist.
+        every_iterations : int
+            Number of iterations between two checkpoints (default = None).
+        every_seconds : float
+            Number of seconds between two checkpoints. If both intervals are given, a checkpoint is written when either
+            is reached. If none is given, a checkpoint is written every 100 iterations (default = None).
+        """
+        if every_iterations is not None and every_iterations <= 0:
+            raise ValueError(f"The number of iterations between checkpoints should be positive. "
+                             f"Received {every_iterations}.")
+        if every_seconds is not None and every_seconds <= 0:
+            raise ValueError(f"The time between checkpoints should be positive. Received {every_seconds}.")
+        if every_iterations is None and every_seconds is None:
+            every_iterations = 100
+
+        self._directory = directory
+        self._every_iterations = every_iterations
+        self._every_seconds = every_seconds
+        self._key = None
+        self._last_iteration = 0
+        self._last_time = time.monotonic()
+
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def _path(self, key: str, iteration: int) -> str:
+        return os.path.join(self._directory, f"relaxation-{key}-{iteration:010d}.npy")
+
+    def _paths(self, key: str) -> list:
+        return sorted(glob.glob(os.path.join(self._directory, f"relaxation-{key}-*.npy")))
+
+    def resume(self, key: str, nb_iterations: int, mmap_mode: str = None) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Starts a relaxation with the given key and returns its latest checkpoint, if any. The next checkpoints are
+        written for this key.
+
+        Parameters
+        ----------
+        key : str
+            Key of the relaxation's inputs, see LaplaceEquationSolver.
+        nb_iterations : int
+            Number of iterations of the relaxation. Checkpoints of more iterations are ignored.
+        mmap_mode : str
+            Memory-map mode of the loaded potential, e.g. "r" for worlds stored by tiles (default = None).
+
+        Returns
+        -------
+        checkpoint : Optional[Tuple[int, np.ndarray]]
+            The number of iterations done and the potential of the latest checkpoint, or None if there is none.
+        """
+        self._key = key
+        self._last_time = time.monotonic()
+        self._last_iteration = 0
+
+        for path in reversed(self._paths(key)):
+            iteration = int(os.path.basename(path)[:-len(".npy")].rsplit("-", 1)[1])
+            if iteration <= nb_iterations:
+                self._last_iteration = iteration
+                return iteration, np.load(path, mmap_mode=mmap_mode)
+        return None
+
+    def is_due(self, iteration: int) -> bool:
+        """
+        Whether a checkpoint should be written after the given number of iterations.
+        """
+        if self._every_iterations is not None and iteration - self._last_iteration >= self._every_iterations:
+            return True
+        return self._every_seconds is not None and time.monotonic() - self._last_time >= self._every_seconds
+
+    def save(self, iteration: int, potential: np.ndarray):
+        """
+        Writes the checkpoint of the potential after the given number of iterations, then removes the previous
+        checkpoints of the relaxation.
+        """
+        if self._key is None:
+            raise ValueError("The checkpoint should be resumed with the relaxation's key before being saved.")
+
+        path = self._path(self._key, iteration)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.save(file, np.asarray(potential))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+
+        for previous_path in self._paths(self._key):
+            if previous_path != path:
+                os.remove(previous_path)
+
+        self._last_iteration = iteration
+        self._last_time = time.monotonic()
+
+    def clear(self):
+        """
+        Removes the checkpoints of the relaxation, e.g. once it is finished.
+        """
+        if self._key is None:
+            return
+        for path in self._paths(self._key):
+            os.remove(path)
@@ -1,13 +1,15 @@
 from typing import List, Tuple
 
-import matplotlib.pyplot as plt
-import networkx as nx
 import numpy as np
 
+from src.circuit_arrays import CircuitArrays
 from src.circuit_node import CircuitNode
 from src.coordinate_and_position import Position
 from src.electrical_components import CurrentSource, ElectricalComponent, VoltageSource, Wire
 from src.fields import ScalarField, VectorField
+from src.grid import StretchedGrid
+from src.profiling import Profiler, profile_stage
+from src.tiling import TiledStorage
 
 
 class Circuit:
@@ -28,13 +30,22 @@ class Circuit:
             increment_size: float = 0.01
     ):
         self._components = components
-        self._graph = nx.DiGraph()
+        self._graph = None
         self._ground_position = ground_position
         self._increment_size = increment_size
+        self._rasterizations = {}
+        self._topology = None
 
-        self._build_graph()
+        self._build_arrays()
         self._validate_closed_circuit()
 
+    @property
+    def arrays(self) -> CircuitArrays:
+        """
+        The structure of arrays of the circuit's components and nodes.
+        """
+        return self._arrays
+
     @property
     def components(self) -> List[ElectricalComponent]:
         return self._components
@@ -45,19 +56,27 @@ class Circuit:
 
     @property
     def graph(self):
+        """
+        The networkx graph of the circuit, whose edges are the components. It is only built when it is first used, e.g.
+        to display the circuit, since the circuit is solved on its arrays.
+        """
+        if self._graph is None:
+            self._build_graph()
         return self._graph
 
     @property
     def has_current_sources(self):
-        return len(self._get_current_sources()) != 0
+        return bool(np.any(self._arrays.types == CircuitArrays.CURRENT_SOURCE))
 
     @property
     def has_voltage_sources(self):
-        return len(self._get_voltage_sources()) != 0
+        return bool(np.any(self._arrays.types == CircuitArrays.VOLTAGE_SOURCE))
 
     @property
     def is_closed(self):
-        return all([self._graph.degree(n) > 1 for n in self._graph.nodes])
+        degrees = np.bincount(self._arrays.start_nodes, minlength=len(self._arrays.node_potentials))
+        degrees += np.bincount(self._arrays.stop_nodes, minlength=len(self._arrays.node_potentials))
+        return bool(np.all(degrees > 1))
 
     @property
     def nodes(self):
@@ -77,207 +96,190 @@ class Circuit:
         node_uid = 0
         for component in self.components:
             start_position, stop_position = component.start_position, component.stop_position
-            if start_position not in list(position_to_node_mapping.keys()):
+            if start_position not in position_to_node_mapping:
                 position_to_node_mapping[start_position] = CircuitNode(start_position, node_uid)
                 node_uid += 1
-            if stop_position not in list(position_to_node_mapping.keys()):
+            if stop_position not in position_to_node_mapping:
                 position_to_node_mapping[stop_position] = CircuitNode(stop_position, node_uid)
                 node_uid += 1
 
         self._position_to_node_mapping = position_to_node_mapping
 
-    def _build_graph(self):
+    def _build_arrays(self):
         """
-        Build a graph from the components. Each component is an edge in the graph. The start and stop nodes of the
+        Build the structure of arrays of the circuit from its components, then make the components and the nodes facades
+        of these arrays.
         """
         self._build_position_to_node_mapping()
+        nodes = list(self._position_to_node_mapping.values())
+        arrays = CircuitArrays(len(self.components), len(nodes))
+
+        for component_type, code in ((Wire, CircuitArrays.WIRE), (VoltageSource, CircuitArrays.VOLTAGE_SOURCE),
+                                     (CurrentSource, CircuitArrays.CURRENT_SOURCE)):
+            arrays.types[[isinstance(component, component_type) for component in self.components]] = code
+        wires = arrays.get_indices(CircuitArrays.WIRE)
+        voltage_sources = arrays.get_indices(CircuitArrays.VOLTAGE_SOURCE)
+
+        if self.components:
+            arrays.start_positions[:] = [component.start_position for component in self.components]
+            arrays.stop_positions[:] = [component.stop_position for component in self.components]
+        arrays.start_nodes[:] = [self._position_to_node_mapping[c.start_position].uid for c in self.components]
+        arrays.stop_nodes[:] = [self._position_to_node_mapping[c.stop_position].uid for c in self.components]
+        arrays.resistances[wires] = [self.components[i].resistance for i in wires]
+        arrays.voltages[voltage_sources] = [self.components[i].voltage for i in voltage_sources]
+        arrays.currents[:] = [np.nan if c.current is None else c.current for c in self.components]
+
+        for node in nodes:
+            node._bind(arrays)
+        for index, component in enumerate(self.components):
+            component.start_node = nodes[arrays.start_nodes[index]]
+            component.stop_node = nodes[arrays.stop_nodes[index]]
+            component._bind(arrays, index)
+
+        self._arrays = arrays
+
+    def _build_graph(self):
+        """
+        Build a graph from the components. Each component is an edge in the graph from its start to its stop node.
+        """
+        import networkx as nx
+
+        self._graph = nx.DiGraph()
         for component in self.components:
-            component.start_node = self._position_to_node_mapping[component.start_position]
-            component.stop_node = self._position_to_node_mapping[component.stop_position]
-            self.graph.add_edge(
+            self._graph.add_edge(
                 u_of_edge=component.start_node.uid,
                 v_of_edge=component.stop_node.uid,
                 component=component
             )
-            self.nodes[component.start_node.uid][self.NODE_KEY] = component.start_node
-            self.nodes[component.stop_node.uid][self.NODE_KEY] = component.stop_node
-
-    def _get_graph_without_current_sources(self):
-        """
-        Return a copy of the graph without the current sources.
-        """
-        graph_without_current_sources = self.graph.copy()
-
-        for edge in self.graph.edges:
-            component = self.graph.get_edge_data(*edge)[self.COMPONENT_KEY]
-
-            if isinstance(component, CurrentSource):
-                graph_without_current_sources.remove_edge(*edge)
-
-        return graph_without_current_sources
-
-    def _get_kirchoff_loops(self):
-        """
-        Return a list of loops in the graph. A loop is a list of edges that form a closed loop.
-        """
-        graph_without_current_sources = self._get_graph_without_current_sources()
-        undirected_graph = graph_without_current_sources.to_undirected()
-        return nx.cycle_basis(undirected_graph)
-
-    def _get_edge_index(self, edge):
-        """
-        Return the index of the edge in the sorted list of edges.
-        """
-        indices = []
-        for i, e in enumerate(self.sorted_edges):
-            if (e[0] == edge[0] and e[1] == edge[1]) or (e[0] == edge[1] and e[1] == edge[0]):
-                indices.append(i)
-
-        if len(indices) == 1:
-            return indices[0]
-
-        return indices
-
-    def _get_current_sources(self):
-        """
-        Return a list of the current sources in the graph.
-        """
-        edges = list(self.edges(data=self.COMPONENT_KEY))
-        edges.sort()
-
-        return [edge for edge in edges if isinstance(edge[2], CurrentSource)]
+            self._graph.nodes[component.start_node.uid][self.NODE_KEY] = component.start_node
+            self._graph.nodes[component.stop_node.uid][self.NODE_KEY] = component.stop_node
+
+    def _get_topology(self) -> dict:
+        """
+        Return the topology of the circuit, i.e. the ground node, the indices of the wires, voltage sources and current
+        sources, and the incidence matrix of the components on the nodes other than the ground. It only depends on the
+        components and their positions, so it is computed once and reused every time the circuit is solved again with
+        new voltages, resistances or currents.
+        """
+        if self._topology is not None:
+            return self._topology
+
+        from scipy import sparse
+
+        arrays = self._arrays
+        nb_nodes, nb_components = len(arrays.node_potentials), len(arrays)
+        ground = self._position_to_node_mapping[self._ground_position].uid
+
+        # la masse n'a pas de ligne dans la matrice d'incidence, son potentiel est nul
+        rows = np.arange(nb_nodes) - (np.arange(nb_nodes) > ground)
+        rows[ground] = -1
+        rows = np.concatenate((rows[arrays.start_nodes], rows[arrays.stop_nodes]))
+        columns = np.tile(np.arange(nb_components), 2)
+        data = np.repeat([1.0, -1.0], nb_components)
+        is_not_ground = rows >= 0
+
+        self._topology = {
+            "ground": ground,
+            "wires": arrays.get_indices(CircuitArrays.WIRE),
+            "voltage_sources": arrays.get_indices(CircuitArrays.VOLTAGE_SOURCE),
+            "current_sources": arrays.get_indices(CircuitArrays.CURRENT_SOURCE),
+            "incidence": sparse.csc_matrix(
+                (data[is_not_ground], (rows[is_not_ground], columns[is_not_ground])),
+                shape=(nb_nodes - 1, nb_components)
+            )
+        }
+        return self._topology
 
-    def _get_voltage_sources(self):
+    def _solve_modified_nodal_analysis(self) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Return a list of the voltage sources in the graph.
+        Solve the circuit by modified nodal analysis and return the potential of each node and the current of each
+        component, from its start to its stop node. The unknowns are the potentials of the nodes other than the ground
+        and the currents of the voltage sources and of the wires without resistance, which are voltage sources of 0 V.
+        Kirchhoff's current law gives one equation per node and each of these sources one equation on the potentials
+        of its nodes, so no loop of the circuit has to be found.
         """
-        edges = list(self.edges(data=self.COMPONENT_KEY))
-        edges.sort()
+        from scipy import sparse
+        from scipy.sparse.linalg import splu
 
-        return [edge for edge in edges if isinstance(edge[2], VoltageSource)]
+        arrays = self._arrays
+        topology = self._get_topology()
+        incidence = topology["incidence"]
+        wires, voltage_sources = topology["wires"], topology["voltage_sources"]
+        current_sources = topology["current_sources"]
 
-    def _get_node_current_constraints(self):
-        """
-        Return the constraints for the current at each node.
-        """
-        edges = self.sorted_edges
+        resistances = arrays.resistances[wires]
+        is_short = resistances == 0
+        resistors, resistances = wires[~is_short], resistances[~is_short]
+        sources = np.concatenate((voltage_sources, wires[is_short]))
+        source_voltages = np.concatenate((arrays.voltages[voltage_sources], np.zeros(np.count_nonzero(is_short))))
+        source_currents = arrays.currents[current_sources]
 
-        n_nodes = len(self.graph.nodes)
-        n_edges = len(edges)
+        self._verify_solvability(resistors, sources)
 
-        constraints = np.zeros(shape=(n_nodes, n_edges))
-        constants = np.zeros(shape=n_nodes)
+        resistors_incidence, sources_incidence = incidence[:, resistors], incidence[:, sources]
+        conductances = resistors_incidence @ sparse.diags(1 / resistances) @ resistors_incidence.T
+        matrix = sparse.bmat([[conductances, sources_incidence], [sources_incidence.T, None]], format="csc")
+        constants = np.concatenate((-(incidence[:, current_sources] @ source_currents), -source_voltages))
+        try:
+            solution = splu(matrix).solve(constants)
+        except RuntimeError as error:
+            raise ArithmeticError(f"The system is not fully solvable: {error}") from error
 
-        for i, node in enumerate(self.graph.nodes):
-            for j, current in enumerate(edges):
-                if current[0] == node:
-                    constraints[i][j] = -1
+        nb_nodes = len(arrays.node_potentials)
+        potentials = np.insert(solution[:nb_nodes - 1], topology["ground"], 0.0)
 
-                elif current[1] == node:
-                    constraints[i][j] = +1
+        currents = np.empty(len(arrays))
+        start_nodes, stop_nodes = arrays.start_nodes, arrays.stop_nodes
+        currents[resistors] = (potentials[start_nodes[resistors]] - potentials[stop_nodes[resistors]]) / resistances
+        currents[sources] = solution[nb_nodes - 1:]
+        currents[current_sources] = source_currents
 
-        return constraints, constants
+        return potentials, currents
 
-    def _get_loop_voltage_constraints(self):
+    def _set_currents(self, current_solution: np.ndarray):
         """
-        Return the constraints for the voltage at each loop.
+        Set the currents of the components with the current solution.
         """
-        edges = self.sorted_edges
-        loops = self._get_kirchoff_loops()
-
-        n_loops = len(loops)
-        n_edges = len(edges)
-
-        constraints = np.zeros(shape=(n_loops, n_edges))
-        constants = np.zeros(shape=n_loops)
-
-        for i, loop in enumerate(loops):
-            for j, node in enumerate(loop):
-                forward_edge = (loop[j - 1], node)
-                backward_edge = (node, loop[j - 1])
-                for k, edge in enumerate(edges):
-                    if forward_edge == edge:
-                        direction = +1
-                    elif backward_edge == edge:
-                        direction = -1
-                    else:
-                        continue
-
-                    data = self.graph.get_edge_data(*edge)
-
-                    if isinstance(data[self.COMPONENT_KEY], Wire):
-                        constraints[i][k] = -direction * data[self.COMPONENT_KEY].resistance
-                    elif isinstance(data[self.COMPONENT_KEY], VoltageSource):
-                        constants[i] += -direction * data[self.COMPONENT_KEY].voltage
+        self._arrays.currents[:] = current_solution
 
-        return constraints, constants
-
-    def _get_current_source_constraints(self):
+    def _set_potentials(self, potential_solution: np.ndarray):
         """
-        Return the constraints for the current at each current source.
+        Set the potentials of all the nodes at once with the potential solution of the modified nodal analysis, which
+        gives the potential of every node, unlike a search of the circuit's graph from the ground.
         """
-        edges = self.sorted_edges
-        sources = self._get_current_sources()
-
-        n_sources = len(sources)
-        n_edges = len(edges)
-
-        constraints = np.zeros(shape=(n_sources, n_edges))
-        constants = np.zeros(shape=n_sources)
-
-        for i, source in enumerate(sources):
-            j = self._get_edge_index((source[0], source[1]))
-            constraints[i][j] = 1
-            constants[i] = source[2].current
+        self._arrays.node_potentials[:] = potential_solution
 
-        return constraints, constants
-
-    def _get_constraints(self):
+    def _verify_solvability(self, resistors: np.ndarray, sources: np.ndarray):
         """
-        Return the constraints for the circuit.
+        Verify that the system is solvable, i.e. that every node is connected to the ground by wires or voltage sources
+        and that the voltage sources and the wires without resistance do not form a loop, whose current would be
+        undetermined. The components are given by their indices.
         """
-        current_constraints, current_constants = self._get_node_current_constraints()
-        volt_constraints, volt_constants = self._get_loop_voltage_constraints()
-        source_constraints, source_constants = self._get_current_source_constraints()
-        return (
-            np.concatenate((current_constraints, volt_constraints, source_constraints)),
-            np.concatenate((current_constants, volt_constants, source_constants))
-        )
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
 
-    def _set_currents(self, current_solution):
-        """
-        Set the currents in the graph with the current solution.
-        """
-        for i, edge in enumerate(self.sorted_edges):
-            self.graph.edges[edge][self.COMPONENT_KEY].current = current_solution[i]
-            component = self.graph.edges[edge][self.COMPONENT_KEY]
-            component.label = component.label + f" (I={component.current:.3f}A)"
+        topology = self._get_topology()
+        nb_nodes = len(self._arrays.node_potentials)
+        start_nodes, stop_nodes = self._arrays.start_nodes, self._arrays.stop_nodes
 
-    def _set_potentials(self):
-        """
-        Set the potentials in the graph by using the Kirchoff's voltage law and the solved currents
-        """
-        ground_node = self._position_to_node_mapping[self._ground_position]
-        for i, edge in enumerate(nx.bfs_edges(self.graph, ground_node.uid)):
-            component = self.graph.edges[edge][self.COMPONENT_KEY]
-            if i == 0:
-                component.start_node.potential = 0
-            if isinstance(component, VoltageSource):
-                component.stop_node.potential = component.start_node.potential + component.voltage
-            if isinstance(component, Wire):
-                component.stop_node.potential = component.start_node.potential - component.current*component.resistance
+        def get_connected_components(components: np.ndarray) -> Tuple[int, np.ndarray]:
+            adjacency = coo_matrix(
+                (np.ones(len(components)), (start_nodes[components], stop_nodes[components])),
+                shape=(nb_nodes, nb_nodes)
+            )
+            return connected_components(adjacency, directed=False)
 
-        for i, node in enumerate(self.nodes):
-            node = self.nodes[node][self.NODE_KEY]
-            node.label = f"{node.potential:.3f}V"
+        _, labels = get_connected_components(np.concatenate((resistors, sources)))
+        nb_floating_nodes = np.count_nonzero(labels != labels[topology["ground"]])
+        if nb_floating_nodes:
+            raise ArithmeticError(f"The system is not fully solvable: {nb_floating_nodes} nodes are not connected to "
+                                  f"the ground by wires or voltage sources.")
 
-    def _verify_solvability(self, kirchoff_matrix):
-        """
-        Verify that the system is solvable by checking that the rank of the matrix is equal to the number of unknowns.
-        """
-        rank = np.linalg.matrix_rank(kirchoff_matrix)
-        if rank != len(self.edges):
-            raise ArithmeticError(f"The system is not fully solvable: rank is {rank} vs {self.edges} unknowns")
+        # les sources de tension forment une forêt si et seulement si chaque source réduit le nombre de composantes
+        nb_connected_components, _ = get_connected_components(sources)
+        if len(sources) > nb_nodes - nb_connected_components:
+            raise ArithmeticError("The system is not fully solvable: voltage sources or wires without resistance form "
+                                  "a loop.")
 
     def _validate_closed_circuit(self):
         """
@@ -291,29 +293,34 @@ class Circuit:
         """
         Solve the circuit by solving Kirchoff's laws and return the components with their currents and potentials.
         """
-        kirchoff_matrix, constants = self._get_constraints()
-
-        self._verify_solvability(kirchoff_matrix)
-
-        currents = np.linalg.pinv(kirchoff_matrix) @ constants
+        potentials, currents = self._solve_modified_nodal_analysis()
 
         self._set_currents(currents)
-        self._set_potentials()
+        self._set_potentials(potentials)
 
         return self._components
 
     def display(self, nodes_position_in_figure: dict = None):
         """
-        Display the circuit using networkx.
+        Display the circuit using networkx. Once the circuit is solved, the nodes are labeled with their potential and
+        the components' labels are followed by their current.
         """
+        import matplotlib.pyplot as plt
+        import networkx as nx
 
         if not nodes_position_in_figure:
             nodes_position_in_figure = {}
             for n in self.graph.nodes:
                 nodes_position_in_figure[n] = (n % 10, -(n // 10))
 
-        edge_labels = {(u, v): self.graph.get_edge_data(u, v)[self.COMPONENT_KEY].label for u, v in self.graph.edges()}
-        node_labels = {n: self.nodes[n][self.NODE_KEY].label for n in self.graph.nodes()}
+        edge_labels, node_labels = {}, {}
+        for u, v in self.graph.edges():
+            component = self.graph.get_edge_data(u, v)[self.COMPONENT_KEY]
+            current = component.current
+            edge_labels[(u, v)] = component.label if current is None else f"{component.label} (I={current:.3f}A)"
+        for n in self.graph.nodes():
+            node = self.nodes[n][self.NODE_KEY]
+            node_labels[n] = node.label if node.potential is None else f"{node.potential:.3f}V"
 
         nx.draw_networkx_nodes(
             G=self.graph,
@@ -352,25 +359,48 @@ class Circuit:
         plt.axis('off')
         plt.show()
 
-    def _get_component_voltage_and_current_fields(
+    def _rasterize_component(
             self,
             component: ElectricalComponent,
             shape: Tuple[int, int],
             minimum: Position,
-            maximum: Position
-    ):
-        """
-        Return the voltage and current fields of a component.
-        """
-        component_voltage = ScalarField(np.zeros(shape))
-        component_current = VectorField(np.zeros((shape[0], shape[1], 2)))
-        horizontal_values = np.linspace(minimum[0], maximum[0], num=shape[0])
-        vertical_values = np.linspace(minimum[1], maximum[1], num=shape[1])
+            maximum: Position,
+            grid: StretchedGrid = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the grid cells covered by a component and the unit direction of the component at each of these cells.
+        The rasterization only depends on the component's geometry and on the grid, so it is cached and reused every
+        time the circuit is solved again with new voltages, resistances or currents. If a non-uniform grid is given, the
+        cells are looked up in its coordinates instead of the uniform grid spanning [minimum, maximum]. A component
+        with a primitive shape, e.g. a Segment or an Arc, is rasterized exactly by its shape.
+
+        Returns
+        -------
+        cells, directions : Tuple[np.ndarray, np.ndarray]
+            The (P, 2) array of grid indices covered by the component, ordered from the start to the stop position,
+            and the (P, 2) array of the component's normalized direction at each of these cells.
+        """
+        grid_key = None if grid is None else (grid.q1_values.tobytes(), grid.q2_values.tobytes())
+        key = (id(component), shape, tuple(minimum), tuple(maximum), grid_key)
+        if key in self._rasterizations:
+            return self._rasterizations[key]
+
+        if grid is None:
+            horizontal_values = np.linspace(minimum[0], maximum[0], num=shape[0])
+            vertical_values = np.linspace(minimum[1], maximum[1], num=shape[1])
+        else:
+            horizontal_values, vertical_values = grid.q1_values, grid.q2_values
+
+        if component.geometry is not None:
+            self._rasterizations[key] = component.geometry.rasterize(
+                component.start_position, component.stop_position, horizontal_values, vertical_values
+            )
+            return self._rasterizations[key]
 
-        def get_nearest(value) -> np.ndarray:
+        def get_nearest(value) -> Tuple[int, int]:
             horizontal_idx = (np.abs(horizontal_values - value[0])).argmin()
             vertical_idx = (np.abs(vertical_values - value[1])).argmin()
-            return np.array([horizontal_idx, vertical_idx])
+            return int(horizontal_idx), int(vertical_idx)
 
         initial_point = np.asarray(component.start_position)
         final_point = np.asarray(component.stop_position)
@@ -382,7 +412,7 @@ class Circuit:
 
         position_to_evaluate = initial_point
         old_evaluated_point = (0, 0)
-        points_in_grid = []
+        directions_in_grid = {}
         for increment in range(n_increments):
             movement_vector = position_to_evaluate - initial_point
             new_evaluated_point = component.evaluate_parametric_equations(movement_vector)
@@ -394,14 +424,50 @@ class Circuit:
             position_to_evaluate = position_to_evaluate + self._increment_size * normalized_axis_vector
             point_in_grid = get_nearest(initial_point + new_evaluated_point)
 
-            if not list(point_in_grid) in [list(p) for p in points_in_grid]:
-                points_in_grid.append(point_in_grid)
+            # Dictionaries keep the insertion order, so the cells stay ordered from the start to the stop position
+            # while the last direction evaluated in a cell is the one that is kept.
+            directions_in_grid[point_in_grid] = normalized_direction_vector
+
+        cells = np.array(list(directions_in_grid.keys()), dtype=int).reshape(-1, 2)
+        directions = np.array(list(directions_in_grid.values()), dtype=float).reshape(-1, 2)
 
-            component_current[point_in_grid[0], point_in_grid[1]] = component.current * normalized_direction_vector
+        self._rasterizations[key] = cells, directions
+        return cells, directions
+
+    def _get_component_cell_values(
+            self,
+            component: ElectricalComponent,
+            shape: Tuple[int, int],
+            minimum: Position,
+            maximum: Position,
+            grid: StretchedGrid = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the cells covered by a component with the voltage and the current vector at each of these cells.
+        """
+        cells, directions = self._rasterize_component(component, shape, minimum, maximum, grid)
+        voltages = np.linspace(component.start_node.potential, component.stop_node.potential, len(cells))
+        currents = component.current * directions
 
-        potentials = np.linspace(component.start_node.potential, component.stop_node.potential, len(points_in_grid))
-        for point_in_grid, potential in zip(points_in_grid, potentials):
-            component_voltage[point_in_grid[0], point_in_grid[1]] = potential
+        return cells, voltages, currents
+
+    def _get_component_voltage_and_current_fields(
+            self,
+            component: ElectricalComponent,
+            shape: Tuple[int, int],
+            minimum: Position,
+            maximum: Position,
+            grid: StretchedGrid = None
+    ):
+        """
+        Return the voltage and current fields of a component.
+        """
+        component_voltage = ScalarField(np.zeros(shape))
+        component_current = VectorField(np.zeros((shape[0], shape[1], 2)))
+
+        cells, voltages, currents = self._get_component_cell_values(component, shape, minimum, maximum, grid)
+        component_voltage[cells[:, 0], cells[:, 1]] = voltages
+        component_current[cells[:, 0], cells[:, 1]] = currents
 
         return component_voltage, component_current
 
@@ -409,25 +475,113 @@ class Circuit:
             self,
             shape: Tuple[int, int],
             minimum: Position,
-            maximum: Position
+            maximum: Position,
+            dtype: np.dtype = np.float64,
+            storage: TiledStorage = None,
+            grid: StretchedGrid = None,
+            profiler: Profiler = None
     ):
         """
-        Return the voltage and current fields of the circuit after solving the circuit
+        Return the voltage and current fields of the circuit after solving the circuit. When several components cover
+        the same cell, the cell takes the mean of the non-zero values given by these components. The mean is computed
+        in float64 on the cells covered by the circuit only, and the fields are then converted to the given dtype
+        (default = np.float64). If a tiled storage is given, the fields are memory-mapped files of this storage instead
+        of arrays held in memory (default = None). If a non-uniform grid is given, the components are rasterized on it
+        (default = None). If a profiler is given, the Kirchhoff solve and the rasterization are profiled as two stages
+        (default = None).
         """
-        self.solve()
+        with profile_stage(profiler, "kirchhoff"):
+            self.solve()
+
+        with profile_stage(profiler, "rasterization"):
+            return self._rasterize_fields(shape, minimum, maximum, dtype, storage, grid)
 
-        circuit_voltages, circuit_currents = [], []
+    def _rasterize_fields(
+            self,
+            shape: Tuple[int, int],
+            minimum: Position,
+            maximum: Position,
+            dtype: np.dtype,
+            storage: TiledStorage,
+            grid: StretchedGrid
+    ):
+        """
+        Return the voltage and current fields of the solved circuit, see get_voltage_and_current_fields.
+        """
+        all_cells, all_voltages, all_currents = [], [], []
         for component in self.components:
-            voltage, current = self._get_component_voltage_and_current_fields(component, shape, minimum, maximum)
-            circuit_voltages.append(voltage)
-            circuit_currents.append(current)
+            cells, voltages, currents = self._get_component_cell_values(component, shape, minimum, maximum, grid)
+            all_cells.append(cells)
+            all_voltages.append(voltages)
+            all_currents.append(currents)
+
+        flat_cells = np.ravel_multi_index(tuple(np.concatenate(all_cells).T), shape)
+        unique_cells, cell_indices = np.unique(flat_cells, return_inverse=True)
 
-        masked_voltages = np.ma.masked_equal(np.array(circuit_voltages), 0)
-        masked_voltage = masked_voltages.mean(axis=0)
-        circuit_voltage = ScalarField(masked_voltage.data)
+        def masked_mean(values: np.ndarray) -> np.ndarray:
+            sums = np.bincount(cell_indices, weights=values, minlength=len(unique_cells))
+            counts = np.bincount(cell_indices, weights=(values != 0), minlength=len(unique_cells))
+            return np.divide(sums, counts, out=np.zeros(len(unique_cells)), where=counts != 0)
 
-        masked_currents = np.ma.masked_equal(np.array(circuit_currents), 0)
-        masked_current = masked_currents.mean(axis=0)
-        circuit_current = VectorField(masked_current.data)
+        if storage is None:
+            circuit_voltage = ScalarField(np.zeros(shape, dtype=dtype))
+            circuit_current = VectorField(np.zeros((shape[0], shape[1], 2), dtype=dtype))
+        else:
+            circuit_voltage = storage.allocate("circuit_voltage", shape, dtype, ScalarField)
+            circuit_current = storage.allocate("circuit_current", (shape[0], shape[1], 2), dtype, VectorField)
+
+        circuit_voltage.reshape(-1)[unique_cells] = masked_mean(np.concatenate(all_voltages))
+
+        currents = np.concatenate(all_currents)
+        flat_circuit_current = circuit_current.reshape(-1, currents.shape[1])
+        for i in range(currents.shape[1]):
+            flat_circuit_current[unique_cells, i] = masked_mean(currents[:, i])
 
         return circuit_voltage, circuit_current
+
+    def get_unit_current_fields(
+            self,
+            shape: Tuple[int, int],
+            minimum: Position,
+            maximum: Position,
+            grid: StretchedGrid = None
+    ) -> List[Tuple[ElectricalComponent, np.ndarray, np.ndarray]]:
+        """
+        Return, for each component, the cells it covers and the current vectors at these cells for a unit current in
+        the component. The unit currents take into account the mean taken on the cells covered by several components,
+        so that the circuit's current field is the sum of each component's current times its unit current field. The
+        circuit must have been solved. If a non-uniform grid is given, the components are rasterized on it.
+
+        Returns
+        -------
+        unit_current_fields : List[Tuple[ElectricalComponent, np.ndarray, np.ndarray]]
+            A list of (component, cells, unit_currents) tuples, where cells and unit_currents are (P, 2) arrays.
+        """
+        rasterizations = [self._rasterize_component(component, shape, minimum, maximum, grid) for component in
+                          self.components]
+
+        flat_cells = np.concatenate(
+            [np.ravel_multi_index(tuple(cells.T), shape) for cells, _ in rasterizations]
+        )
+        unique_cells, cell_indices = np.unique(flat_cells, return_inverse=True)
+        contributions = np.concatenate(
+            [component.current * directions for component, (_, directions) in zip(self.components, rasterizations)]
+        )
+        counts = np.stack(
+            [np.bincount(cell_indices, weights=(contributions[:, i] != 0), minlength=len(unique_cells))
+             for i in range(contributions.shape[1])],
+            axis=-1
+        )
+
+        unit_current_fields = []
+        offset = 0
+        for component, (cells, directions) in zip(self.components, rasterizations):
+            cell_counts = counts[cell_indices[offset:offset + len(cells)]]
+            offset += len(cells)
+            is_contributing = (component.current * directions) != 0
+            unit_currents = np.divide(
+                directions, cell_counts, out=np.zeros_like(directions), where=is_contributing & (cell_counts != 0)
+            )
+            unit_current_fields.append((component, cells, unit_currents))
+
+        return unit_current_fields
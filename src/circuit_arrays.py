@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class CircuitArrays:
+    """
+    Structure of arrays of a circuit. The components are stored by their index in the circuit and the nodes by their
+    uid, and the ElectricalComponent and CircuitNode objects of the circuit are facades which read and write these
+    arrays. The solvers work on the arrays directly, without going through the objects.
+
+    The resistances are NaN for the components which are not wires, the voltages for the components which are not
+    voltage sources, and the currents and potentials until the circuit is solved. The current of a current source is
+    its fixed current.
+    """
+
+    WIRE = 0
+    VOLTAGE_SOURCE = 1
+    CURRENT_SOURCE = 2
+
+    __slots__ = (
+        "types",
+        "start_positions",
+        "stop_positions",
+        "start_nodes",
+        "stop_nodes",
+        "resistances",
+        "voltages",
+        "currents",
+        "node_positions",
+        "node_potentials"
+    )
+
+    def __init__(self, nb_components: int, nb_nodes: int):
+        """
+        Allocates the arrays of a circuit.
+
+        Parameters
+        ----------
+        nb_components : int
+            Number of components of the circuit.
+        nb_nodes : int
+            Number of nodes of the circuit.
+        """
+        self.types = np.zeros(nb_components, dtype=np.int8)
+        self.start_positions = np.zeros((nb_components, 2))
+        self.stop_positions = np.zeros((nb_components, 2))
+        self.start_nodes = np.zeros(nb_components, dtype=np.intp)
+        self.stop_nodes = np.zeros(nb_components, dtype=np.intp)
+        self.resistances = np.full(nb_components, np.nan)
+        self.voltages = np.full(nb_components, np.nan)
+        self.currents = np.full(nb_components, np.nan)
+        self.node_positions = np.zeros((nb_nodes, 2))
+        self.node_potentials = np.full(nb_nodes, np.nan)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def get_indices(self, component_type: int) -> np.ndarray:
+        """
+        Indices of the components of the given type, e.g. CircuitArrays.WIRE.
+        """
+        return np.flatnonzero(self.types == component_type)
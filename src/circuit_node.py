@@ -1,14 +1,30 @@
+import numpy as np
+
 from src.coordinate_and_position import Position
 
 
 class CircuitNode:
-    """A node in a circuit. All nodes have a unique ID, a position and a potential."""
+    """
+    A node in a circuit. All nodes have a unique ID, a position and a potential. Once the node belongs to a circuit,
+    its potential is stored in the circuit's arrays, see CircuitArrays.
+    """
+
+    __slots__ = ("_label", "_uid", "_position", "_potential", "_arrays")
 
     def __init__(self, position: Position, uid: int, label: str = None) -> None:
         self._label = label if label else str(uid)
         self._uid = uid
         self._position = position
         self._potential = None
+        self._arrays = None
+
+    def _bind(self, arrays) -> None:
+        """
+        Stores the node's potential in the arrays of its circuit, at the node's uid.
+        """
+        self._arrays = arrays
+        arrays.node_positions[self._uid] = self._position
+        arrays.node_potentials[self._uid] = np.nan if self._potential is None else self._potential
 
     @property
     def label(self) -> str:
@@ -24,11 +40,17 @@ class CircuitNode:
 
     @property
     def potential(self) -> float:
-        return self._potential
+        if self._arrays is None:
+            return self._potential
+        potential = self._arrays.node_potentials[self._uid]
+        return None if np.isnan(potential) else potential
 
     @potential.setter
     def potential(self, potential: float):
-        self._potential = potential
+        if self._arrays is None:
+            self._potential = potential
+        else:
+            self._arrays.node_potentials[self._uid] = np.nan if potential is None else potential
 
     @property
     def uid(self) -> int:
@@ -1,7 +1,10 @@
+from typing import Optional
+
 import numpy as np
 
 from src.circuit_node import CircuitNode
 from src.coordinate_and_position import Position
+from src.geometry import Arc, Geometry, Segment
 
 
 class ElectricalComponent:
@@ -13,9 +16,26 @@ class ElectricalComponent:
     must fist define the two variables to be used in the equations. Then, you can define the equations using these
     variables. It is important to note that the equation goes through the origin, given that the origin is associated
     to the start position. In other words, the given parametric equation is drawn from the start position to the stop
-    position.
+    position. A primitive shape of src.geometry, e.g. a Segment or an Arc, can be given instead of the parametric
+    equations, in which case the variables are None and the component is evaluated with numpy instead of sympy.
+
+    Once the component belongs to a circuit, its values, e.g. its current, are stored in the circuit's arrays, see
+    CircuitArrays, and the component is a facade which reads and writes them.
     """
 
+    __slots__ = (
+        "_label",
+        "_start_position",
+        "_stop_position",
+        "_variables",
+        "_wire_parametric_equations",
+        "_current",
+        "_start_node",
+        "_stop_node",
+        "_arrays",
+        "_index"
+    )
+
     def __init__(
             self,
             start_position: Position,
@@ -34,33 +54,77 @@ class ElectricalComponent:
         stop_position : Position
             The stop position of the component. This is a tuple of two floats.
         wire_parametric_equations
-            The parametric equations that define the 2D function connecting the start to the stop.
+            The parametric equations that define the 2D function connecting the start to the stop, or a primitive
+            shape, i.e. a Geometry.
         variables
-            The variables used in the parametric equations.
+            The variables used in the parametric equations, or None for a primitive shape.
         label : str
             The label of the component.
         """
         self._label = label
+        self._arrays = None
+        self._index = None
         self._start_position = start_position
         self._stop_position = stop_position
         self._variables = variables
         self._wire_parametric_equations = wire_parametric_equations
 
-        self._validate_equations_pass_through_origin()
-        self._validate_start_and_stop_connected()
+        if self.geometry is not None:
+            self.geometry.validate(start_position, stop_position)
+        else:
+            self._validate_equations_pass_through_origin()
+            self._validate_start_and_stop_connected()
 
         self._current = None
-        self._potential = None
         self._start_node = None
         self._stop_node = None
 
+    def _bind(self, arrays, index: int) -> None:
+        """
+        Makes the component a facade of the arrays of its circuit, at the given index. The circuit has already copied
+        the component's values in the arrays.
+        """
+        self._arrays = arrays
+        self._index = index
+
+    def _get_array_value(self, name: str, value):
+        """
+        Value of the component in the given array of its circuit, e.g. "currents", or the given value if it does not
+        belong to a circuit.
+        """
+        if self._arrays is None:
+            return value
+        array_value = getattr(self._arrays, name)[self._index]
+        return None if np.isnan(array_value) else array_value
+
+    @classmethod
+    def segment(cls, start_position: Position, stop_position: Position, *args, **kwargs):
+        """
+        Component along a straight segment from the start to the stop position, e.g.
+        Wire.segment((26, 26), (26, 74), resistance=0.01). The other arguments are those of the component's
+        constructor which follow the variables, e.g. the resistance and the label of a wire.
+        """
+        return cls(start_position, stop_position, Segment(), None, *args, **kwargs)
+
+    @classmethod
+    def arc(cls, start_position: Position, stop_position: Position, center: Position, *args, clockwise: bool = False,
+            **kwargs):
+        """
+        Component along a circular arc around the center, from the start to the stop position, e.g.
+        Wire.arc((35, 70), (65, 70), (50, 50), resistance=1.0, clockwise=True). The other arguments are those of the
+        component's constructor which follow the variables, e.g. the resistance and the label of a wire.
+        """
+        return cls(start_position, stop_position, Arc(center, clockwise), None, *args, **kwargs)
+
     @property
     def current(self) -> float:
-        return self._current
+        return self._get_array_value("currents", self._current)
 
     @current.setter
     def current(self, current: float):
         self._current = current
+        if self._arrays is not None:
+            self._arrays.currents[self._index] = np.nan if current is None else current
 
     @property
     def label(self) -> str:
@@ -94,6 +158,15 @@ class ElectricalComponent:
     def stop_position(self) -> Position:
         return self._stop_position
 
+    @property
+    def geometry(self) -> Optional[Geometry]:
+        """
+        The primitive shape of the component, or None if it is defined by sympy parametric equations.
+        """
+        if isinstance(self._wire_parametric_equations, Geometry):
+            return self._wire_parametric_equations
+        return None
+
     @property
     def variables(self):
         return self._variables
@@ -104,6 +177,9 @@ class ElectricalComponent:
 
     def evaluate_parametric_equations(self, values: np.ndarray) -> np.ndarray:
         """Evaluates the parametric equations at the given values. The values are given as a numpy array."""
+        if self.geometry is not None:
+            return self.geometry.evaluate(self._start_position, self._stop_position, np.asarray(values, dtype=float))
+
         subs = {
             self._variables[0]: values[0],
             self._variables[1]: values[1]
@@ -148,6 +224,8 @@ class Wire(ElectricalComponent):
     resistance property, which is used to calculate the current flowing through the wire.
     """
 
+    __slots__ = ("_resistance",)
+
     def __init__(
             self,
             start_position: Position,
@@ -168,7 +246,13 @@ class Wire(ElectricalComponent):
 
     @property
     def resistance(self) -> float:
-        return self._resistance
+        return self._get_array_value("resistances", self._resistance)
+
+    @resistance.setter
+    def resistance(self, resistance: float):
+        self._resistance = resistance
+        if self._arrays is not None:
+            self._arrays.resistances[self._index] = resistance
 
 
 class VoltageSource(ElectricalComponent):
@@ -178,6 +262,8 @@ class VoltageSource(ElectricalComponent):
     will have a voltage property, which is used to calculate the potential difference between the start and stop nodes.
     """
 
+    __slots__ = ("_voltage",)
+
     def __init__(
             self,
             start_position: Position,
@@ -198,7 +284,13 @@ class VoltageSource(ElectricalComponent):
 
     @property
     def voltage(self) -> float:
-        return self._voltage
+        return self._get_array_value("voltages", self._voltage)
+
+    @voltage.setter
+    def voltage(self, voltage: float):
+        self._voltage = voltage
+        if self._arrays is not None:
+            self._arrays.voltages[self._index] = voltage
 
 
 class CurrentSource(ElectricalComponent):
@@ -208,6 +300,8 @@ class CurrentSource(ElectricalComponent):
     will have a fixed current that won't be calculate.
     """
 
+    __slots__ = ()
+
     def __init__(
             self,
             start_position: Position,
@@ -228,12 +322,14 @@ class CurrentSource(ElectricalComponent):
 
     @property
     def current(self) -> float:
-        return self._current
+        return self._get_array_value("currents", self._current)
 
     @current.setter
     def current(self, current: float):
-        assert np.isclose(current, self._current), (
+        assert np.isclose(current, self.current), (
             f"Current source's current is constant. New current is {current} A, which is not the same as the source's "
-            f"current, i.e. {self._current} A."
+            f"current, i.e. {self.current} A."
         )
         self._current = current
+        if self._arrays is not None:
+            self._arrays.currents[self._index] = current
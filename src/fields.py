@@ -1,11 +1,9 @@
 from __future__ import annotations
 
-from copy import deepcopy
 from typing import Optional, Union
 import warnings
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 
 class ScalarField(np.ndarray):
@@ -16,7 +14,7 @@ class ScalarField(np.ndarray):
 
     EXPECTED_INPUT_DIMENSIONS = [2]
 
-    def __new__(cls, field: Union[ScalarField, np.ndarray]) -> ScalarField:
+    def __new__(cls, field: Union[ScalarField, np.ndarray], copy: bool = False) -> ScalarField:
         """
         Create a new scalar field.
 
@@ -30,6 +28,10 @@ class ScalarField(np.ndarray):
                                ┃  ┃
                 field.shape = (A, B)
 
+        copy : bool
+            Whether to copy the given field's data. By default, the new scalar field is a view of the given field, so no
+            memory is allocated and modifying one modifies the other (default = False).
+
         Returns
         -------
         field : ScalarField
@@ -41,7 +43,7 @@ class ScalarField(np.ndarray):
             raise ValueError(f"The input dimension of the given scalar field is not correct. Current dimension is "
                              f"{input_dimension} while accepted dimensions are {cls.EXPECTED_INPUT_DIMENSIONS}.")
 
-        return np.asarray(deepcopy(field)).view(cls)
+        return (np.array(field, copy=True) if copy else np.asarray(field)).view(cls)
 
     @property
     def input_dimension(self) -> int:
@@ -65,16 +67,22 @@ class ScalarField(np.ndarray):
         """
         return 1
 
-    def gradient(self) -> VectorField:
+    def gradient(self, *spacing) -> VectorField:
         """
         Gradient of the scalar field.
 
+        Parameters
+        ----------
+        *spacing
+            Spacing of the grid given to numpy.gradient, e.g. the coordinates of each axis of a non-uniform grid. The
+            spacing is 1 on each axis when none is given.
+
         Returns
         -------
         gradient : VectorField
             The vector field representing the gradient of the current scalar field.
         """
-        return VectorField(np.stack(np.gradient(self), axis=2))
+        return VectorField(np.stack(np.gradient(self, *spacing), axis=2))
 
     def show(self, **kwargs):
         """
@@ -93,6 +101,8 @@ class ScalarField(np.ndarray):
                     Text to use for the figure's title.
             }
         """
+        import matplotlib.pyplot as plt
+
         fig = plt.figure(figsize=(8, 8))
         ax = fig.add_subplot(111)
 
@@ -104,6 +114,19 @@ class ScalarField(np.ndarray):
         fig.colorbar(image, orientation='vertical')
         plt.show()
 
+    def render(self, path: str, format: str = None, **kwargs) -> str:
+        """
+        Render the scalar field to a file without displaying it, on the Agg backend. See FieldRenderer.render.
+
+        Returns
+        -------
+        path : str
+            Path of the written file.
+        """
+        from src.rendering import FieldRenderer
+
+        return FieldRenderer().render(self, path, format, **kwargs)
+
 
 class VectorField(np.ndarray):
     """
@@ -116,7 +139,7 @@ class VectorField(np.ndarray):
     EXPECTED_INPUT_DIMENSIONS = [2]
     EXPECTED_OUTPUT_DIMENSIONS = [2, 3]
 
-    def __new__(cls, field: Union[VectorField, np.ndarray]) -> VectorField:
+    def __new__(cls, field: Union[VectorField, np.ndarray], copy: bool = False) -> VectorField:
         """
         Create a new vector field.
 
@@ -131,6 +154,10 @@ class VectorField(np.ndarray):
                                ┃  ┃  ┃
                 field.shape = (A, B, C)
 
+        copy : bool
+            Whether to copy the given field's data. By default, the new vector field is a view of the given field, so no
+            memory is allocated and modifying one modifies the other (default = False).
+
         Returns
         -------
         field : VectorField
@@ -148,7 +175,7 @@ class VectorField(np.ndarray):
             raise ValueError(f"The output dimension of the given vector field is not correct. Current dimension is "
                              f"{output_dimension} while accepted dimensions are {cls.EXPECTED_OUTPUT_DIMENSIONS}.")
 
-        return np.asarray(deepcopy(field)).view(cls)
+        return (np.array(field, copy=True) if copy else np.asarray(field)).view(cls)
 
     @property
     def input_dimension(self) -> int:
@@ -175,34 +202,35 @@ class VectorField(np.ndarray):
     @property
     def x(self) -> ScalarField:
         """
-        Scalar field f : ℝ² → ℝ ; (x, y) → F_x.
+        Scalar field f : ℝ² → ℝ ; (x, y) → F_x. The scalar field is a view of the vector field's component.
         """
         return ScalarField(self[..., 0])
 
     @property
     def y(self) -> ScalarField:
         """
-        Scalar field f : ℝ² → ℝ ; (x, y) → F_y.
+        Scalar field f : ℝ² → ℝ ; (x, y) → F_y. The scalar field is a view of the vector field's component.
         """
         return ScalarField(self[..., 1])
 
     @property
     def z(self) -> Optional[ScalarField]:
         """
-        Scalar field f : ℝ² → ℝ ; (x, y) → F_z.
+        Scalar field f : ℝ² → ℝ ; (x, y) → F_z. The scalar field is a view of the vector field's component.
         """
         if self.output_dimension == 2:
             return None
         elif self.output_dimension == 3:
             return ScalarField(self[..., 2])
 
-    def cross(self, field: VectorField) -> VectorField:
+    def cross(self, field: Union[VectorField, OutOfPlaneVectorField]) -> VectorField:
         """
-        Cross product of 2 vector fields.
+        Cross product of 2 vector fields. The cross product with an out-of-plane vector field (0, 0, G_z) is the
+        in-plane vector field (F_y G_z, -F_x G_z), which only takes two multiplications.
 
         Parameters
         ----------
-        field : VectorField
+        field : Union[VectorField, OutOfPlaneVectorField]
             A vector field.
 
         Returns
@@ -210,6 +238,9 @@ class VectorField(np.ndarray):
         field : VectorField
             The cross product between the current vector field and the given one.
         """
+        if isinstance(field, OutOfPlaneVectorField):
+            return VectorField(np.stack((self.y * field, -self.x * field), axis=-1))
+
         return VectorField(np.cross(self, field))
 
     def show(self, **kwargs):
@@ -227,22 +258,37 @@ class VectorField(np.ndarray):
                     Label text for the y-axis.
                 title : str
                     Text to use for the figure's title.
+                mask : np.ndarray
+                    Boolean array of the cells where the field is hidden, e.g. the electrical components.
+                max_resolution : int
+                    Maximum number of points of the stream plot's grid along each axis. Larger fields are decimated,
+                    so the plotting time does not depend on the field's resolution.
             }
         """
+        import matplotlib.pyplot as plt
+
         fig = plt.figure(figsize=(8, 8))
         ax = fig.add_subplot(111)
 
+        # on sous-échantillonne le champ avant de le copier, puis on cache les cellules masquées
+        max_resolution = kwargs.get("max_resolution")
+        steps = [1, 1] if max_resolution is None else [-(-n // max_resolution) for n in self.shape[:2]]
+        field = np.array(self[::steps[0], ::steps[1], :2])
+        if kwargs.get("mask") is not None:
+            field[kwargs["mask"][::steps[0], ::steps[1]]] = np.nan
+        u, v = field[..., 0].T, field[..., 1].T
+
         with np.errstate(divide='ignore'):
-            color = 2 * np.log(np.hypot(self.x.T, self.y.T))
+            color = 2 * np.log(np.hypot(u, v))
 
         with warnings.catch_warnings():
             warnings.simplefilter(action="ignore", category=UserWarning)
 
             stream_plot = ax.streamplot(
-                x=np.arange(0, self.shape[0]),
-                y=np.arange(0, self.shape[1]),
-                u=self.x.T,
-                v=self.y.T,
+                x=np.arange(0, self.shape[0], steps[0]),
+                y=np.arange(0, self.shape[1], steps[1]),
+                u=u,
+                v=v,
                 color=color,
                 linewidth=1,
                 cmap=plt.cm.inferno,
@@ -256,3 +302,158 @@ class VectorField(np.ndarray):
         ax.set_title(label=kwargs.get("title", ""))
         fig.colorbar(stream_plot.lines, orientation='vertical')
         plt.show()
+
+    def render(self, path: str, format: str = None, **kwargs) -> str:
+        """
+        Render the vector field to a file without displaying it, on the Agg backend. See FieldRenderer.render.
+
+        Returns
+        -------
+        path : str
+            Path of the written file.
+        """
+        from src.rendering import FieldRenderer
+
+        return FieldRenderer().render(self, path, format, **kwargs)
+
+
+class OutOfPlaneVectorField(np.ndarray):
+    """
+    Vector field perpendicular to the xy plane. The map is of the kind
+        f : ℝ² → ℝ³ ; (x, y) → (0, 0, F_z)
+    and only the F_z component is stored, e.g. for the magnetic field of our 2D world. Fields that are purely in the xy
+    plane are simply vector fields with two components, f : ℝ² → ℝ² ; (x, y) → (F_x, F_y).
+    """
+
+    EXPECTED_INPUT_DIMENSIONS = [2]
+
+    def __new__(cls, field: Union[OutOfPlaneVectorField, np.ndarray], copy: bool = False) -> OutOfPlaneVectorField:
+        """
+        Create a new out-of-plane vector field.
+
+        Parameters
+        ----------
+        field : Union[OutOfPlaneVectorField, np.ndarray]
+            An out-of-plane vector field or a numpy array of its F_z component. The shape of the field must follow this
+            pattern:
+
+                               ┏━ The width of the field (x-axis)
+                               ┃  ┏━ The height of the field (y-axis)
+                               ┃  ┃
+                field.shape = (A, B)
+
+        copy : bool
+            Whether to copy the given field's data. By default, the new vector field is a view of the given field, so no
+            memory is allocated and modifying one modifies the other (default = False).
+
+        Returns
+        -------
+        field : OutOfPlaneVectorField
+            The new out-of-plane vector field as a numpy array.
+        """
+        input_dimension = len(field.shape)
+
+        if input_dimension not in cls.EXPECTED_INPUT_DIMENSIONS:
+            raise ValueError(f"The input dimension of the given out-of-plane vector field is not correct. Current "
+                             f"dimension is {input_dimension} while accepted dimensions are "
+                             f"{cls.EXPECTED_INPUT_DIMENSIONS}.")
+
+        return (np.array(field, copy=True) if copy else np.asarray(field)).view(cls)
+
+    @property
+    def input_dimension(self) -> int:
+        """
+        The map's input dimension.
+
+                 ┏━ The dimension of this set.
+                 ┃
+            f : ℝ² → ℝ³.
+        """
+        return self.ndim
+
+    @property
+    def output_dimension(self) -> int:
+        """
+        The map's output dimension.
+
+                     ┏━ The dimension of this set.
+                     ┃
+            f : ℝ² → ℝ³.
+        """
+        return 3
+
+    @property
+    def x(self) -> ScalarField:
+        """
+        Scalar field f : ℝ² → ℝ ; (x, y) → F_x = 0. The scalar field is a read-only view which allocates no memory.
+        """
+        return ScalarField(np.broadcast_to(np.zeros((), dtype=self.dtype), self.shape))
+
+    @property
+    def y(self) -> ScalarField:
+        """
+        Scalar field f : ℝ² → ℝ ; (x, y) → F_y = 0. The scalar field is a read-only view which allocates no memory.
+        """
+        return ScalarField(np.broadcast_to(np.zeros((), dtype=self.dtype), self.shape))
+
+    @property
+    def z(self) -> ScalarField:
+        """
+        Scalar field f : ℝ² → ℝ ; (x, y) → F_z. The scalar field is a view of the vector field.
+        """
+        return self.view(ScalarField)
+
+    def cross(self, field: VectorField) -> VectorField:
+        """
+        Cross product of the out-of-plane vector field (0, 0, F_z) with a vector field G, i.e. the in-plane vector field
+        (-F_z G_y, F_z G_x).
+
+        Parameters
+        ----------
+        field : VectorField
+            A vector field.
+
+        Returns
+        -------
+        field : VectorField
+            The cross product between the current vector field and the given one.
+        """
+        return VectorField(np.stack((-self * field.y, self * field.x), axis=-1))
+
+    def to_vector_field(self) -> VectorField:
+        """
+        Dense vector field f : ℝ² → ℝ³ ; (x, y) → (0, 0, F_z).
+
+        Returns
+        -------
+        field : VectorField
+            The vector field with its three components stored.
+        """
+        field = np.zeros((self.shape[0], self.shape[1], 3), dtype=self.dtype)
+        field[..., 2] = self
+        return VectorField(field)
+
+    def show(self, **kwargs):
+        """
+        Show the z component of the vector field in the xy plane.
+
+        Parameters
+        ----------
+        **kwargs
+            Arbitrary keyword arguments to create a custom matplotlib figure. See ScalarField.show.
+        """
+        self.z.show(**kwargs)
+
+    def render(self, path: str, format: str = None, **kwargs) -> str:
+        """
+        Render the z component of the vector field to a file without displaying it, on the Agg backend. See
+        FieldRenderer.render.
+
+        Returns
+        -------
+        path : str
+            Path of the written file.
+        """
+        from src.rendering import FieldRenderer
+
+        return FieldRenderer().render(self, path, format, **kwargs)
@@ -0,0 +1,343 @@
+import math
+from typing import Callable, Tuple
+
+import numpy as np
+
+from src.coordinate_and_position import Position
+
+
+class Geometry:
+    """
+    Base class of the primitive shapes of the electrical components, which can be given instead of sympy parametric
+    equations. Like the parametric equations, a shape maps a movement vector from the start position, taken along the
+    straight line from the start to the stop position, to the point of the component relative to its start position.
+    The shapes are evaluated with numpy, so a component made of primitive shapes never goes through sympy.
+
+    A shape is parametrized by the fraction t of the way from its start to its stop position. It is rasterized exactly :
+    the grid cells it covers are found from the values of t at which it crosses the borders between the cells, and its
+    directions are its closed-form tangents.
+    """
+
+    def get_points(self, start_position: Position, stop_position: Position, fractions: np.ndarray) -> np.ndarray:
+        """
+        Points of the shape at the given fractions of the way from the start to the stop position.
+
+        Returns
+        -------
+        points : np.ndarray
+            The (N, 2) array of the absolute positions of the points.
+        """
+        raise NotImplementedError
+
+    def get_tangents(self, start_position: Position, stop_position: Position, fractions: np.ndarray) -> np.ndarray:
+        """
+        Unit tangents of the shape, oriented from the start to the stop position, at the given fractions of the way.
+
+        Returns
+        -------
+        tangents : np.ndarray
+            The (N, 2) array of the tangents, which are null if the start and stop positions are the same.
+        """
+        raise NotImplementedError
+
+    def get_crossings(self, start_position: Position, stop_position: Position, axis: int, borders: np.ndarray):
+        """
+        Fractions of the way, strictly between 0 and 1, at which the shape crosses the given coordinates of an axis.
+        """
+        raise NotImplementedError
+
+    def evaluate(self, start_position: Position, stop_position: Position, values: np.ndarray) -> np.ndarray:
+        """
+        Evaluates the shape between the given positions.
+
+        Parameters
+        ----------
+        start_position : Position
+            The start position of the component.
+        stop_position : Position
+            The stop position of the component.
+        values : np.ndarray
+            A movement vector, or a (N, 2) array of movement vectors, from the start position.
+
+        Returns
+        -------
+        points : np.ndarray
+            The points of the component relative to its start position, with the same shape as the values.
+        """
+        fractions = self._get_fractions(start_position, stop_position, values)
+        points = self.get_points(start_position, stop_position, np.ravel(fractions))
+        return (points - np.asarray(start_position, dtype=float)).reshape(np.shape(values))
+
+    def rasterize(
+            self,
+            start_position: Position,
+            stop_position: Position,
+            horizontal_values: np.ndarray,
+            vertical_values: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Grid cells covered by the shape and its unit direction at each of these cells. The cell of a point is the one
+        of its nearest grid point, so the borders between the cells are halfway between the grid's coordinates.
+
+        Parameters
+        ----------
+        start_position : Position
+            The start position of the component.
+        stop_position : Position
+            The stop position of the component.
+        horizontal_values : np.ndarray
+            The increasing coordinates of the grid along its first axis.
+        vertical_values : np.ndarray
+            The increasing coordinates of the grid along its second axis.
+
+        Returns
+        -------
+        cells, directions : Tuple[np.ndarray, np.ndarray]
+            The (P, 2) array of grid indices covered by the shape, ordered from the start to the stop position, and the
+            (P, 2) array of the shape's tangent at each of these cells.
+        """
+        borders = [(values[1:] + values[:-1]) / 2 for values in (np.asarray(horizontal_values, dtype=float),
+                                                                  np.asarray(vertical_values, dtype=float))]
+
+        # la forme reste dans une même cellule entre deux croisements consécutifs, on échantillonne donc les
+        # extrémités et le milieu de chacun de ces intervalles
+        crossings = np.unique(np.concatenate([
+            [0.0, 1.0],
+            self.get_crossings(start_position, stop_position, 0, borders[0]),
+            self.get_crossings(start_position, stop_position, 1, borders[1])
+        ]))
+        fractions = np.sort(np.concatenate((crossings, (crossings[1:] + crossings[:-1]) / 2)))
+
+        points = self.get_points(start_position, stop_position, fractions)
+        points[0], points[-1] = start_position, stop_position
+        cells = np.stack([np.searchsorted(borders[axis], points[:, axis]) for axis in range(2)], axis=-1)
+        tangents = self.get_tangents(start_position, stop_position, fractions)
+
+        # comme pour les équations paramétriques, les cellules restent dans l'ordre du parcours et chaque cellule
+        # garde la dernière direction évaluée
+        directions_in_grid = dict(zip(map(tuple, cells.tolist()), tangents))
+        cells = np.array(list(directions_in_grid.keys()), dtype=int).reshape(-1, 2)
+        directions = np.array(list(directions_in_grid.values()), dtype=float).reshape(-1, 2)
+        return cells, directions
+
+    def validate(self, start_position: Position, stop_position: Position) -> None:
+        """
+        Validates that the shape connects the given positions.
+        """
+        raise NotImplementedError
+
+    def as_dict(self) -> dict:
+        """
+        JSON-serializable description of the shape.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def from_dict(description: dict) -> "Geometry":
+        """
+        Shape of a description made by as_dict.
+        """
+        if description["type"] == "segment":
+            return Segment()
+        if description["type"] == "arc":
+            return Arc(tuple(description["center"]), description.get("clockwise", False))
+        raise ValueError(f"Unknown geometry {description['type']}.")
+
+    @staticmethod
+    def _get_fractions(start_position: Position, stop_position: Position, values: np.ndarray) -> np.ndarray:
+        """
+        Fractions of the way from the start to the stop position of the projections of the movement vectors.
+        """
+        chord = np.asarray(stop_position, dtype=float) - np.asarray(start_position, dtype=float)
+        squared_length = float(chord @ chord)
+        if squared_length == 0:
+            return np.zeros(np.shape(values)[:-1])
+        return (np.asarray(values, dtype=float) @ chord) / squared_length
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{k}={v}' for k, v in self.as_dict().items() if k != 'type')})"
+
+    __repr__ = __str__
+
+
+class Segment(Geometry):
+    """
+    A straight segment from the start to the stop position, i.e. the parametric equations (x, y) in cartesian
+    coordinates. In polar coordinates, the segment is straight in the (r, θ) plane, e.g. a radial or tangential wire.
+    """
+
+    def get_points(self, start_position: Position, stop_position: Position, fractions: np.ndarray) -> np.ndarray:
+        start = np.asarray(start_position, dtype=float)
+        return start + np.asarray(fractions, dtype=float)[:, np.newaxis] * (np.asarray(stop_position) - start)
+
+    def get_tangents(self, start_position: Position, stop_position: Position, fractions: np.ndarray) -> np.ndarray:
+        chord = np.asarray(stop_position, dtype=float) - np.asarray(start_position, dtype=float)
+        length = np.linalg.norm(chord)
+        tangent = chord / length if length > 0 else chord
+        return np.tile(tangent, (len(fractions), 1))
+
+    def get_crossings(self, start_position: Position, stop_position: Position, axis: int, borders: np.ndarray):
+        start, stop = float(start_position[axis]), float(stop_position[axis])
+        if start == stop:
+            return np.empty(0)
+        crossings = (borders - start) / (stop - start)
+        return crossings[(crossings > 0) & (crossings < 1)]
+
+    def validate(self, start_position: Position, stop_position: Position) -> None:
+        pass
+
+    def as_dict(self) -> dict:
+        return {"type": "segment"}
+
+
+class Arc(Geometry):
+    """
+    A circular arc around a center, from the start to the stop position. The arc turns counterclockwise unless
+    clockwise is True. The start and stop positions must be at the same distance from the center.
+    """
+
+    def __init__(self, center: Position, clockwise: bool = False):
+        """
+        Arc constructor.
+
+        Parameters
+        ----------
+        center : Position
+            The center of the arc.
+        clockwise : bool
+            Whether the arc turns clockwise from the start to the stop position (default = False).
+        """
+        self._center = (float(center[0]), float(center[1]))
+        self._clockwise = bool(clockwise)
+
+    @property
+    def center(self) -> Position:
+        return self._center
+
+    @property
+    def clockwise(self) -> bool:
+        return self._clockwise
+
+    def get_angles(self, start_position: Position, stop_position: Position) -> tuple:
+        """
+        Angle of the start position around the center and signed angle swept by the arc, in radians.
+        """
+        start_angle = math.atan2(start_position[1] - self._center[1], start_position[0] - self._center[0])
+        stop_angle = math.atan2(stop_position[1] - self._center[1], stop_position[0] - self._center[0])
+        if self._clockwise:
+            return start_angle, -((start_angle - stop_angle) % (2 * math.pi))
+        return start_angle, (stop_angle - start_angle) % (2 * math.pi)
+
+    def get_points(self, start_position: Position, stop_position: Position, fractions: np.ndarray) -> np.ndarray:
+        start_angle, swept_angle = self.get_angles(start_position, stop_position)
+        start_radius = math.dist(start_position, self._center)
+        stop_radius = math.dist(stop_position, self._center)
+
+        fractions = np.asarray(fractions, dtype=float)
+        # le rayon est interpolé pour que l'arc se termine exactement à la position finale
+        radii = start_radius + fractions * (stop_radius - start_radius)
+        angles = start_angle + fractions * swept_angle
+        return np.stack((radii * np.cos(angles), radii * np.sin(angles)), axis=-1) + np.asarray(self._center)
+
+    def get_tangents(self, start_position: Position, stop_position: Position, fractions: np.ndarray) -> np.ndarray:
+        start_angle, swept_angle = self.get_angles(start_position, stop_position)
+        start_radius = math.dist(start_position, self._center)
+        radius_change = math.dist(stop_position, self._center) - start_radius
+
+        fractions = np.asarray(fractions, dtype=float)
+        radii = start_radius + fractions * radius_change
+        angles = start_angle + fractions * swept_angle
+        # dérivée des points par rapport à la fraction, le rayon interpolé y contribue aussi
+        tangents = np.stack((
+            radius_change * np.cos(angles) - radii * swept_angle * np.sin(angles),
+            radius_change * np.sin(angles) + radii * swept_angle * np.cos(angles)
+        ), axis=-1)
+        return tangents / np.linalg.norm(tangents, axis=-1, keepdims=True)
+
+    def get_crossings(self, start_position: Position, stop_position: Position, axis: int, borders: np.ndarray):
+        start_angle, swept_angle = self.get_angles(start_position, stop_position)
+        radius = math.dist(start_position, self._center)
+        if swept_angle == 0 or radius == 0:
+            return np.empty(0)
+        if math.dist(stop_position, self._center) != radius:
+            return self._get_interpolated_crossings(start_position, stop_position, axis, borders)
+
+        # angles auxquels le cercle croise les bordures, i.e. cos(θ) ou sin(θ) = (bordure - centre) / rayon
+        ratios = (borders - self._center[axis]) / radius
+        ratios = ratios[np.abs(ratios) <= 1]
+        if axis == 0:
+            angles = np.concatenate((np.arccos(ratios), -np.arccos(ratios)))
+        else:
+            angles = np.concatenate((np.arcsin(ratios), np.pi - np.arcsin(ratios)))
+
+        crossings = (np.sign(swept_angle) * (angles - start_angle)) % (2 * np.pi) / abs(swept_angle)
+        return crossings[(crossings > 0) & (crossings < 1)]
+
+    def _get_interpolated_crossings(
+            self,
+            start_position: Position,
+            stop_position: Position,
+            axis: int,
+            borders: np.ndarray
+    ) -> np.ndarray:
+        """
+        Fractions at which the arc crosses the borders along the axis when its start and stop radii differ, on the
+        same curve as get_points, i.e. with the radius interpolated from the start to the stop radius. The coordinate
+        along the axis is monotonic between its extrema, so each border is found by bisection on each monotonic piece.
+        """
+        start_angle, swept_angle = self.get_angles(start_position, stop_position)
+        start_radius = math.dist(start_position, self._center)
+        radius_change = math.dist(stop_position, self._center) - start_radius
+        # la coordonnée est r(t)·cos(θ(t) - décalage), avec un décalage de π/2 pour l'axe des sin
+        offset = 0.0 if axis == 0 else math.pi / 2
+
+        def get_phase(fractions: np.ndarray) -> np.ndarray:
+            # la dérivée de la coordonnée est nulle aux multiples de π de cette phase, qui est strictement monotone
+            with np.errstate(divide="ignore"):
+                return start_angle + fractions * swept_angle - offset - np.arctan(
+                    radius_change / ((start_radius + fractions * radius_change) * swept_angle)
+                )
+
+        def bisect(function: Callable[[np.ndarray], np.ndarray], targets: np.ndarray, lower: np.ndarray,
+                   upper: np.ndarray) -> np.ndarray:
+            # la fonction est monotone sur chaque intervalle et y atteint sa cible
+            increasing = function(upper) >= function(lower)
+            for _ in range(60):
+                middle = (lower + upper) / 2
+                below = (function(middle) < targets) == increasing
+                lower, upper = np.where(below, middle, lower), np.where(below, upper, middle)
+            return (lower + upper) / 2
+
+        first_phase, last_phase = get_phase(np.array([0.0, 1.0]))
+        multiples = np.arange(math.ceil(min(first_phase, last_phase) / math.pi),
+                              math.floor(max(first_phase, last_phase) / math.pi) + 1) * math.pi
+        extrema = bisect(get_phase, multiples, np.zeros(len(multiples)), np.ones(len(multiples)))
+        limits = np.unique(np.concatenate(([0.0, 1.0], extrema)))
+
+        def get_coordinates(fractions: np.ndarray) -> np.ndarray:
+            return self.get_points(start_position, stop_position, fractions)[:, axis]
+
+        # chaque bordure entre les coordonnées des extrémités d'un morceau monotone est croisée une fois
+        coordinates = get_coordinates(limits)
+        low, high = np.minimum(coordinates[:-1], coordinates[1:]), np.maximum(coordinates[:-1], coordinates[1:])
+        pieces, indices = np.nonzero((borders >= low[:, np.newaxis]) & (borders <= high[:, np.newaxis]))
+        crossings = bisect(get_coordinates, borders[indices], limits[pieces], limits[pieces + 1])
+        return crossings[(crossings > 0) & (crossings < 1)]
+
+    def validate(self, start_position: Position, stop_position: Position) -> None:
+        start_radius = math.dist(start_position, self._center)
+        stop_radius = math.dist(stop_position, self._center)
+        assert start_radius > 0, f"Starting point {start_position} of the arc is its center."
+        assert math.isclose(start_radius, stop_radius, abs_tol=0.1), (
+            f"Starting point {start_position} and stopping point {stop_position} of the arc are not at the same "
+            f"distance from its center {self._center}."
+        )
+
+    def as_dict(self) -> dict:
+        return {"type": "arc", "center": list(self._center), "clockwise": self._clockwise}
@@ -0,0 +1,192 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from src.coordinate_and_position import Position
+from src.electrical_components import ElectricalComponent
+
+
+class StretchedGrid:
+    """
+    A non-uniform grid of the world. The grid is the tensor product of two monotonic axes whose spacing can vary, e.g.
+    fine near the electrical components where the fields vary quickly and coarse in the empty space far from them.
+    """
+
+    def __init__(self, q1_values: np.ndarray, q2_values: np.ndarray):
+        """
+        Stretched grid constructor.
+
+        Parameters
+        ----------
+        q1_values : np.ndarray
+            Strictly increasing coordinates of the grid along the first axis.
+        q2_values : np.ndarray
+            Strictly increasing coordinates of the grid along the second axis.
+        """
+        q1_values, q2_values = np.asarray(q1_values, dtype=float), np.asarray(q2_values, dtype=float)
+
+        for name, values in (("first", q1_values), ("second", q2_values)):
+            if values.ndim != 1 or len(values) < 2:
+                raise ValueError(f"The coordinates of the {name} axis should be a 1D array of at least 2 values.")
+            if not (np.diff(values) > 0).all():
+                raise ValueError(f"The coordinates of the {name} axis should be strictly increasing.")
+
+        self._q1_values = q1_values
+        self._q2_values = q2_values
+
+    @property
+    def q1_values(self) -> np.ndarray:
+        return self._q1_values
+
+    @property
+    def q2_values(self) -> np.ndarray:
+        return self._q2_values
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self._q1_values), len(self._q2_values)
+
+    @property
+    def minimum(self) -> Position:
+        return float(self._q1_values[0]), float(self._q2_values[0])
+
+    @property
+    def maximum(self) -> Position:
+        return float(self._q1_values[-1]), float(self._q2_values[-1])
+
+    @property
+    def cell_sizes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Size of the cell around each node along each axis, i.e. half the distance between its two neighbours. The
+        nodes on the edges of the grid use the size of their only interval.
+        """
+        sizes = []
+        for values in (self._q1_values, self._q2_values):
+            intervals = np.diff(values)
+            sizes.append(np.concatenate(([intervals[0]], (intervals[:-1] + intervals[1:]) / 2, [intervals[-1]])))
+        return sizes[0], sizes[1]
+
+    @classmethod
+    def uniform(cls, shape: Tuple[int, int], minimum: Position, maximum: Position) -> "StretchedGrid":
+        """
+        Uniform grid with the given shape and bounds.
+        """
+        return cls(np.linspace(minimum[0], maximum[0], shape[0]), np.linspace(minimum[1], maximum[1], shape[1]))
+
+    @classmethod
+    def around_components(
+            cls,
+            components: List[ElectricalComponent],
+            minimum: Position,
+            maximum: Position,
+            fine_spacing: float = 1.0,
+            coarse_spacing: float = 8.0,
+            growth_rate: float = 0.25
+    ) -> "StretchedGrid":
+        """
+        Grid refined around electrical components. Along each axis, the spacing is fine_spacing at the coordinates
+        crossed by a component perpendicularly to this axis (e.g. the x coordinate of a vertical wire) and at the
+        components' ends. It then grows linearly with the distance to these coordinates, up to coarse_spacing.
+
+        Parameters
+        ----------
+        components : List[ElectricalComponent]
+            The electrical components around which the grid is refined, e.g. circuit.components.
+        minimum : Position
+            Minimum position in the grid.
+        maximum : Position
+            Maximum position in the grid.
+        fine_spacing : float
+            Spacing of the grid near the components (default = 1.0).
+        coarse_spacing : float
+            Maximum spacing of the grid (default = 8.0).
+        growth_rate : float
+            Growth of the spacing per unit of distance to the components (default = 0.25).
+
+        Returns
+        -------
+        grid : StretchedGrid
+            The refined grid.
+        """
+        if not 0 < fine_spacing <= coarse_spacing:
+            raise ValueError("The fine spacing should be positive and smaller than the coarse spacing.")
+
+        refinement_points = [[], []]
+        for component in components:
+            start = np.asarray(component.start_position, dtype=float)
+            stop = np.asarray(component.stop_position, dtype=float)
+            n_samples = int(min(max(np.linalg.norm(stop - start) / fine_spacing, 1), 200)) + 1
+
+            if component.geometry is not None:
+                points = component.geometry.get_points(start, stop, np.linspace(0, 1, n_samples))
+            else:
+                points = np.array([
+                    start + component.evaluate_parametric_equations(t * (stop - start))
+                    for t in np.linspace(0, 1, n_samples)
+                ])
+            directions = np.abs(np.gradient(points, axis=0)) if n_samples > 1 else np.zeros_like(points)
+
+            for axis in range(2):
+                # A component refines an axis where it crosses it, i.e. where it moves along the other axis
+                is_crossing = directions[:, axis] <= directions[:, 1 - axis]
+                refinement_points[axis].extend(points[is_crossing, axis])
+                refinement_points[axis].extend((start[axis], stop[axis]))
+
+        q1_values, q2_values = (
+            cls._graded_values(
+                minimum[axis], maximum[axis], np.asarray(refinement_points[axis]), fine_spacing, coarse_spacing,
+                growth_rate
+            )
+            for axis in range(2)
+        )
+        return cls(q1_values, q2_values)
+
+    @staticmethod
+    def _graded_values(
+            minimum: float,
+            maximum: float,
+            refinement_points: np.ndarray,
+            fine_spacing: float,
+            coarse_spacing: float,
+            growth_rate: float
+    ) -> np.ndarray:
+        """
+        Coordinates of a graded axis. The refinement points are nodes of the axis, so the components lie exactly on the
+        grid. Between them, the nodes are placed at equal increments of the integral of 1/h(q), where h is the desired
+        spacing, so the spacing varies smoothly and never exceeds h.
+        """
+        samples = np.linspace(minimum, maximum, int(10 * (maximum - minimum) / fine_spacing) + 2)
+        refinement_points = np.unique(refinement_points[(refinement_points > minimum) & (refinement_points < maximum)])
+
+        if len(refinement_points) == 0:
+            spacing = np.full_like(samples, coarse_spacing)
+        else:
+            indices = np.clip(np.searchsorted(refinement_points, samples), 1, max(1, len(refinement_points) - 1))
+            distance = np.minimum(
+                np.abs(samples - refinement_points[indices - 1]),
+                np.abs(samples - refinement_points[np.minimum(indices, len(refinement_points) - 1)])
+            )
+            spacing = np.minimum(coarse_spacing, fine_spacing + growth_rate * distance)
+
+        inverse_spacing = 1 / spacing
+        increments = (inverse_spacing[1:] + inverse_spacing[:-1]) / 2 * np.diff(samples)
+        cumulative = np.concatenate(([0], np.cumsum(increments)))
+
+        # Refinement points closer than half the fine spacing are merged so no interval is too small
+        anchors = [minimum]
+        for point in refinement_points:
+            if point - anchors[-1] >= fine_spacing / 2:
+                anchors.append(point)
+        if maximum - anchors[-1] < fine_spacing / 2 and len(anchors) > 1:
+            anchors.pop()
+        anchors.append(maximum)
+
+        values = [np.array([minimum])]
+        anchor_integrals = np.interp(anchors, samples, cumulative)
+        for start, stop in zip(anchor_integrals[:-1], anchor_integrals[1:]):
+            n_intervals = max(1, int(np.ceil(stop - start - 1e-9)))
+            values.append(np.interp(np.linspace(start, stop, n_intervals + 1)[1:], cumulative, samples))
+        values = np.concatenate(values)
+        values[-1] = maximum
+
+        return values
@@ -1,18 +1,28 @@
+import hashlib
+from typing import Callable
+
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import ndimage
 
 
+from src.checkpoint import RelaxationCheckpoint
 from src.coordinate_and_position import CoordinateSystem
 from src.fields import ScalarField
+from src.grid import StretchedGrid
+from src.profiling import Profiler
+from src.progress import CancellationToken, Progress, ProgressCallback
+from src.tiling import TiledStorage
 
 
 class LaplaceEquationSolver:
     """
     A Laplace equation solver used to compute the resultant potential field P in 2D-space generated by a constant
-    voltage field V (for example due to wires).
+    voltage field V (for example due to wires). The relaxation is done in the dtype of the voltage field, e.g. float32
+    for visualization-grade runs.
     """
 
+    # nombre d'itérations entre deux rapports de progression, chacun coûte environ une itération pour le résidu
+    PROGRESS_INTERVAL = 10
+
     def __init__(self, nb_iterations: int = 1000):
         """
         Laplace solver constructor. Used to define the number of iterations for the relaxation method.
@@ -28,7 +38,14 @@ class LaplaceEquationSolver:
             self,
             constant_voltage: ScalarField,
             delta_x: float,
-            delta_y: float
+            delta_y: float,
+            initial_potential: ScalarField = None,
+            dirichlet_mask: np.ndarray = None,
+            profiler: Profiler = None,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None,
+            checkpoint: RelaxationCheckpoint = None,
+            start_iteration: int = 0
     ) -> ScalarField:
         """
         Solve the Laplace equation to compute the resultant potential field P in 2D-space.
@@ -42,6 +59,23 @@ class LaplaceEquationSolver:
             Small discretization of the x-axis.
         delta_y : float
             Small discretization of the y-axis.
+        initial_potential : ScalarField
+            Potential field used to warm-start the relaxation, e.g. a previous solution of a similar circuit. The
+            relaxation starts from the voltage field V when no initial potential is given (default = None).
+        dirichlet_mask : np.ndarray
+            Boolean array of the cells whose potential is fixed to the voltage field, i.e. the cells of the circuit. It
+            is computed from the voltage field when it is not given (default = None).
+        profiler : Profiler
+            Profiler in which the residuals of the relaxation are recorded (default = None).
+        progress : ProgressCallback
+            Function called with the progress of the relaxation (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each iteration to cancel the relaxation (default = None).
+        checkpoint : RelaxationCheckpoint
+            Checkpoint in which the potential is written during the relaxation (default = None).
+        start_iteration : int
+            Number of iterations already done to obtain the initial potential, e.g. when resuming from a checkpoint
+            (default = 0).
 
         Returns
         -------
@@ -51,45 +85,230 @@ class LaplaceEquationSolver:
             the electrical components and in the empty space between the electrical components, while the field V
             always gives V(x, y) = 0 if (x, y) is not a point belonging to an electrical component of the circuit.
         """
+        # on crée un masque avec les cellules du circuit et leurs valeurs
+        masque = np.asarray(constant_voltage) != 0 if dirichlet_mask is None else dirichlet_mask
+        valeurs_circuit = np.asarray(constant_voltage)[masque]
+
+        matrice_dep = np.array(constant_voltage)
+        if initial_potential is not None:
+            # on part de la solution donnée en imposant les valeurs du circuit
+            matrice_dep = np.array(initial_potential, dtype=constant_voltage.dtype)
+            matrice_dep[masque] = valeurs_circuit
+
+        # on crée une seule fois une matrice entourée de zéros et les matrices de travail, les décalages dans chaque
+        # direction sont des vues de la matrice entourée de zéros
+        V_n = np.zeros((constant_voltage.shape[0] + 2, constant_voltage.shape[1] + 2), dtype=constant_voltage.dtype)
+        nouvelle_matrice = np.empty_like(matrice_dep)
+        somme_y = np.empty_like(matrice_dep)
+        for i in range(start_iteration, self.nb_iterations):
+            V_n[1:-1, 1:-1] = matrice_dep
 
-        # on crée une liste avec les valeurs de circuit
-        circuit_list = []
-        for y, line in enumerate(constant_voltage):
-            for x, val in enumerate(line):
-                if val != 0:
-                    circuit_list.append((x, y, val))
-
-
-
-        matrice_dep = constant_voltage
-
-        # on crée 4 matrices 103 par 103 en décalant dans chaque direction la matrice_dep
-        for i in range(self.nb_iterations):
-            # décalé vers la gauche
-            V_ng = np.zeros((constant_voltage.shape[1] + 2, constant_voltage.shape[0] + 2))
-            V_ng[0:-2, 1:-1]=matrice_dep
-            
-            # décalé vers la droite
-            V_nd = np.zeros((constant_voltage.shape[1] + 2, constant_voltage.shape[0] + 2))
-            V_nd[2:, 1:-1]=matrice_dep
-            
-            # décalé vers le haut
-            V_nh = np.zeros((constant_voltage.shape[1] + 2, constant_voltage.shape[0] + 2))
-            V_nh[1:-1, 0:-2]=matrice_dep
-            
-            # décalé vers le bas
-            V_nb = np.zeros((constant_voltage.shape[1] + 2, constant_voltage.shape[0] + 2))
-            V_nb[1:-1, 2:]=matrice_dep
-            
             # on calcule avec le laplace
-            matrice_dep=((1/delta_x**2+1/delta_y**2)**(-1) * 0.5 * ((V_nd+V_ng)/delta_x**2+(V_nb+V_nh)/delta_y**2))[1:-1, 1:-1]
-            
+            np.add(V_n[:-2, 1:-1], V_n[2:, 1:-1], out=nouvelle_matrice)
+            nouvelle_matrice /= delta_x**2
+            np.add(V_n[1:-1, :-2], V_n[1:-1, 2:], out=somme_y)
+            somme_y /= delta_y**2
+            nouvelle_matrice += somme_y
+            nouvelle_matrice *= (1/delta_x**2+1/delta_y**2)**(-1) * 0.5
+            matrice_dep, nouvelle_matrice = nouvelle_matrice, matrice_dep
+
             # on re-initialise les valeurs du circuits (elles ne devraient pas changer)
-            for k in circuit_list:
-                matrice_dep[k[1], k[0]] = k[2]
+            matrice_dep[masque] = valeurs_circuit
 
+            self._end_iteration(
+                i, lambda: np.abs(matrice_dep - nouvelle_matrice).max(), matrice_dep, profiler, progress,
+                cancellation_token, checkpoint
+            )
 
+        return ScalarField(matrice_dep)
 
+    def _solve_in_cartesian_coordinate_by_tiles(
+            self,
+            constant_voltage: ScalarField,
+            delta_x: float,
+            delta_y: float,
+            storage: TiledStorage,
+            initial_potential: ScalarField = None,
+            profiler: Profiler = None,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None,
+            checkpoint: RelaxationCheckpoint = None,
+            start_iteration: int = 0
+    ) -> ScalarField:
+        """
+        Solve the Laplace equation to compute the resultant potential field P in 2D-space, for worlds larger than the
+        memory. The relaxation is done by tiles of rows of memory-mapped fields, each tile being read with one halo row
+        on each side, so the result is the same as _solve_in_cartesian_coordinate.
+
+        Parameters
+        ----------
+        constant_voltage : ScalarField
+            A scalar field V : ℝ² → ℝ ; (x, y) → V(x, y), where V(x, y) is the electrical components' voltage at a
+            given point (x, y) in space.
+        delta_x : float
+            Small discretization of the x-axis.
+        delta_y : float
+            Small discretization of the y-axis.
+        storage : TiledStorage
+            Storage of the memory-mapped potential field, which also bounds the size of the tiles.
+        initial_potential : ScalarField
+            Potential field used to warm-start the relaxation (default = None).
+        profiler : Profiler
+            Profiler in which the residuals of the relaxation are recorded (default = None).
+        progress : ProgressCallback
+            Function called with the progress of the relaxation (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each iteration to cancel the relaxation (default = None).
+        checkpoint : RelaxationCheckpoint
+            Checkpoint in which the potential is written during the relaxation (default = None).
+        start_iteration : int
+            Number of iterations already done to obtain the initial potential, e.g. when resuming from a checkpoint
+            (default = 0).
+
+        Returns
+        -------
+        potential : ScalarField
+            The memory-mapped scalar field P : ℝ² → ℝ ; (x, y) → P(x, y), where P(x, y) is the electric potential at a
+            given point (x, y) in space.
+        """
+        shape, dtype = constant_voltage.shape, constant_voltage.dtype
+        noms = ["potential", "potential_buffer"]
+        matrice_dep = storage.allocate(noms[0], shape, dtype, ScalarField)
+        nouvelle_matrice = storage.allocate(noms[1], shape, dtype, ScalarField)
+        tuiles = list(storage.row_tiles(shape[0], (shape[1] + 2) * constant_voltage.itemsize, nb_buffers=6))
+
+        # on initialise la matrice en imposant les valeurs du circuit
+        depart = constant_voltage if initial_potential is None else initial_potential
+        for debut, fin in tuiles:
+            tuile = np.array(depart[debut:fin], dtype=dtype)
+            tuile_circuit = np.asarray(constant_voltage[debut:fin])
+            masque = tuile_circuit != 0
+            tuile[masque] = tuile_circuit[masque]
+            matrice_dep[debut:fin] = tuile
+
+        try:
+            for i in range(start_iteration, self.nb_iterations):
+                besoin_residu = self._needs_residual(i, profiler, progress)
+                residu = 0.0
+                for debut, fin in tuiles:
+                    # on lit la tuile avec une rangée de halo de chaque côté, les valeurs hors du monde sont nulles
+                    debut_halo, fin_halo = max(debut - 1, 0), min(fin + 1, shape[0])
+                    V_n = np.zeros((fin - debut + 2, shape[1] + 2), dtype=dtype)
+                    V_n[debut_halo - debut + 1:fin_halo - debut + 1, 1:-1] = matrice_dep[debut_halo:fin_halo]
+
+                    # on calcule avec le laplace
+                    tuile = np.add(V_n[:-2, 1:-1], V_n[2:, 1:-1])
+                    tuile /= delta_x**2
+                    somme_y = np.add(V_n[1:-1, :-2], V_n[1:-1, 2:])
+                    somme_y /= delta_y**2
+                    tuile += somme_y
+                    tuile *= (1/delta_x**2+1/delta_y**2)**(-1) * 0.5
+
+                    # on re-initialise les valeurs du circuits (elles ne devraient pas changer)
+                    tuile_circuit = np.asarray(constant_voltage[debut:fin])
+                    masque = tuile_circuit != 0
+                    tuile[masque] = tuile_circuit[masque]
+                    nouvelle_matrice[debut:fin] = tuile
+
+                    if besoin_residu:
+                        residu = max(residu, float(np.abs(tuile - V_n[1:-1, 1:-1]).max()))
+
+                matrice_dep, nouvelle_matrice = nouvelle_matrice, matrice_dep
+                noms.reverse()
+
+                self._end_iteration(
+                    i, lambda: residu, matrice_dep, profiler, progress, cancellation_token, checkpoint
+                )
+        finally:
+            # le potentiel, même partiel si la relaxation est annulée, est toujours dans le fichier "potential"
+            if noms[0] != "potential":
+                storage.rename(noms[0], "potential")
+
+        return matrice_dep
+
+    def _solve_in_cartesian_coordinate_on_grid(
+            self,
+            constant_voltage: ScalarField,
+            grid: StretchedGrid,
+            initial_potential: ScalarField = None,
+            dirichlet_mask: np.ndarray = None,
+            profiler: Profiler = None,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None,
+            checkpoint: RelaxationCheckpoint = None,
+            start_iteration: int = 0
+    ) -> ScalarField:
+        """
+        Solve the Laplace equation to compute the resultant potential field P in 2D-space on a non-uniform grid. The
+        second derivatives use the three-point stencil of variable spacing, so on a uniform grid the relaxation is the
+        same as _solve_in_cartesian_coordinate.
+
+        Parameters
+        ----------
+        constant_voltage : ScalarField
+            A scalar field V : ℝ² → ℝ ; (x, y) → V(x, y), where V(x, y) is the electrical components' voltage at a
+            given point (x, y) in space.
+        grid : StretchedGrid
+            The non-uniform grid on which the voltage field is defined.
+        initial_potential : ScalarField
+            Potential field used to warm-start the relaxation (default = None).
+        dirichlet_mask : np.ndarray
+            Boolean array of the cells whose potential is fixed to the voltage field (default = None).
+        profiler : Profiler
+            Profiler in which the residuals of the relaxation are recorded (default = None).
+        progress : ProgressCallback
+            Function called with the progress of the relaxation (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each iteration to cancel the relaxation (default = None).
+        checkpoint : RelaxationCheckpoint
+            Checkpoint in which the potential is written during the relaxation (default = None).
+        start_iteration : int
+            Number of iterations already done to obtain the initial potential, e.g. when resuming from a checkpoint
+            (default = 0).
+
+        Returns
+        -------
+        potential : ScalarField
+            A scalar field P : ℝ² → ℝ ; (x, y) → P(x, y), where P(x, y) is the electric potential at a given point
+            (x, y) in space.
+        """
+        dtype = constant_voltage.dtype
+        masque = np.asarray(constant_voltage) != 0 if dirichlet_mask is None else dirichlet_mask
+        valeurs_circuit = np.asarray(constant_voltage)[masque]
+
+        matrice_dep = np.array(constant_voltage if initial_potential is None else initial_potential, dtype=dtype)
+        matrice_dep[masque] = valeurs_circuit
+
+        # on calcule les coefficients du laplacien pour chaque axe, les cellules hors du monde (nulles) sont à la
+        # distance du plus petit pas de l'axe, comme sur la grille uniforme la plus fine
+        coefficients = []
+        for valeurs in (grid.q1_values, grid.q2_values):
+            h = np.diff(valeurs)
+            h_moins, h_plus = np.concatenate(([h.min()], h)), np.concatenate((h, [h.min()]))
+            coefficients.append((2 / (h_moins * (h_moins + h_plus)), 2 / (h_plus * (h_moins + h_plus))))
+        (a_moins, a_plus), (b_moins, b_plus) = coefficients
+        a_moins, a_plus = a_moins[:, None].astype(dtype), a_plus[:, None].astype(dtype)
+        b_moins, b_plus = b_moins[None, :].astype(dtype), b_plus[None, :].astype(dtype)
+        inverse_diagonale = 1 / (a_moins + a_plus + b_moins + b_plus)
+
+        V_n = np.zeros((constant_voltage.shape[0] + 2, constant_voltage.shape[1] + 2), dtype=dtype)
+        nouvelle_matrice = np.empty_like(matrice_dep)
+        for i in range(start_iteration, self.nb_iterations):
+            V_n[1:-1, 1:-1] = matrice_dep
+
+            # on calcule avec le laplace à pas variable
+            nouvelle_matrice[...] = a_moins * V_n[:-2, 1:-1] + a_plus * V_n[2:, 1:-1]
+            nouvelle_matrice += b_moins * V_n[1:-1, :-2] + b_plus * V_n[1:-1, 2:]
+            nouvelle_matrice *= inverse_diagonale
+            matrice_dep, nouvelle_matrice = nouvelle_matrice, matrice_dep
+
+            # on re-initialise les valeurs du circuits (elles ne devraient pas changer)
+            matrice_dep[masque] = valeurs_circuit
+
+            self._end_iteration(
+                i, lambda: np.abs(matrice_dep - nouvelle_matrice).max(), matrice_dep, profiler, progress,
+                cancellation_token, checkpoint
+            )
 
         return ScalarField(matrice_dep)
 
@@ -97,7 +316,14 @@ class LaplaceEquationSolver:
             self,
             constant_voltage: ScalarField,
             delta_r: float,
-            delta_theta: float
+            delta_theta: float,
+            initial_potential: ScalarField = None,
+            dirichlet_mask: np.ndarray = None,
+            profiler: Profiler = None,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None,
+            checkpoint: RelaxationCheckpoint = None,
+            start_iteration: int = 0
     ) -> ScalarField:
         """
         Solve the Laplace equation to compute the resultant potential field P in 2D-space.
@@ -111,6 +337,23 @@ class LaplaceEquationSolver:
             Small discretization of the r-axis.
         delta_theta : float
             Small discretization of the θ-axis.
+        initial_potential : ScalarField
+            Potential field used to warm-start the relaxation, e.g. a previous solution of a similar circuit. The
+            relaxation starts from the voltage field V when no initial potential is given (default = None).
+        dirichlet_mask : np.ndarray
+            Boolean array of the cells whose potential is fixed to the voltage field, i.e. the cells of the circuit. It
+            is computed from the voltage field when it is not given (default = None).
+        profiler : Profiler
+            Profiler in which the residuals of the relaxation are recorded (default = None).
+        progress : ProgressCallback
+            Function called with the progress of the relaxation (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each iteration to cancel the relaxation (default = None).
+        checkpoint : RelaxationCheckpoint
+            Checkpoint in which the potential is written during the relaxation (default = None).
+        start_iteration : int
+            Number of iterations already done to obtain the initial potential, e.g. when resuming from a checkpoint
+            (default = 0).
 
         Returns
         -------
@@ -120,42 +363,149 @@ class LaplaceEquationSolver:
             the electrical components and in the empty space between the electrical components, while the field V
             always gives V(r, θ) = 0 if (r, θ) is not a point belonging to an electrical component of the circuit.
         """
-        # on crée une liste avec les valeurs de circuit
-        circuit_list = []
-        for theta, line in enumerate(constant_voltage):
-            for r, val in enumerate(line):
-                if val != 0:
-                    circuit_list.append((r, theta, val))
-
-        # on crée des copies
-        matrice_dep = constant_voltage.copy()
-        nouvelle_matrice = constant_voltage.copy()
-
-        # on itère en theta et en r
-        for i in range(self.nb_iterations):
-            for theta, ligne in enumerate(matrice_dep):
-                for r, val in enumerate(ligne):
-                    if((r!=0 and r!=constant_voltage.shape[1]-1) and theta!=constant_voltage.shape[0]-1):
-                        # comme on a un np.array, on doit quand meme utiliser delta_theta=1 pour les indices
-                        # on utilise laplace
-                        nouvelle_matrice[theta][r] = 1/(2/delta_r**2+2/(r*delta_theta)**2)*(
-                            (matrice_dep[theta][int(r+delta_r)]+matrice_dep[theta][int(r-delta_r)])/delta_r**2+(matrice_dep[theta][int(r+delta_r)]-matrice_dep[theta][int(r-delta_r)])/(2*delta_r*r)+(matrice_dep[theta+1][r]+matrice_dep[theta-1][r])/(delta_theta*r)**2
-                        )
-            matrice_dep = nouvelle_matrice.copy()
-
-            # on re-initialise les valeurs du circuits (elles ne devraient pas changer) 
-            for k in circuit_list:
-                matrice_dep[k[1], k[0]] = k[2]
+        # on crée un masque avec les cellules du circuit et leurs valeurs
+        masque = np.asarray(constant_voltage) != 0 if dirichlet_mask is None else dirichlet_mask
+        valeurs_circuit = np.asarray(constant_voltage)[masque]
+        dtype = constant_voltage.dtype
+
+        matrice_dep = np.array(constant_voltage)
+        if initial_potential is not None:
+            # on part de la solution donnée en imposant les valeurs du circuit
+            matrice_dep = np.array(initial_potential, dtype=dtype)
+            matrice_dep[masque] = valeurs_circuit
+        # les cellules du bord ne sont pas relaxées, elles gardent leur valeur initiale dans les deux matrices
+        nouvelle_matrice = matrice_dep.copy()
+
+        # comme on a un np.array, on doit quand meme utiliser delta_theta=1 pour les indices ; on relaxe toutes les
+        # lignes theta sauf la dernière, la ligne précédant la première étant la dernière, et toutes les colonnes r
+        # sauf la première et la dernière
+        nb_theta, nb_r = matrice_dep.shape
+        r = np.arange(1, nb_r - 1)
+        r_plus, r_moins = (r + delta_r).astype(int), (r - delta_r).astype(int)
+        theta_moins = np.arange(nb_theta - 1) - 1
+        # coefficients du laplacien de chaque colonne r
+        facteur = (1 / (2 / delta_r**2 + 2 / (r * delta_theta)**2)).astype(dtype)
+        denominateur_r = (2 * delta_r * r).astype(dtype)
+        denominateur_theta = ((delta_theta * r)**2).astype(dtype)
+
+        # on crée une seule fois les matrices de travail des voisins de chaque cellule relaxée
+        forme = (max(nb_theta - 1, 0), len(r))
+        suivant_r, precedent_r, precedent_theta, somme = (np.empty(forme, dtype=dtype) for _ in range(4))
+        for i in range(start_iteration, self.nb_iterations):
+            np.take(matrice_dep[:-1], r_plus, axis=1, out=suivant_r)
+            np.take(matrice_dep[:-1], r_moins, axis=1, out=precedent_r)
+            np.take(matrice_dep[:, 1:-1], theta_moins, axis=0, out=precedent_theta)
+
+            # on utilise laplace
+            interieur = nouvelle_matrice[:-1, 1:-1]
+            np.add(suivant_r, precedent_r, out=interieur)
+            interieur /= delta_r**2
+            np.subtract(suivant_r, precedent_r, out=somme)
+            somme /= denominateur_r
+            interieur += somme
+            np.add(matrice_dep[1:, 1:-1], precedent_theta, out=somme)
+            somme /= denominateur_theta
+            interieur += somme
+            interieur *= facteur
+            matrice_dep, nouvelle_matrice = nouvelle_matrice, matrice_dep
+
+            # on re-initialise les valeurs du circuits (elles ne devraient pas changer)
+            matrice_dep[masque] = valeurs_circuit
+
+            self._end_iteration(
+                i, lambda: np.abs(matrice_dep - nouvelle_matrice).max(), matrice_dep, profiler, progress,
+                cancellation_token, checkpoint
+            )
 
         return ScalarField(matrice_dep)
 
 
+    def _reports_progress(self, iteration: int) -> bool:
+        return (iteration + 1) % self.PROGRESS_INTERVAL == 0 or iteration + 1 == self.nb_iterations
+
+    def _needs_residual(self, iteration: int, profiler: Profiler = None, progress: ProgressCallback = None) -> bool:
+        """
+        Whether the residual of the given iteration, counted from 0, is recorded by the profiler or reported.
+        """
+        return (profiler is not None and profiler.records_residual(iteration)) or (
+            progress is not None and self._reports_progress(iteration)
+        )
+
+    def _end_iteration(
+            self,
+            iteration: int,
+            residual: Callable[[], float],
+            potential: np.ndarray,
+            profiler: Profiler = None,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None,
+            checkpoint: RelaxationCheckpoint = None
+    ):
+        """
+        Ends an iteration of the relaxation, counted from 0. The residual, i.e. the largest change of the potential
+        during the iteration, is computed only if the profiler records it or if the progress is reported, which is
+        done every PROGRESS_INTERVAL iterations and after the last one. The potential is written in the checkpoint when
+        it is due. Raises ComputationCancelled with the potential reached so far if the cancellation token is cancelled.
+        """
+        if self._needs_residual(iteration, profiler, progress):
+            residu = float(residual())
+            if profiler is not None and profiler.records_residual(iteration):
+                profiler.record_residual(iteration + 1, residu)
+            if progress is not None and self._reports_progress(iteration):
+                progress(Progress("laplace", iteration + 1, self.nb_iterations, residu))
+
+        if checkpoint is not None and iteration + 1 < self.nb_iterations and checkpoint.is_due(iteration + 1):
+            checkpoint.save(iteration + 1, potential)
+
+        if cancellation_token is not None:
+            cancellation_token.raise_if_cancelled("laplace", lambda: ScalarField(potential), iteration + 1)
+
+    @staticmethod
+    def checkpoint_key(
+            constant_voltage: ScalarField,
+            coordinate_system: CoordinateSystem,
+            delta_q1: float,
+            delta_q2: float,
+            initial_potential: ScalarField = None,
+            grid: StretchedGrid = None,
+            start_iteration: int = 0
+    ) -> str:
+        """
+        Stable key of the inputs of a relaxation, which identifies its checkpoints. The number of iterations is not part
+        of the key, so a relaxation can be resumed from a checkpoint of a shorter one.
+
+        Returns
+        -------
+        key : str
+            Hexadecimal digest identifying the relaxation.
+        """
+        digest = hashlib.sha256()
+        digest.update(repr((tuple(constant_voltage.shape), constant_voltage.dtype.name,
+                            CoordinateSystem(coordinate_system).name, float(delta_q1), float(delta_q2),
+                            start_iteration)).encode())
+        digest.update(memoryview(np.ascontiguousarray(constant_voltage)).cast("B"))
+        if initial_potential is not None:
+            digest.update(memoryview(np.ascontiguousarray(initial_potential)).cast("B"))
+        if grid is not None:
+            digest.update(grid.q1_values.tobytes())
+            digest.update(grid.q2_values.tobytes())
+        return digest.hexdigest()
+
     def solve(
             self,
             constant_voltage: ScalarField,
             coordinate_system: CoordinateSystem,
             delta_q1: float,
-            delta_q2: float
+            delta_q2: float,
+            initial_potential: ScalarField = None,
+            storage: TiledStorage = None,
+            grid: StretchedGrid = None,
+            dirichlet_mask: np.ndarray = None,
+            profiler: Profiler = None,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None,
+            checkpoint: RelaxationCheckpoint = None,
+            start_iteration: int = 0
     ) -> ScalarField:
         """
         Solve the Laplace equation to compute the resultant potential field P in 2D-space.
@@ -170,15 +520,105 @@ class LaplaceEquationSolver:
             Small discretization of the first axis.
         delta_q2 : float
             Small discretization of the second axis.
+        initial_potential : ScalarField
+            Potential field used to warm-start the relaxation (default = None).
+        storage : TiledStorage
+            Storage used to solve worlds larger than the memory by tiles. The potential is then a memory-mapped field of
+            this storage (default = None).
+        grid : StretchedGrid
+            Non-uniform grid on which the voltage field is defined. The discretizations delta_q1 and delta_q2 are then
+            ignored. Only the cartesian coordinates system is implemented on non-uniform grids (default = None).
+        dirichlet_mask : np.ndarray
+            Boolean array of the cells whose potential is fixed to the voltage field, e.g. a wire mask cached by the
+            caller. It is computed from the voltage field when it is not given. The tiled solver computes it by tiles
+            (default = None).
+        profiler : Profiler
+            Profiler in which the residual of the relaxation, i.e. the largest change of the potential during an
+            iteration, is recorded every profiler.residual_interval iterations, and the number of iterations performed
+            is recorded at the end of the relaxation (default = None).
+        progress : ProgressCallback
+            Function called every PROGRESS_INTERVAL iterations, and after the last one, with the progress of the
+            relaxation : the number of iterations done, the fraction done and the residual (default = None).
+        cancellation_token : CancellationToken
+            Token checked after each iteration. If it is cancelled, ComputationCancelled is raised with the potential
+            reached so far as partial result (default = None).
+        checkpoint : RelaxationCheckpoint
+            Checkpoint of the relaxation. The relaxation is resumed from the latest checkpoint of the same inputs, if
+            any, and the potential is written in the checkpoint every checkpoint's interval of iterations or time. The
+            checkpoints are removed once the relaxation is finished (default = None).
+        start_iteration : int
+            Number of iterations already done to obtain the initial potential, e.g. the iteration of the partial
+            potential of a cancelled relaxation. Only the remaining iterations are performed (default = 0).
 
         Returns
         -------
         potential : ScalarField
             A scalar field P : ℝ² → ℝ  representing the potential in the 2D world.
         """
+        if checkpoint is not None:
+            cle = self.checkpoint_key(
+                constant_voltage, coordinate_system, delta_q1, delta_q2, initial_potential, grid, start_iteration
+            )
+            etat = checkpoint.resume(cle, self.nb_iterations, mmap_mode=None if storage is None else "r")
+            if etat is not None:
+                # on reprend la relaxation au dernier point de contrôle
+                start_iteration, initial_potential = etat
+
+        potential = self._solve(
+            constant_voltage, coordinate_system, delta_q1, delta_q2, initial_potential, storage, grid, dirichlet_mask,
+            profiler, progress, cancellation_token, checkpoint, start_iteration
+        )
+
+        if profiler is not None:
+            profiler.record_iterations(self.nb_iterations - start_iteration, start_iteration)
+        if checkpoint is not None:
+            checkpoint.clear()
+        return potential
+
+    def _solve(
+            self,
+            constant_voltage: ScalarField,
+            coordinate_system: CoordinateSystem,
+            delta_q1: float,
+            delta_q2: float,
+            initial_potential: ScalarField,
+            storage: TiledStorage,
+            grid: StretchedGrid,
+            dirichlet_mask: np.ndarray,
+            profiler: Profiler,
+            progress: ProgressCallback,
+            cancellation_token: CancellationToken,
+            checkpoint: RelaxationCheckpoint,
+            start_iteration: int
+    ) -> ScalarField:
+        """
+        Solve the Laplace equation with the solver of the coordinate system, the grid or the storage, see solve.
+        """
+        if grid is not None:
+            if coordinate_system != CoordinateSystem.CARTESIAN or storage is not None:
+                raise NotImplementedError("Only the cartesian coordinates system is implemented on non-uniform grids.")
+            return self._solve_in_cartesian_coordinate_on_grid(
+                constant_voltage, grid, initial_potential, dirichlet_mask, profiler, progress, cancellation_token,
+                checkpoint, start_iteration
+            )
+
+        if storage is not None:
+            if coordinate_system != CoordinateSystem.CARTESIAN:
+                raise NotImplementedError("Only the cartesian coordinates system is implemented by tiles.")
+            return self._solve_in_cartesian_coordinate_by_tiles(
+                constant_voltage, delta_q1, delta_q2, storage, initial_potential, profiler, progress,
+                cancellation_token, checkpoint, start_iteration
+            )
+
         if coordinate_system == CoordinateSystem.CARTESIAN:
-            return self._solve_in_cartesian_coordinate(constant_voltage, delta_q1, delta_q2)
+            return self._solve_in_cartesian_coordinate(
+                constant_voltage, delta_q1, delta_q2, initial_potential, dirichlet_mask, profiler, progress,
+                cancellation_token, checkpoint, start_iteration
+            )
         elif coordinate_system == CoordinateSystem.POLAR:
-            return self._solve_in_polar_coordinate(constant_voltage, delta_q1, delta_q2)
+            return self._solve_in_polar_coordinate(
+                constant_voltage, delta_q1, delta_q2, initial_potential, dirichlet_mask, profiler, progress,
+                cancellation_token, checkpoint, start_iteration
+            )
         else:
             raise NotImplementedError("Only the cartesian and polar coordinates system are implemented.")
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+import hashlib
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.coordinate_and_position import CoordinateSystem
+from src.grid import StretchedGrid
+
+
+class MagneticFieldCache:
+    """
+    A cache of unit-current magnetic fields. The magnetic field B is linear in the current, so the contribution of a
+    component to B is its unit-current magnetic field times the component's current. Caching the unit-current fields
+    per component geometry allows to compute B for any set of currents with a weighted sum, without solving the
+    Biot–Savart equation again.
+
+    The cache is bounded by the total size of the stored fields. When the size limit is exceeded, the least recently
+    used fields are evicted from memory and, if a spill directory is given, written to disk so they can be reloaded
+    later instead of being computed again.
+    """
+
+    def __init__(self, max_size: int = 256 * 2**20, spill_directory: str = None):
+        """
+        Magnetic field cache constructor.
+
+        Parameters
+        ----------
+        max_size : int
+            Maximum total size, in bytes, of the fields kept in memory (default = 256 MiB).
+        spill_directory : str
+            Directory in which the evicted fields are written. The evicted fields are discarded if no directory is
+            given (default = None).
+        """
+        if max_size < 0:
+            raise ValueError(f"The cache's maximum size should be positive. Received {max_size}.")
+
+        self._max_size = max_size
+        self._spill_directory = spill_directory
+        self._fields = OrderedDict()
+        self._size = 0
+
+        if spill_directory is not None:
+            os.makedirs(spill_directory, exist_ok=True)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._fields or (self._spill_path(key) is not None and os.path.exists(self._spill_path(key)))
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    @property
+    def size(self) -> int:
+        """
+        Total size, in bytes, of the fields kept in memory.
+        """
+        return self._size
+
+    @staticmethod
+    def key(
+            cells: np.ndarray,
+            unit_currents: np.ndarray,
+            shape: Tuple[int, int],
+            coordinate_system: CoordinateSystem,
+            delta_q1: float,
+            delta_q2: float,
+            grid: StretchedGrid = None
+    ) -> str:
+        """
+        Stable key of a unit-current magnetic field.
+
+        Parameters
+        ----------
+        cells : np.ndarray
+            The (P, 2) array of the grid cells covered by the component.
+        unit_currents : np.ndarray
+            The (P, 2) array of the current vectors at these cells for a unit current in the component.
+        shape : Tuple[int, int]
+            Shape of the grid.
+        coordinate_system : CoordinateSystem
+            Coordinate system of the grid.
+        delta_q1 : float
+            Small discretization of the first axis.
+        delta_q2 : float
+            Small discretization of the second axis.
+        grid : StretchedGrid
+            Non-uniform grid on which the cells are defined (default = None).
+
+        Returns
+        -------
+        key : str
+            Hexadecimal digest identifying the unit-current magnetic field.
+        """
+        digest = hashlib.sha256()
+        digest.update(repr((tuple(shape), CoordinateSystem(coordinate_system).name, float(delta_q1),
+                            float(delta_q2))).encode())
+        digest.update(np.ascontiguousarray(cells, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(unit_currents, dtype=np.float64).tobytes())
+        if grid is not None:
+            digest.update(grid.q1_values.tobytes())
+            digest.update(grid.q2_values.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Return the cached unit-current magnetic field (z component) associated to the given key, or None if the field
+        is not cached.
+        """
+        if key in self._fields:
+            self._fields.move_to_end(key)
+            return self._fields[key]
+
+        spill_path = self._spill_path(key)
+        if spill_path is not None and os.path.exists(spill_path):
+            field = np.load(spill_path)
+            self._store(key, field)
+            return field
+
+        return None
+
+    def put(self, key: str, field: np.ndarray):
+        """
+        Cache the unit-current magnetic field (z component) associated to the given key.
+        """
+        if key in self._fields:
+            self._size -= self._fields.pop(key).nbytes
+        self._store(key, np.asarray(field))
+
+    def clear(self):
+        """
+        Remove all the fields kept in memory. The fields spilled on disk are kept.
+        """
+        self._fields.clear()
+        self._size = 0
+
+    def _spill_path(self, key: str) -> Optional[str]:
+        if self._spill_directory is None:
+            return None
+        return os.path.join(self._spill_directory, f"{key}.npy")
+
+    def _store(self, key: str, field: np.ndarray):
+        self._fields[key] = field
+        self._size += field.nbytes
+
+        while self._size > self._max_size and self._fields:
+            evicted_key, evicted_field = self._fields.popitem(last=False)
+            self._size -= evicted_field.nbytes
+
+            spill_path = self._spill_path(evicted_key)
+            if spill_path is not None and not os.path.exists(spill_path):
+                temporary_path = f"{spill_path}.{os.getpid()}.tmp"
+                with open(temporary_path, "wb") as file:
+                    np.save(file, evicted_field)
+                os.replace(temporary_path, spill_path)
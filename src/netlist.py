@@ -0,0 +1,226 @@
+"""
+Netlists, i.e. declarative descriptions of circuits which can be saved as JSON, or as msgpack if it is installed, and
+shared between processes. A netlist holds its components by columns and the shapes of the components in a table, e.g.
+
+    {
+        "version": 1,
+        "ground_position": [26, 60],
+        "increment_size": 0.01,
+        "geometries": [
+            {"type": "segment"},
+            {"type": "arc", "center": [50, 50], "clockwise": true},
+            {"type": "expression", "equations": ["x", "0"], "variables": ["x", "y"]}
+        ],
+        "components": {
+            "type": ["VoltageSource", "Wire", "Wire"],
+            "start_position": [[26, 60], [26, 40], [74, 40]],
+            "stop_position": [[26, 40], [74, 40], [26, 60]],
+            "value": [1.0, 0.01, 1.0],
+            "geometry": [0, 2, 1]
+        }
+    }
+
+where "value" is the resistance of a wire, the voltage of a voltage source or the current of a current source. The
+primitive shapes, i.e. segments and arcs, are loaded without sympy, while the expressions are parsed once per netlist.
+"""
+import functools
+import json
+from typing import List, Tuple
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, the netlists are then only saved as JSON.
+    msgpack = None
+
+import numpy as np
+
+from src.circuit import Circuit
+from src.electrical_components import CurrentSource, ElectricalComponent, VoltageSource, Wire
+from src.geometry import Geometry
+
+NETLIST_VERSION = 1
+MSGPACK_EXTENSIONS = (".msgpack", ".mpk")
+COMPONENT_TYPES = {"Wire": Wire, "VoltageSource": VoltageSource, "CurrentSource": CurrentSource}
+
+
+def _get_value(component: ElectricalComponent) -> float:
+    if isinstance(component, Wire):
+        return float(component.resistance)
+    if isinstance(component, VoltageSource):
+        return float(component.voltage)
+    return float(component.current)
+
+
+def _describe_geometry(component: ElectricalComponent) -> dict:
+    if component.geometry is not None:
+        return component.geometry.as_dict()
+    return {
+        "type": "expression",
+        "equations": [str(equation) for equation in component.wire_parametric_equations],
+        "variables": [str(variable) for variable in component.variables]
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_expression(equations: Tuple[str, ...], variables: Tuple[str, ...]) -> tuple:
+    """
+    Parametric equations and variables of an expression's strings. The parsed expressions are shared between the
+    netlists, so each expression is only parsed once per process.
+    """
+    from sympy import Symbol, sympify
+
+    symbols = tuple(Symbol(variable) for variable in variables)
+    namespace = {variable: symbol for variable, symbol in zip(variables, symbols)}
+    return tuple(sympify(equation, locals=namespace) for equation in equations), symbols
+
+
+def _build_geometry(description: dict):
+    """
+    Shape or parametric equations and variables of a netlist's geometry.
+    """
+    if description["type"] == "expression":
+        return _parse_expression(tuple(description["equations"]), tuple(description["variables"]))
+    return Geometry.from_dict(description), None
+
+
+def circuit_to_netlist(circuit: Circuit, labels: bool = False) -> dict:
+    """
+    Netlist of a circuit.
+
+    Parameters
+    ----------
+    circuit : Circuit
+        The circuit.
+    labels : bool
+        Whether the labels of the components are kept. Otherwise, the components get their default labels when the
+        netlist is loaded (default = False).
+
+    Returns
+    -------
+    netlist : dict
+        The JSON-serializable netlist.
+    """
+    geometries, geometry_indices = [], {}
+    columns = {"type": [], "start_position": [], "stop_position": [], "value": [], "geometry": []}
+    for component in circuit.components:
+        geometry = _describe_geometry(component)
+        geometry_key = json.dumps(geometry, sort_keys=True)
+        if geometry_key not in geometry_indices:
+            geometry_indices[geometry_key] = len(geometries)
+            geometries.append(geometry)
+
+        columns["type"].append(type(component).__name__)
+        columns["start_position"].append([float(value) for value in component.start_position])
+        columns["stop_position"].append([float(value) for value in component.stop_position])
+        columns["value"].append(_get_value(component))
+        columns["geometry"].append(geometry_indices[geometry_key])
+
+    if labels:
+        columns["label"] = [component.label for component in circuit.components]
+
+    return {
+        "version": NETLIST_VERSION,
+        "ground_position": [float(value) for value in circuit._ground_position],
+        "increment_size": float(circuit._increment_size),
+        "geometries": geometries,
+        "components": columns
+    }
+
+
+def circuit_from_netlist(netlist: dict) -> Circuit:
+    """
+    Circuit of a netlist. The columns are checked as arrays before the components are built, and the components with
+    a primitive shape are built without sympy.
+    """
+    if netlist.get("version") != NETLIST_VERSION:
+        raise ValueError(f"Unsupported netlist version {netlist.get('version')}. Expected {NETLIST_VERSION}.")
+
+    columns = netlist["components"]
+    types = columns["type"]
+    nb_components = len(types)
+    start_positions = np.asarray(columns["start_position"], dtype=float).reshape(-1, 2)
+    stop_positions = np.asarray(columns["stop_position"], dtype=float).reshape(-1, 2)
+    values = np.asarray(columns["value"], dtype=float)
+    geometry_indices = np.asarray(columns["geometry"], dtype=int)
+    labels = columns.get("label") or [None] * nb_components
+
+    if not (len(start_positions) == len(stop_positions) == len(values) == len(geometry_indices) == len(labels)
+            == nb_components):
+        raise ValueError("The columns of the netlist's components should all have the same length.")
+    if not (np.isfinite(start_positions).all() and np.isfinite(stop_positions).all() and np.isfinite(values).all()):
+        raise ValueError("The positions and values of the netlist's components should be finite.")
+    if nb_components and (geometry_indices.min() < 0 or geometry_indices.max() >= len(netlist["geometries"])):
+        raise ValueError("The netlist's components refer to geometries which are not in its table.")
+    unknown_types = set(types) - set(COMPONENT_TYPES)
+    if unknown_types:
+        raise ValueError(f"Unknown component types {sorted(unknown_types)}.")
+
+    geometries = [_build_geometry(description) for description in netlist["geometries"]]
+    components = [
+        COMPONENT_TYPES[component_type](
+            tuple(start_position), tuple(stop_position), *geometries[geometry_index], value, label
+        )
+        for component_type, start_position, stop_position, value, geometry_index, label in zip(
+            types, start_positions.tolist(), stop_positions.tolist(), values.tolist(), geometry_indices.tolist(), labels
+        )
+    ]
+
+    return Circuit(components, tuple(netlist["ground_position"]), netlist["increment_size"])
+
+
+def _dump(document: dict, path: str):
+    if path.endswith(MSGPACK_EXTENSIONS):
+        if msgpack is None:
+            raise ImportError(f"msgpack is required to save the netlist {path}. Save it as JSON instead.")
+        with open(path, "wb") as file:
+            file.write(msgpack.packb(document, use_bin_type=True))
+    else:
+        with open(path, "w") as file:
+            json.dump(document, file, separators=(",", ":"))
+
+
+def _load(path: str) -> dict:
+    if path.endswith(MSGPACK_EXTENSIONS):
+        if msgpack is None:
+            raise ImportError(f"msgpack is required to load the netlist {path}.")
+        with open(path, "rb") as file:
+            return msgpack.unpackb(file.read(), raw=False)
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_netlist(circuit: Circuit, path: str, labels: bool = False):
+    """
+    Saves the netlist of a circuit, as msgpack if the path ends with .msgpack or .mpk, and as JSON otherwise.
+    """
+    _dump(circuit_to_netlist(circuit, labels), path)
+
+
+def save_netlists(circuits: List[Circuit], path: str, labels: bool = False):
+    """
+    Saves the netlists of many circuits in a single file, as msgpack if the path ends with .msgpack or .mpk, and as
+    JSON otherwise.
+    """
+    _dump({"version": NETLIST_VERSION, "circuits": [circuit_to_netlist(circuit, labels) for circuit in circuits]}, path)
+
+
+def load_netlist(path: str) -> Circuit:
+    """
+    Circuit of a netlist saved by save_netlist.
+    """
+    document = _load(path)
+    if "circuits" in document:
+        raise ValueError(f"{path} holds {len(document['circuits'])} circuits. Load it with load_netlists.")
+    return circuit_from_netlist(document)
+
+
+def load_netlists(path: str) -> List[Circuit]:
+    """
+    Circuits of a file saved by save_netlists, or by save_netlist.
+    """
+    document = _load(path)
+    if "circuits" not in document:
+        return [circuit_from_netlist(document)]
+    if document.get("version") != NETLIST_VERSION:
+        raise ValueError(f"Unsupported netlist version {document.get('version')}. Expected {NETLIST_VERSION}.")
+    return [circuit_from_netlist(netlist) for netlist in document["circuits"]]
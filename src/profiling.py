@@ -0,0 +1,257 @@
+from contextlib import contextmanager, nullcontext
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Iterator, List, Optional
+
+
+class StageProfile:
+    """
+    The measures of one stage of a computation, e.g. the relaxation of the potential.
+    """
+
+    def __init__(self, name: str, start: float):
+        self.name = name
+        self.start = start
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.peak_bytes: Optional[int] = None
+        self.iterations: Optional[int] = None
+        self.first_iteration = 0
+        self.residuals: List[tuple] = []
+        self.depth = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": self.start,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "peak_bytes": self.peak_bytes,
+            "iterations": self.iterations,
+            "first_iteration": self.first_iteration,
+            "residuals": [list(residual) for residual in self.residuals],
+            "depth": self.depth
+        }
+
+
+class Profiler:
+    """
+    A profiler of the stages of the computation of a world : rasterization, Kirchhoff solve, Laplace relaxation,
+    gradient, Biot–Savart and cross product. Each stage records its wall time, CPU time and peak allocation, and the
+    relaxation records its number of iterations and the history of its residual. Profiling is off by default : it is
+    enabled by giving a profiler to the World, and the stages then run in profiler.stage contexts.
+
+    The report can be exported as JSON, as cProfile statistics readable by pstats or snakeviz, and as a Chrome trace
+    readable by chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, trace_memory: bool = True, residual_interval: int = 10, cprofile: bool = False):
+        """
+        Profiler constructor.
+
+        Parameters
+        ----------
+        trace_memory : bool
+            Whether the peak allocation of each stage is traced with tracemalloc. Tracing slows the pure Python loops
+            down, e.g. the relaxation in polar coordinates (default = True).
+        residual_interval : int
+            Number of relaxation iterations between two records of the residual, i.e. the largest change of the
+            potential during an iteration. Each record costs about one iteration. No residual is recorded if it is 0
+            (default = 10).
+        cprofile : bool
+            Whether the stages are also profiled function by function with cProfile (default = False).
+        """
+        if residual_interval < 0:
+            raise ValueError(f"The residual interval should be positive or null. Received {residual_interval}.")
+
+        self._trace_memory = trace_memory
+        self._residual_interval = residual_interval
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._stages: List[StageProfile] = []
+        self._open_stages: List[StageProfile] = []
+        self._observed_peaks: List[int] = []
+        self._origin = time.perf_counter()
+
+    @property
+    def stages(self) -> List[StageProfile]:
+        """
+        The profiles of the finished stages, in the order in which they started.
+        """
+        return sorted(self._stages, key=lambda stage: stage.start)
+
+    @property
+    def residual_interval(self) -> int:
+        return self._residual_interval
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageProfile]:
+        """
+        Context in which a stage of the computation runs. The stages can be nested, e.g. the relaxation within the
+        computation of a world.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage.
+
+        Yields
+        ------
+        stage : StageProfile
+            The profile of the stage, which is completed when the context exits.
+        """
+        stage = StageProfile(name, time.perf_counter() - self._origin)
+        stage.depth = len(self._open_stages)
+
+        started_tracing = False
+        if self._trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            # le pic de tracemalloc est global, on garde celui des étapes englobantes avant de le remettre à zéro
+            current, peak = tracemalloc.get_traced_memory()
+            self._observed_peaks = [max(observed, peak) for observed in self._observed_peaks]
+            tracemalloc.reset_peak()
+            self._observed_peaks.append(current)
+            memory_at_start = current
+
+        if self._cprofile is not None and not self._open_stages:
+            self._cprofile.enable()
+
+        self._open_stages.append(stage)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.wall_time = time.perf_counter() - wall_start
+            stage.cpu_time = time.process_time() - cpu_start
+            self._open_stages.pop()
+
+            if self._cprofile is not None and not self._open_stages:
+                self._cprofile.disable()
+
+            if self._trace_memory:
+                peak = max(self._observed_peaks.pop(), tracemalloc.get_traced_memory()[1])
+                stage.peak_bytes = peak - memory_at_start
+                self._observed_peaks = [max(observed, peak) for observed in self._observed_peaks]
+                if started_tracing:
+                    tracemalloc.stop()
+
+            self._stages.append(stage)
+
+    def records_residual(self, iteration: int) -> bool:
+        """
+        Whether the residual of the given relaxation iteration, counted from 0, should be recorded.
+        """
+        return self._residual_interval > 0 and (iteration + 1) % self._residual_interval == 0
+
+    def record_iterations(self, nb_iterations: int, first_iteration: int = 0):
+        """
+        Records the number of iterations performed in the innermost running stage, after the first_iteration already
+        done, e.g. by a relaxation resumed from a checkpoint.
+        """
+        if self._open_stages:
+            self._open_stages[-1].iterations = nb_iterations
+            self._open_stages[-1].first_iteration = first_iteration
+
+    def record_residual(self, iteration: int, residual: float):
+        """
+        Records the residual of a relaxation iteration in the innermost running stage.
+        """
+        if self._open_stages:
+            self._open_stages[-1].residuals.append((iteration, residual))
+
+    def report(self) -> dict:
+        """
+        Structured report of the finished stages.
+
+        Returns
+        -------
+        report : dict
+            The stages' profiles and the total wall and CPU times of the outermost stages.
+        """
+        stages = self.stages
+        outermost = [stage for stage in stages if stage.depth == 0]
+        return {
+            "stages": [stage.as_dict() for stage in stages],
+            "wall_time": sum(stage.wall_time for stage in outermost),
+            "cpu_time": sum(stage.cpu_time for stage in outermost)
+        }
+
+    def summary(self) -> str:
+        """
+        Human-readable table of the finished stages.
+        """
+        lines = [f"{'stage':<28}{'wall (s)':>12}{'cpu (s)':>12}{'peak (MiB)':>12}{'iterations':>12}"]
+        for stage in self.stages:
+            peak = "" if stage.peak_bytes is None else f"{stage.peak_bytes / 2**20:.3f}"
+            iterations = "" if stage.iterations is None else str(stage.iterations)
+            lines.append(
+                f"{'  ' * stage.depth + stage.name:<28}{stage.wall_time:>12.4f}{stage.cpu_time:>12.4f}{peak:>12}"
+                f"{iterations:>12}"
+            )
+        return "\n".join(lines)
+
+    def save(self, path: str):
+        """
+        Writes the report as JSON.
+        """
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=4)
+
+    def to_chrome_trace(self, path: str):
+        """
+        Writes the stages as a Chrome trace, with one complete event per stage and the residuals as counter events.
+        """
+        process_id, thread_id = os.getpid(), threading.get_ident()
+        events = []
+        for stage in self.stages:
+            events.append({
+                "name": stage.name,
+                "ph": "X",
+                "ts": stage.start * 1e6,
+                "dur": stage.wall_time * 1e6,
+                "pid": process_id,
+                "tid": thread_id,
+                "args": {"cpu_time": stage.cpu_time, "peak_bytes": stage.peak_bytes, "iterations": stage.iterations}
+            })
+            # les résidus sont répartis uniformément sur la durée des itérations effectuées par l'étape
+            for iteration, residual in stage.residuals:
+                done = iteration - stage.first_iteration
+                events.append({
+                    "name": f"{stage.name} residual",
+                    "ph": "C",
+                    "ts": (stage.start + stage.wall_time * done / (stage.iterations or done)) * 1e6,
+                    "pid": process_id,
+                    "args": {"residual": residual}
+                })
+
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def stats(self) -> pstats.Stats:
+        """
+        cProfile statistics of the stages.
+        """
+        if self._cprofile is None:
+            raise ValueError("The profiler was created without cprofile=True.")
+        return pstats.Stats(self._cprofile)
+
+    def dump_stats(self, path: str):
+        """
+        Writes the cProfile statistics of the stages, readable by pstats.Stats(path) or snakeviz.
+        """
+        self.stats().dump_stats(path)
+
+
+def profile_stage(profiler: Optional[Profiler], name: str):
+    """
+    Context of a stage of the given profiler, or an empty context if profiling is off.
+    """
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name)
@@ -0,0 +1,126 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class Progress:
+    """
+    A progress report of a stage of a long computation, e.g. an iteration of the relaxation of the potential.
+    """
+
+    def __init__(self, stage: str, iteration: int, nb_iterations: int, residual: float = None):
+        """
+        Progress constructor.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage, e.g. "laplace" or "biot_savart".
+        iteration : int
+            Number of iterations, rows or blocks of the stage done so far.
+        nb_iterations : int
+            Total number of iterations, rows or blocks of the stage.
+        residual : float
+            Largest change of the potential during the last iteration of a relaxation, or None for the stages which are
+            not iterative (default = None).
+        """
+        self.stage = stage
+        self.iteration = iteration
+        self.nb_iterations = nb_iterations
+        self.residual = residual
+
+    def __repr__(self) -> str:
+        residual = "" if self.residual is None else f", residual={self.residual:.3g}"
+        return f"Progress({self.stage}, {self.iteration}/{self.nb_iterations}{residual})"
+
+    @property
+    def fraction(self) -> float:
+        """
+        Fraction of the stage done so far, between 0 and 1.
+        """
+        return self.iteration / self.nb_iterations if self.nb_iterations else 1.0
+
+
+ProgressCallback = Callable[[Progress], Any]
+
+
+class ComputationCancelled(Exception):
+    """
+    Raised when a computation is cancelled with its cancellation token. The exception keeps the partial result of the
+    cancelled stage, e.g. the potential after the iterations done so far, which can be used to warm-start a new run.
+    """
+
+    def __init__(self, stage: str, partial_result: Any = None, iteration: int = None):
+        steps = "" if iteration is None else f" after {iteration} steps"
+        super().__init__(f"The {stage} stage was cancelled{steps}.")
+        self.stage = stage
+        self.partial_result = partial_result
+        self.iteration = iteration
+
+
+class CancellationToken:
+    """
+    A token to cancel long computations cooperatively. The solvers check the token between their iterations, rows or
+    blocks and raise ComputationCancelled when it is cancelled. The token can be cancelled from another thread, e.g. by
+    a job scheduler, from a progress callback, e.g. to stop a relaxation early, or by a timeout to time-box a run.
+    """
+
+    def __init__(self, timeout: float = None):
+        """
+        Cancellation token constructor.
+
+        Parameters
+        ----------
+        timeout : float
+            Number of seconds after which the token is cancelled, counted from its construction. The token is only
+            cancelled explicitly if no timeout is given (default = None).
+        """
+        self._event = threading.Event()
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+
+    def cancel(self):
+        """
+        Cancels the computations which use the token.
+        """
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self._event.set()
+        return self._event.is_set()
+
+    def raise_if_cancelled(self, stage: str, partial_result: Callable[[], Any] = None, iteration: int = None):
+        """
+        Raises ComputationCancelled if the token is cancelled.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the running stage.
+        partial_result : Callable[[], Any]
+            Function which returns the partial result of the stage. It is only called if the token is cancelled
+            (default = None).
+        iteration : int
+            Number of iterations, rows or blocks of the stage done so far (default = None).
+        """
+        if self.cancelled:
+            raise ComputationCancelled(stage, None if partial_result is None else partial_result(), iteration)
+
+
+def report_progress(
+        progress: Optional[ProgressCallback],
+        cancellation_token: Optional[CancellationToken],
+        stage: str,
+        iteration: int,
+        nb_iterations: int,
+        partial_result: Callable[[], Any] = None
+):
+    """
+    Reports the progress of a stage which is not iterative, e.g. the rows of the Biot–Savart sum, and raises
+    ComputationCancelled if the cancellation token is cancelled.
+    """
+    if progress is not None:
+        progress(Progress(stage, iteration, nb_iterations))
+    if cancellation_token is not None:
+        cancellation_token.raise_if_cancelled(stage, partial_result, iteration)
@@ -0,0 +1,375 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+from typing import TYPE_CHECKING, Iterable, List, Tuple, Union
+import warnings
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+from src.fields import OutOfPlaneVectorField, ScalarField, VectorField
+
+
+class FieldRenderer:
+    """
+    A non-interactive renderer which writes figures of fields to files. It draws on the Agg backend without pyplot, so
+    it never opens a window or blocks, and it creates its figure and axes once and reuses them for every frame. When
+    consecutive scalar fields have the same shape, their image is only updated, not drawn again. The fields are
+    decimated before they are copied, so memory-mapped fields larger than the memory can be rendered.
+    """
+
+    # nombre de cellules par axe de la grille du stream plot à partir duquel la densité des lignes diminue
+    STREAM_DENSITY_RESOLUTION = 128
+
+    def __init__(self, figsize: Tuple[float, float] = (8, 8), dpi: int = 100, max_resolution: int = 256):
+        """
+        Field renderer constructor.
+
+        Parameters
+        ----------
+        figsize : Tuple[float, float]
+            Size of the figure in inches (default = (8, 8)).
+        dpi : int
+            Resolution of the written images in dots per inch (default = 100).
+        max_resolution : int
+            Maximum number of points of the stream plots' grid along each axis. Larger vector fields are decimated, and
+            the density of the stream lines decreases with the resolution, so the rendering time stays bounded
+            (default = 256).
+        """
+        self._dpi = dpi
+        self._max_resolution = max_resolution
+
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self._figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self._figure)
+        self._axes = self._figure.add_axes((0.1, 0.1, 0.7, 0.8))
+        self._colorbar_axes = self._figure.add_axes((0.85, 0.1, 0.03, 0.8))
+        self._image = None
+        self._image_shape = None
+        self._colorbar = None
+
+    @property
+    def figure(self) -> "Figure":
+        return self._figure
+
+    def render(
+            self,
+            field: Union[ScalarField, VectorField, OutOfPlaneVectorField],
+            path: str,
+            format: str = None,
+            **kwargs
+    ) -> str:
+        """
+        Render a field to a file. Scalar fields and the z component of out-of-plane vector fields are drawn as images,
+        and vector fields as stream plots.
+
+        Parameters
+        ----------
+        field : Union[ScalarField, VectorField, OutOfPlaneVectorField]
+            The field to render.
+        path : str
+            Path of the written file.
+        format : str
+            Format of the file, e.g. "png", "svg" or "pdf". It is deduced from the path's extension when it is not
+            given (default = None).
+        **kwargs
+            Arbitrary keyword arguments to customize the figure, as for the fields' show methods : x_label, y_label,
+            title, and for vector fields, mask. The mask hides its non-null cells, and only its cells on the decimated
+            grid of the stream plot are read, so it can be a memory-mapped field.
+
+        Returns
+        -------
+        path : str
+            Path of the written file.
+        """
+        if isinstance(field, OutOfPlaneVectorField):
+            self._draw_scalar_field(field.z)
+        elif isinstance(field, VectorField):
+            self._draw_vector_field(field, kwargs.get("mask"))
+        else:
+            self._draw_scalar_field(field)
+
+        self._axes.set_xlabel(xlabel=kwargs.get("x_label", "x"))
+        self._axes.set_ylabel(ylabel=kwargs.get("y_label", "y"))
+        self._axes.set_title(label=kwargs.get("title", ""))
+
+        self._figure.savefig(path, format=format, dpi=self._dpi)
+        return path
+
+    def _reset(self):
+        self._axes.clear()
+        self._colorbar_axes.clear()
+        self._image = None
+        self._image_shape = None
+        self._colorbar = None
+
+    def _get_image_steps(self, shape: Tuple[int, int]) -> List[int]:
+        """
+        Decimation steps of a scalar field along each axis, so its image has at most one cell per pixel of the axes.
+        """
+        position = self._axes.get_position()
+        pixels = (position.width * self._figure.get_figwidth() * self._dpi,
+                  position.height * self._figure.get_figheight() * self._dpi)
+        return [max(1, -(-n // max(1, int(p)))) for n, p in zip(shape, pixels)]
+
+    def _draw_scalar_field(self, field: ScalarField):
+        # on sous-échantillonne le champ avant de le copier, e.g. un champ projeté en mémoire n'est pas lu en entier
+        steps = self._get_image_steps(field.shape[:2])
+        values = np.array(field[::steps[0], ::steps[1]]).T
+
+        if self._image is not None and self._image_shape == field.shape[:2]:
+            # on met seulement l'image à jour, les axes et la barre de couleur sont réutilisés
+            self._image.set_data(values)
+            self._image.set_clim(np.nanmin(values), np.nanmax(values))
+            self._colorbar.update_normal(self._image)
+            return
+
+        self._reset()
+        # les axes gardent les indices de la grille complète
+        extent = (-0.5, values.shape[1] * steps[0] - 0.5, -0.5, values.shape[0] * steps[1] - 0.5)
+        self._image = self._axes.imshow(values, origin="lower", extent=extent)
+        self._image_shape = field.shape[:2]
+        self._colorbar = self._figure.colorbar(self._image, cax=self._colorbar_axes, orientation='vertical')
+
+    def _draw_vector_field(self, field: VectorField, mask: np.ndarray = None):
+        import matplotlib
+
+        self._reset()
+
+        # on sous-échantillonne le champ avant de le copier, puis on cache les cellules masquées
+        steps = [-(-n // self._max_resolution) for n in field.shape[:2]]
+        values = np.array(field[::steps[0], ::steps[1], :2])
+        if mask is not None:
+            values[np.asarray(mask[::steps[0], ::steps[1]], dtype=bool)] = np.nan
+        u, v = values[..., 0].T, values[..., 1].T
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            color = 2 * np.log(np.hypot(u, v))
+
+        # la densité diminue avec la résolution pour borner le nombre de pas d'intégration des lignes
+        density = 3 * min(1.0, (self.STREAM_DENSITY_RESOLUTION / max(values.shape[:2])) ** 0.5)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter(action="ignore", category=UserWarning)
+
+            stream_plot = self._axes.streamplot(
+                x=np.arange(0, field.shape[0], steps[0]),
+                y=np.arange(0, field.shape[1], steps[1]),
+                u=u,
+                v=v,
+                color=color,
+                linewidth=1,
+                cmap=matplotlib.colormaps["inferno"],
+                density=density,
+                arrowstyle='->',
+                arrowsize=1.5
+            )
+
+        self._colorbar = self._figure.colorbar(stream_plot.lines, cax=self._colorbar_axes, orientation='vertical')
+
+
+class FieldAnimation:
+    """
+    An animation of scalar fields, e.g. the potential and the norm of the electric field during a sweep of a component's
+    voltage. The figure has one image per field, created with the first frame. The next frames only update the images'
+    data and color limits in place, so no artist is created again. The frames are streamed to a PNG sequence, or encoded
+    to an animated GIF with Pillow when the animation is closed, so ffmpeg is not needed.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            titles: List[str],
+            format: str = None,
+            fps: float = 10,
+            figsize: Tuple[float, float] = None,
+            dpi: int = 100
+    ):
+        """
+        Field animation constructor.
+
+        Parameters
+        ----------
+        path : str
+            Path of the GIF file, or directory of the PNG sequence.
+        titles : List[str]
+            Title of each animated field.
+        format : str
+            Either "gif" or "png". It is "gif" when the path ends with .gif and "png" otherwise (default = None).
+        fps : float
+            Number of frames per second when the GIF is played (default = 10).
+        figsize : Tuple[float, float]
+            Size of the figure in inches. Each field uses a 6 x 5 inches panel when it is not given (default = None).
+        dpi : int
+            Resolution of the frames in dots per inch (default = 100).
+        """
+        if format is None:
+            format = "gif" if path.lower().endswith(".gif") else "png"
+        if format not in ("gif", "png"):
+            raise ValueError(f"The animation's format should be 'gif' or 'png'. Received {format}.")
+
+        self._path = path
+        self._titles = titles
+        self._format = format
+        self._fps = fps
+        self._dpi = dpi
+
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self._figure = Figure(figsize=figsize or (6 * len(titles), 5))
+        FigureCanvasAgg(self._figure)
+        self._axes = [self._figure.add_subplot(1, len(titles), i + 1) for i in range(len(titles))]
+        self._images = []
+        self._colorbars = []
+        self._title = self._figure.suptitle("")
+
+        self._frames = []
+        self._nb_frames = 0
+        self._rendering_time = 0.0
+
+        if format == "png":
+            os.makedirs(path, exist_ok=True)
+
+    def __enter__(self) -> "FieldAnimation":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def nb_frames(self) -> int:
+        return self._nb_frames
+
+    @property
+    def frames_per_second(self) -> float:
+        """
+        Throughput of the animation, i.e. the number of frames drawn and written per second.
+        """
+        return self._nb_frames / self._rendering_time if self._rendering_time else 0.0
+
+    def add_frame(self, fields: List[ScalarField], title: str = ""):
+        """
+        Draw a frame of the animation and write it, or keep it for the GIF.
+
+        Parameters
+        ----------
+        fields : List[ScalarField]
+            The fields of the frame, in the same order as the titles.
+        title : str
+            Title of the frame, e.g. the value of the swept parameter (default = "").
+        """
+        if len(fields) != len(self._titles):
+            raise ValueError(f"The frame should have {len(self._titles)} fields. Received {len(fields)}.")
+
+        start = time.perf_counter()
+
+        for i, field in enumerate(fields):
+            values = np.asarray(field).T
+            if i < len(self._images):
+                # on met seulement les données et les limites de couleur à jour
+                self._images[i].set_data(values)
+                self._images[i].set_clim(np.nanmin(values), np.nanmax(values))
+                self._colorbars[i].update_normal(self._images[i])
+            else:
+                self._images.append(self._axes[i].imshow(values, origin="lower"))
+                self._colorbars.append(self._figure.colorbar(self._images[i], ax=self._axes[i]))
+                self._axes[i].set_title(self._titles[i])
+                self._axes[i].set_xlabel("x")
+                self._axes[i].set_ylabel("y")
+        self._title.set_text(title)
+
+        if self._format == "png":
+            self._figure.savefig(os.path.join(self._path, f"frame_{self._nb_frames:05d}.png"), dpi=self._dpi)
+        else:
+            from PIL import Image
+
+            self._figure.set_dpi(self._dpi)
+            self._figure.canvas.draw()
+            frame = Image.fromarray(np.asarray(self._figure.canvas.buffer_rgba())[..., :3])
+            # les images de la GIF sont gardées en palette, soit un octet par pixel
+            self._frames.append(frame.quantize())
+
+        self._nb_frames += 1
+        self._rendering_time += time.perf_counter() - start
+
+    def close(self):
+        """
+        Write the GIF file. A PNG sequence is already written frame by frame.
+        """
+        if self._format == "gif" and self._frames:
+            start = time.perf_counter()
+            self._frames[0].save(
+                self._path, save_all=True, append_images=self._frames[1:], duration=1000 / self._fps, loop=0
+            )
+            self._rendering_time += time.perf_counter() - start
+            self._frames = []
+
+
+_worker_renderer = None
+
+
+def _initialize_worker(renderer_parameters: dict):
+    global _worker_renderer
+    _worker_renderer = FieldRenderer(**renderer_parameters)
+
+
+def _render_world(world, directory: str, format: str, fields: List[str]) -> List[str]:
+    from src.world import World
+
+    if isinstance(world, str):
+        world = World.load(world)
+    return world.render(directory, format=format, fields=fields, renderer=_worker_renderer)
+
+
+def render_worlds(
+        worlds: Iterable,
+        directories: Iterable[str],
+        format: str = "png",
+        fields: List[str] = None,
+        processes: int = None,
+        **renderer_parameters
+) -> List[List[str]]:
+    """
+    Render the fields of many worlds in parallel worker processes. Each worker creates one FieldRenderer and reuses it
+    for all the worlds it renders.
+
+    Parameters
+    ----------
+    worlds : Iterable
+        The worlds to render, either World objects or directories of worlds saved with World.save. Saved worlds are
+        recommended, since the workers then memory-map their fields instead of receiving copies.
+    directories : Iterable[str]
+        Directory in which the figures of each world are written.
+    format : str
+        Format of the files (default = "png").
+    fields : List[str]
+        Names of the fields to render, see World.render (default = None).
+    processes : int
+        Number of worker processes. Uses the number of CPUs when it is not given (default = None).
+    **renderer_parameters
+        Parameters given to the FieldRenderer of each worker, e.g. dpi.
+
+    Returns
+    -------
+    paths : List[List[str]]
+        The paths of the files written for each world.
+    """
+    worlds, directories = list(worlds), list(directories)
+    if len(worlds) != len(directories):
+        raise ValueError(f"Received {len(worlds)} worlds but {len(directories)} directories.")
+
+    with ProcessPoolExecutor(
+            max_workers=processes or os.cpu_count(),
+            initializer=_initialize_worker,
+            initargs=(renderer_parameters,)
+    ) as executor:
+        futures = [
+            executor.submit(_render_world, world, directory, format, fields)
+            for world, directory in zip(worlds, directories)
+        ]
+        return [future.result() for future in futures]
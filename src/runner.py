@@ -0,0 +1,444 @@
+"""
+Runner of many world computations on a local pool of worker processes. The jobs are read from a JSON manifest, or from
+all the JSON manifests of a directory, e.g.
+
+    [
+        {"name": "a", "circuit": "circuits.py:circuit_a", "arguments": {"size": 101}, "shape": [101, 101]},
+        {"name": "d", "circuit": "circuits.py:circuit_d_polar", "arguments": {"size": 51}, "shape": [51, 51],
+         "coordinate_system": "POLAR", "nb_relaxation_iterations": 200}
+    ]
+
+where "circuit" is a function which returns a Circuit, given as "file.py:function", relative to the manifest, or as
+"package.module:function", or a netlist file saved by src.netlist.save_netlist, e.g. "circuits/a.json". Run it from
+the repository root with
+
+    python -m src.runner manifest.json --output results
+"""
+import argparse
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, List, Union
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module, the workers' memory is then not limited.
+    resource = None
+
+import numpy as np
+
+from src.circuit import Circuit
+from src.coordinate_and_position import CoordinateSystem
+from src.netlist import MSGPACK_EXTENSIONS, load_netlist
+
+
+# ProcessPoolExecutor ne remplace lui-même ses workers qu'à partir de Python 3.11, avant le pool est recréé
+_POOL_REPLACES_WORKERS = sys.version_info >= (3, 11)
+
+
+def _is_netlist(circuit: str) -> bool:
+    return circuit.endswith((".json",) + MSGPACK_EXTENSIONS)
+
+
+class Job:
+    """
+    A world computation : a circuit built by a function or loaded from a netlist, placed in a world and computed.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            circuit: str,
+            shape: List[int],
+            arguments: dict = None,
+            coordinate_system: str = "CARTESIAN",
+            nb_relaxation_iterations: int = 1000,
+            dtype: str = "float64"
+    ):
+        """
+        Job constructor.
+
+        Parameters
+        ----------
+        name : str
+            Name of the job.
+        circuit : str
+            Function which returns the job's circuit, as "path/to/file.py:function" or "package.module:function", or
+            path of the netlist of the job's circuit.
+        shape : List[int]
+            Shape of the world.
+        arguments : dict
+            Keyword arguments given to the circuit's function (default = None).
+        coordinate_system : str
+            Name of the world's coordinate system (default = "CARTESIAN").
+        nb_relaxation_iterations : int
+            Number of iterations of the relaxation of the potential (default = 1000).
+        dtype : str
+            Floating-point type of the world's fields (default = "float64").
+        """
+        if ":" not in circuit and not _is_netlist(circuit):
+            raise ValueError(f"The job's circuit should be given as 'file.py:function', 'module:function' or as a "
+                             f"netlist file. Received {circuit}.")
+
+        self.name = name
+        self.circuit = circuit
+        self.shape = tuple(shape)
+        self.arguments = arguments or {}
+        self.coordinate_system = CoordinateSystem[coordinate_system].name
+        self.nb_relaxation_iterations = nb_relaxation_iterations
+        self.dtype = np.dtype(dtype).name
+
+    @classmethod
+    def from_dict(cls, description: dict, directory: str = ".") -> "Job":
+        """
+        Job of a manifest's entry. A circuit file is resolved relative to the manifest's directory.
+        """
+        description = dict(description)
+        if _is_netlist(description["circuit"]):
+            description["circuit"] = os.path.abspath(os.path.join(directory, description["circuit"]))
+            return cls(**description)
+        source, function = description["circuit"].rsplit(":", 1)
+        if source.endswith(".py"):
+            description["circuit"] = f"{os.path.abspath(os.path.join(directory, source))}:{function}"
+        return cls(**description)
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "circuit": self.circuit,
+            "shape": list(self.shape),
+            "arguments": self.arguments,
+            "coordinate_system": self.coordinate_system,
+            "nb_relaxation_iterations": self.nb_relaxation_iterations,
+            "dtype": self.dtype
+        }
+
+    @property
+    def key(self) -> str:
+        """
+        Stable key of the job, which does not depend on its name. The content of a circuit file is part of the key, so
+        a job is computed again if its circuit file changes.
+        """
+        description = self.as_dict()
+        del description["name"]
+
+        digest = hashlib.sha256(json.dumps(description, sort_keys=True).encode())
+        source = self.circuit if _is_netlist(self.circuit) else self.circuit.rsplit(":", 1)[0]
+        if source.endswith(".py") or _is_netlist(source):
+            with open(source, "rb") as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    def _get_circuit_function(self) -> Callable[..., Circuit]:
+        source, function = self.circuit.rsplit(":", 1)
+        if source.endswith(".py"):
+            module_name = f"_circuit_{hashlib.sha256(source.encode()).hexdigest()[:16]}"
+            module = sys.modules.get(module_name)
+            if module is None:
+                specification = importlib.util.spec_from_file_location(module_name, source)
+                module = importlib.util.module_from_spec(specification)
+                specification.loader.exec_module(module)
+                sys.modules[module_name] = module
+        else:
+            module = importlib.import_module(source)
+        return getattr(module, function)
+
+    def build_circuit(self) -> Circuit:
+        if _is_netlist(self.circuit):
+            return load_netlist(self.circuit)
+        return self._get_circuit_function()(**self.arguments)
+
+
+def load_jobs(path: str) -> List[Job]:
+    """
+    Jobs of a JSON manifest, which holds one job or a list of jobs, or of all the manifests of a directory. The
+    netlists of a directory are not manifests and are skipped.
+    """
+    if os.path.isdir(path):
+        return [job for name in sorted(os.listdir(path)) if name.endswith(".json")
+                for job in load_jobs(os.path.join(path, name))]
+
+    with open(path) as file:
+        descriptions = json.load(file)
+    if isinstance(descriptions, dict) and ("components" in descriptions or "circuits" in descriptions):
+        return []
+    if isinstance(descriptions, dict):
+        descriptions = [descriptions]
+    return [Job.from_dict(description, os.path.dirname(os.path.abspath(path))) for description in descriptions]
+
+
+def _initialize_worker(memory_limit: int = None):
+    if memory_limit is not None and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _run_job(job: Job, worlds_directory: str, cache_directory: str = None) -> dict:
+    """
+    Builds and computes the job's world in a worker process, then saves it in the directory of the job's key.
+    """
+    from src.world import World
+    from src.world_cache import WorldCache
+
+    start = time.perf_counter()
+    world = World(job.build_circuit(), CoordinateSystem[job.coordinate_system], job.shape, dtype=job.dtype)
+    world.compute(job.nb_relaxation_iterations, cache=None if cache_directory is None else WorldCache(cache_directory))
+
+    # le monde est écrit dans un dossier temporaire puis renommé, un dossier de résultat est donc toujours complet
+    path = os.path.join(worlds_directory, job.key)
+    temporary_path = f"{path}.tmp-{uuid.uuid4().hex}"
+    world.save(temporary_path)
+    try:
+        os.rename(temporary_path, path)
+    except OSError:
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        if not os.path.isdir(path):
+            raise
+
+    return {"seconds": time.perf_counter() - start}
+
+
+class JobRunner:
+    """
+    A runner of world computations on a local pool of worker processes. Identical jobs, i.e. jobs with the same key,
+    are computed once. Each computed world is saved as soon as it is done, in the directory "worlds/<key>" of the
+    output directory, and each finished job is appended to the file "results.jsonl", so an interrupted run can be
+    started again and only the jobs which are not done are computed. Failed jobs are retried. When a worker process
+    dies, e.g. killed by the system, the jobs which were running are run again one at a time, so only the job which
+    killed its worker is counted as failed.
+
+    By default, there is one worker per CPU. The workers are replaced after a number of jobs, so the memory they hold
+    does not grow, and their address space can be limited. Before Python 3.11, whose process pools cannot replace
+    their workers, the whole pool is replaced once it has run this number of jobs per worker.
+    """
+
+    RESULTS_FILENAME = "results.jsonl"
+    WORLDS_DIRECTORY = "worlds"
+
+    def __init__(
+            self,
+            output_directory: str,
+            processes: int = None,
+            max_retries: int = 2,
+            max_tasks_per_child: int = 10,
+            memory_limit: int = None,
+            cache_directory: str = None
+    ):
+        """
+        Job runner constructor.
+
+        Parameters
+        ----------
+        output_directory : str
+            Directory in which the worlds and the results are written. It is created if it does not exist.
+        processes : int
+            Number of worker processes. Uses the number of CPUs when it is not given (default = None).
+        max_retries : int
+            Number of times a failed job is run again (default = 2).
+        max_tasks_per_child : int
+            Number of jobs after which a worker process is replaced by a new one. Before Python 3.11, the pool of
+            workers is replaced after this number of jobs per worker (default = 10).
+        memory_limit : int
+            Maximum address space, in bytes, of each worker process. A job which exceeds it fails with a MemoryError
+            and is retried. Not limited when it is not given or on Windows (default = None).
+        cache_directory : str
+            Directory of a WorldCache shared by the workers (default = None).
+        """
+        if max_retries < 0:
+            raise ValueError(f"The number of retries should be positive or null. Received {max_retries}.")
+
+        self._output_directory = output_directory
+        self._processes = processes or os.cpu_count()
+        self._max_retries = max_retries
+        self._max_tasks_per_child = max_tasks_per_child
+        self._memory_limit = memory_limit
+        self._cache_directory = cache_directory
+
+        os.makedirs(os.path.join(output_directory, self.WORLDS_DIRECTORY), exist_ok=True)
+
+    @property
+    def results_path(self) -> str:
+        return os.path.join(self._output_directory, self.RESULTS_FILENAME)
+
+    def world_path(self, job: Job) -> str:
+        """
+        Directory of the computed world of a job, which can be loaded with World.load.
+        """
+        return os.path.join(self._output_directory, self.WORLDS_DIRECTORY, job.key)
+
+    def _read_done_keys(self) -> set:
+        done_keys = set()
+        if os.path.exists(self.results_path):
+            with open(self.results_path) as file:
+                for line in file:
+                    try:
+                        result = json.loads(line)
+                    except json.JSONDecodeError:
+                        # la dernière ligne peut être incomplète si le processus a été interrompu
+                        continue
+                    if result["status"] == "done":
+                        done_keys.add(result["key"])
+        return {key for key in done_keys if os.path.isdir(os.path.join(self._output_directory,
+                                                                        self.WORLDS_DIRECTORY, key))}
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        options = {"max_tasks_per_child": self._max_tasks_per_child} if _POOL_REPLACES_WORKERS else {}
+        return ProcessPoolExecutor(
+            max_workers=self._processes,
+            initializer=_initialize_worker,
+            initargs=(self._memory_limit,),
+            **options
+        )
+
+    def _is_executor_used_up(self, nb_submitted: int) -> bool:
+        """
+        Whether the pool has run its number of jobs and must be replaced to replace its workers, before Python 3.11.
+        """
+        return (not _POOL_REPLACES_WORKERS and self._max_tasks_per_child is not None
+                and nb_submitted >= self._max_tasks_per_child * self._processes)
+
+    def run(self, jobs: List[Job], log: Callable[[str], None] = None) -> List[dict]:
+        """
+        Runs the jobs which are not done yet.
+
+        Parameters
+        ----------
+        jobs : List[Job]
+            The jobs to run.
+        log : Callable[[str], None]
+            Function called with a message when a job finishes, e.g. print (default = None).
+
+        Returns
+        -------
+        results : List[dict]
+            The result of each job, in the order of the jobs : its name, its key, its status ("done", "skipped" if it
+            was done by a previous run, or "failed"), its number of attempts, its computation time and its error.
+        """
+        jobs_by_key: Dict[str, List[Job]] = {}
+        for job in jobs:
+            jobs_by_key.setdefault(job.key, []).append(job)
+
+        done_keys = self._read_done_keys()
+        results = {key: {"status": "skipped", "attempts": 0} for key in jobs_by_key if key in done_keys}
+        pending = deque((key, 1) for key in jobs_by_key if key not in done_keys)
+        worlds_directory = os.path.join(self._output_directory, self.WORLDS_DIRECTORY)
+
+        executor = self._create_executor()
+        nb_submitted = 0
+        running = {}
+        # jobs en cours lors de la mort d'un worker, ils sont relancés un par un pour trouver celui qui l'a causée
+        suspects = deque()
+        try:
+            with open(self.results_path, "a") as results_file:
+                while pending or suspects or running:
+                    if self._is_executor_used_up(nb_submitted) and not running:
+                        # le pool usé est recréé une fois ses jobs terminés, avec de nouveaux workers
+                        executor.shutdown(wait=True)
+                        executor = self._create_executor()
+                        nb_submitted = 0
+
+                    if suspects:
+                        if not running:
+                            key, attempt = suspects.popleft()
+                            future = executor.submit(
+                                _run_job, jobs_by_key[key][0], worlds_directory, self._cache_directory
+                            )
+                            running[future] = (key, attempt, True)
+                            nb_submitted += 1
+                    else:
+                        # on garde au plus deux jobs par worker en attente, pour que le parent reste léger
+                        while (pending and len(running) < 2 * self._processes
+                               and not self._is_executor_used_up(nb_submitted)):
+                            key, attempt = pending.popleft()
+                            future = executor.submit(
+                                _run_job, jobs_by_key[key][0], worlds_directory, self._cache_directory
+                            )
+                            running[future] = (key, attempt, False)
+                            nb_submitted += 1
+
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    broken = False
+                    for future in finished:
+                        key, attempt, isolated = running.pop(future)
+                        try:
+                            result = {"status": "done", **future.result()}
+                        except BrokenProcessPool as error:
+                            broken = True
+                            if not isolated:
+                                suspects.append((key, attempt))
+                                continue
+                            if attempt <= self._max_retries:
+                                suspects.append((key, attempt + 1))
+                                continue
+                            result = {"status": "failed", "error": f"The worker process died. {error}"}
+                        except Exception as error:
+                            if attempt <= self._max_retries:
+                                pending.append((key, attempt + 1))
+                                continue
+                            result = {"status": "failed",
+                                      "error": "".join(traceback.format_exception_only(type(error), error)).strip()}
+
+                        result["attempts"] = attempt
+                        results[key] = result
+                        for job in jobs_by_key[key]:
+                            results_file.write(json.dumps({"name": job.name, "key": key, **result}) + "\n")
+                            if log is not None:
+                                log(f"{job.name}: {result['status']} after {attempt} attempt(s)")
+                        results_file.flush()
+
+                    if broken:
+                        # les autres jobs en cours sont perdus avec le pool, qui doit être recréé
+                        suspects.extend((key, attempt) for key, attempt, _ in running.values())
+                        running.clear()
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        executor = self._create_executor()
+                        nb_submitted = 0
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return [{"name": job.name, "key": job.key, **results[job.key]} for job in jobs]
+
+
+def _parse_size(size: str) -> int:
+    units = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+    if size[-1].upper() in units:
+        return int(float(size[:-1]) * units[size[-1].upper()])
+    return int(size)
+
+
+def main(arguments: Union[List[str], None] = None):
+    parser = argparse.ArgumentParser(description="Runs world computations on a local pool of worker processes.")
+    parser.add_argument("manifest", help="JSON manifest of jobs, or directory of JSON manifests.")
+    parser.add_argument("--output", required=True, help="Directory of the computed worlds and of the results.")
+    parser.add_argument("--processes", type=int, help="Number of worker processes (default = number of CPUs).")
+    parser.add_argument("--retries", type=int, default=2, help="Number of retries of a failed job (default = 2).")
+    parser.add_argument("--max-tasks-per-child", type=int, default=10,
+                        help="Number of jobs after which a worker is replaced (default = 10).")
+    parser.add_argument("--memory-limit", type=_parse_size,
+                        help="Maximum address space of each worker, e.g. 4G (default = not limited).")
+    parser.add_argument("--cache", help="Directory of a world cache shared by the workers.")
+    arguments = parser.parse_args(arguments)
+
+    runner = JobRunner(
+        arguments.output, arguments.processes, arguments.retries, arguments.max_tasks_per_child,
+        arguments.memory_limit, arguments.cache
+    )
+    results = runner.run(load_jobs(arguments.manifest), log=print)
+
+    failed = [result for result in results if result["status"] == "failed"]
+    print(f"{len(results) - len(failed)} job(s) done, {len(failed)} failed.")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+from typing import Iterator, Tuple, Type, Union
+
+import numpy as np
+
+from src.fields import OutOfPlaneVectorField, ScalarField, VectorField
+
+
+class TiledStorage:
+    """
+    Out-of-core storage for the fields of worlds larger than the memory. Each field is a memory-mapped .npy file of the
+    storage's directory, and the computations on the fields are done by tiles of rows small enough for the memory used
+    at once to stay within the storage's memory budget.
+    """
+
+    def __init__(self, directory: str, memory_budget: int = 512 * 2**20):
+        """
+        Tiled storage constructor.
+
+        Parameters
+        ----------
+        directory : str
+            Directory in which the fields' files are written. It is created if it does not exist.
+        memory_budget : int
+            Maximum memory, in bytes, used at once by the tiles of a computation (default = 512 MiB).
+        """
+        if memory_budget <= 0:
+            raise ValueError(f"The memory budget should be positive. Received {memory_budget}.")
+
+        self._directory = directory
+        self._memory_budget = memory_budget
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def memory_budget(self) -> int:
+        return self._memory_budget
+
+    def path(self, name: str) -> str:
+        """
+        Path of the file of the field with the given name.
+        """
+        return os.path.join(self._directory, f"{name}.npy")
+
+    def allocate(
+            self,
+            name: str,
+            shape: Tuple[int, ...],
+            dtype: np.dtype,
+            field_type: Type[Union[ScalarField, VectorField, OutOfPlaneVectorField]]
+    ) -> Union[ScalarField, VectorField, OutOfPlaneVectorField]:
+        """
+        Create a memory-mapped field filled with zeros.
+
+        Parameters
+        ----------
+        name : str
+            Name of the field, used as the name of its file.
+        shape : Tuple[int, ...]
+            Shape of the field.
+        dtype : np.dtype
+            Floating-point type of the field.
+        field_type : Type[Union[ScalarField, VectorField, OutOfPlaneVectorField]]
+            Type of the field.
+
+        Returns
+        -------
+        field : Union[ScalarField, VectorField, OutOfPlaneVectorField]
+            The field, backed by its file.
+        """
+        return field_type(np.lib.format.open_memmap(self.path(name), mode="w+", dtype=dtype, shape=shape))
+
+    def rename(self, name: str, new_name: str):
+        """
+        Rename the file of a field. The memory-mapped fields already opened stay valid.
+        """
+        os.replace(self.path(name), self.path(new_name))
+
+    def row_tiles(self, nb_rows: int, row_nbytes: int, nb_buffers: int = 1) -> Iterator[Tuple[int, int]]:
+        """
+        Split rows in tiles which fit in the memory budget.
+
+        Parameters
+        ----------
+        nb_rows : int
+            Number of rows to split.
+        row_nbytes : int
+            Size, in bytes, of a row.
+        nb_buffers : int
+            Number of buffers of the size of a tile used at once by the computation (default = 1).
+
+        Returns
+        -------
+        tiles : Iterator[Tuple[int, int]]
+            The (start, stop) indices of the rows of each tile.
+        """
+        rows_per_tile = max(1, self._memory_budget // max(1, row_nbytes * nb_buffers))
+        for start in range(0, nb_rows, rows_per_tile):
+            yield start, min(start + rows_per_tile, nb_rows)
+
+    def gradient(self, field: ScalarField, name: str, negative: bool = False) -> VectorField:
+        """
+        Gradient of a scalar field computed by tiles of rows, with one halo row on each side of a tile. The result is
+        the same as ScalarField.gradient.
+
+        Parameters
+        ----------
+        field : ScalarField
+            A scalar field.
+        name : str
+            Name of the gradient's field.
+        negative : bool
+            Whether to store the opposite of the gradient, e.g. for the electric field -∇P (default = False).
+
+        Returns
+        -------
+        gradient : VectorField
+            The memory-mapped vector field representing the gradient of the scalar field.
+        """
+        gradient = self.allocate(name, (field.shape[0], field.shape[1], 2), field.dtype, VectorField)
+        sign = -1 if negative else 1
+
+        for start, stop in self.row_tiles(field.shape[0], field.shape[1] * field.itemsize, nb_buffers=6):
+            halo_start, halo_stop = max(start - 1, 0), min(stop + 1, field.shape[0])
+            block = np.asarray(field[halo_start:halo_stop])
+            rows = slice(start - halo_start, stop - halo_start)
+
+            if block.shape[0] > 1:
+                gradient[start:stop, :, 0] = sign * np.gradient(block, axis=0)[rows]
+            gradient[start:stop, :, 1] = sign * np.gradient(block[rows], axis=1)
+
+        return gradient
+
+    def cross(self, field: VectorField, out_of_plane_field: OutOfPlaneVectorField, name: str) -> VectorField:
+        """
+        Cross product of a vector field F with an out-of-plane vector field (0, 0, G_z) computed by tiles of rows, i.e.
+        the in-plane vector field (F_y G_z, -F_x G_z).
+
+        Returns
+        -------
+        field : VectorField
+            The memory-mapped cross product.
+        """
+        cross = self.allocate(name, (field.shape[0], field.shape[1], 2), field.dtype, VectorField)
+
+        for start, stop in self.row_tiles(field.shape[0], field.shape[1] * field.itemsize, nb_buffers=6):
+            magnetic_tile = np.asarray(out_of_plane_field[start:stop])
+            cross[start:stop, :, 0] = field[start:stop, :, 1] * magnetic_tile
+            cross[start:stop, :, 1] = -field[start:stop, :, 0] * magnetic_tile
+
+        return cross
@@ -1,15 +1,27 @@
-from typing import Tuple, Union
+import asyncio
+from concurrent.futures import Executor
+import contextlib
+import functools
+import json
+import os
+from typing import AsyncIterator, List, Tuple, Union
 
 import numpy as np
-from scipy.constants import mu_0, pi
-import matplotlib.pyplot as plt
-from scipy import ndimage
 
 from src.biot_savart_equation_solver import BiotSavartEquationSolver
+from src.checkpoint import RelaxationCheckpoint
 from src.circuit import Circuit
 from src.coordinate_and_position import CoordinateSystem, Position
-from src.fields import VectorField
+from src.electrical_components import ElectricalComponent, VoltageSource, Wire
+from src.fields import OutOfPlaneVectorField, ScalarField, VectorField
+from src.grid import StretchedGrid
 from src.laplace_equation_solver import LaplaceEquationSolver
+from src.magnetic_field_cache import MagneticFieldCache
+from src.profiling import Profiler, profile_stage
+from src.progress import CancellationToken, ComputationCancelled, Progress, ProgressCallback, report_progress
+from src.rendering import FieldAnimation, FieldRenderer
+from src.tiling import TiledStorage
+from src.world_cache import WorldCache
 
 
 class World:
@@ -17,11 +29,34 @@ class World:
     A 2D world. We place an electric circuit in the world and observe the resulting electromagnetic fields.
     """
 
+    FIELDS = {
+        "circuit_voltage": ScalarField,
+        "circuit_current": VectorField,
+        "potential": ScalarField,
+        "electric_field": VectorField,
+        "magnetic_field": OutOfPlaneVectorField,
+        "energy_flux": VectorField
+    }
+    FIELD_TITLES = {
+        "circuit_voltage": "Initial voltage",
+        "potential": "Potential",
+        "electric_field": "Electric field",
+        "magnetic_field": "Magnetic field (z component)",
+        "energy_flux": "Energy flux"
+    }
+    FIELD_TYPES = {field_type.__name__: field_type for field_type in (ScalarField, VectorField, OutOfPlaneVectorField)}
+    METADATA_FILENAME = "metadata.json"
+
     def __init__(
             self,
             circuit: Circuit,
             coordinate_system: Union[CoordinateSystem, int],
-            shape: Tuple[int, int]
+            shape: Tuple[int, int],
+            magnetic_field_cache: MagneticFieldCache = None,
+            dtype: np.dtype = np.float64,
+            storage: TiledStorage = None,
+            grid: StretchedGrid = None,
+            profiler: Profiler = None
     ):
         """
         Solves the given circuit and builds the voltage scalar field (self._circuit_voltage) and the electric current
@@ -33,6 +68,27 @@ class World:
             Electrical circuit to place in the world.
         shape : Tuple[int, int]
             Two-dimensional tuple defining the size (x, y) of the world.
+        magnetic_field_cache : MagneticFieldCache
+            Cache of the components' unit-current magnetic fields. When given, the magnetic field is computed by
+            superposition of the cached fields, so solving the same layout with different currents never solves the
+            Biot–Savart equation again (default = None).
+        dtype : np.dtype
+            Floating-point type of the world's fields. Use np.float32 for visualization-grade runs, which halves the
+            memory and speeds up the solvers. The sums that need it are still accumulated in float64
+            (default = np.float64).
+        storage : TiledStorage
+            Storage used for worlds larger than the memory. The fields are then memory-mapped files of the storage and
+            they are computed by tiles which fit in the storage's memory budget. Only the cartesian coordinates system
+            is implemented by tiles, and the magnetic field cache is not used in this mode (default = None).
+        grid : StretchedGrid
+            Non-uniform grid of the world, e.g. StretchedGrid.around_components(circuit.components, ...), which is fine
+            near the electrical components and coarse far from them. Its shape must be the world's shape and it defines
+            the world's minimum and maximum positions. Only the cartesian coordinates system is implemented on
+            non-uniform grids, and not by tiles (default = None).
+        profiler : Profiler
+            Profiler of the world's computations. When given, the Kirchhoff solve, the rasterization and each stage of
+            compute and update_component are profiled, and the report is available from world.profiler. Profiling is
+            off by default (default = None).
 
         Attributes
         ----------
@@ -43,10 +99,10 @@ class World:
             A vector field I : ℝ² → ℝ³ ; (x, y) → (I_x(x, y), I_y(x, y), I_z(x, y)), where I_x(x, y), I_y(x, y) and
             I_z(x, y) are the 3 components of the electrical component current vector at a given point (x, y) in space.
             Note that I_z = 0 is always True in our 2D world.
-        self._magnetic_field : VectorField
+        self._magnetic_field : OutOfPlaneVectorField
             A vector field B : ℝ² → ℝ³ ; (x, y) → (B_x(x, y), B_y(x, y), B_z(x, y)), where B_x(x, y), B_y(x, y) and
             B_z(x, y) are the 3 components of the magnetic vector at a given point (x, y) in space. Note that
-            B_x = B_y = 0 is always True in our 2D world.
+            B_x = B_y = 0 is always True in our 2D world, so only B_z is stored.
         self._potential : ScalarField
             A scalar field P : ℝ² → ℝ ; (x, y) → P(x, y), where P(x, y) is the electric potential at a given point
             (x, y) in space. The difference between P and V is that P gives the potential in the whole world, i.e inside
@@ -57,9 +113,9 @@ class World:
             components of the electric vector at a given point (x, y) in space. Note that the E_z component is missing
             because it is not possible to compute the gradient of the potential in the z axis in a 2D world.
         self._energy_flux : VectorField
-            A vector field EF : ℝ² → ℝ³ ; (x, y) → (EF_x(x, y), EF_y(x, y), EF_z(x, y)), where EF_x(x, y), EF_y(x, y)
-            and EF_z(x, y) are the 3 components of the energy flux vector at a given point (x, y) in space. Note that
-            EF_z = 0 is always True in our 2D world.
+            A vector field EF : ℝ² → ℝ² ; (x, y) → (EF_x(x, y), EF_y(x, y)), where EF_x(x, y) and EF_y(x, y) are the 2
+            components of the energy flux vector at a given point (x, y) in space. Note that the EF_z component is
+            missing because EF_z = 0 is always True in our 2D world.
 
         Notes
         -----
@@ -71,19 +127,40 @@ class World:
         if len(shape) != 2:
             raise ValueError(f"The length of the world's shape should be 2. The given shape has length {len(shape)}.")
 
+        if grid is not None:
+            if CoordinateSystem(coordinate_system) != CoordinateSystem.CARTESIAN or storage is not None:
+                raise NotImplementedError("Only the cartesian coordinates system is implemented on non-uniform grids.")
+            if tuple(grid.shape) != shape:
+                raise ValueError(f"The grid's shape {grid.shape} should be the world's shape {shape}.")
+
         self._shape = shape
         self._circuit = circuit
         self._coordinate_system = CoordinateSystem(coordinate_system)
-
-        voltage, current = self._circuit.get_voltage_and_current_fields(self._shape, self.minimum, self.maximum)
+        self._magnetic_field_cache = magnetic_field_cache
+        self._dtype = np.dtype(dtype)
+        self._storage = storage
+        self._grid = grid
+        self._profiler = profiler
+
+        voltage, current = self._circuit.get_voltage_and_current_fields(
+            self._shape, self.minimum, self.maximum, self._dtype, self._storage, self._grid, self._profiler
+        )
         self._circuit_voltage = voltage
         self._circuit_current = current
+        self._wire_mask = None
 
         self._electric_field = None
         self._energy_flux = None
         self._magnetic_field = None
         self._potential = None
 
+    @property
+    def profiler(self) -> Profiler:
+        """
+        Profiler of the world's computations, or None if profiling is off.
+        """
+        return self._profiler
+
     @property
     def minimum(self) -> Position:
         """
@@ -94,6 +171,8 @@ class World:
         position : Position
             A tuple of two floats.
         """
+        if self._grid is not None:
+            return self._grid.minimum
         return 0, 0
 
     @property
@@ -106,10 +185,12 @@ class World:
         position : Position
             A tuple of two floats.
         """
+        if self._grid is not None:
+            return self._grid.maximum
         if self._coordinate_system == CoordinateSystem.CARTESIAN:
             return self._shape[0] - 1, self._shape[1] - 1
         elif self._coordinate_system == CoordinateSystem.POLAR:
-            return self._shape[0] - 1, pi/2
+            return self._shape[0] - 1, np.pi/2
 
     @property
     def delta_q1(self) -> float:
@@ -135,7 +216,14 @@ class World:
         """
         return (self.maximum[1] - self.minimum[1])/(self._circuit_voltage.shape[1] - 1)
 
-    def compute(self, nb_relaxation_iterations: int = 1000):
+    def compute(
+            self,
+            nb_relaxation_iterations: int = 1000,
+            cache: WorldCache = None,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None,
+            checkpoint: RelaxationCheckpoint = None
+    ):
         """
         Calculates all the fields in the world using the voltage and current fields produced by the electrical
         components in the circuit. The known fields are the voltage (self._circuit_voltage) and current
@@ -146,44 +234,573 @@ class World:
         ----------
         nb_relaxation_iterations : int
             Number of iterations performed to obtain the potential by the relaxation method (default = 1000)
+        cache : WorldCache
+            Disk cache of computed worlds. If the same circuit was already computed on the same grid with the same
+            solver parameters, the stored fields are loaded instead of being computed. Otherwise, the computed fields
+            are stored in the cache (default = None).
+        progress : ProgressCallback
+            Function called with the progress of the relaxation ("laplace" stage) and of the Biot–Savart sum
+            ("biot_savart" stage), see LaplaceEquationSolver.solve and BiotSavartEquationSolver.solve (default = None).
+        cancellation_token : CancellationToken
+            Token to cancel the computation, e.g. from another thread or after a timeout. If it is cancelled,
+            ComputationCancelled is raised and the world keeps the fields computed so far : after a cancelled
+            relaxation, the partial potential is kept and the other fields are None, and after a cancelled Biot–Savart
+            sum, the potential, the electric field and the partial magnetic field are kept, and the energy flux is
+            None. The fields are then computed again by update_component, or by a new compute (default = None).
+        checkpoint : RelaxationCheckpoint
+            Checkpoint of the relaxation, e.g. RelaxationCheckpoint(directory, every_seconds=600), for long runs which
+            may be interrupted. If a previous run of the same world was interrupted, the relaxation is resumed from its
+            latest checkpoint, and the result is the same as an uninterrupted run (default = None).
         """
-        if (self._coordinate_system == CoordinateSystem.CARTESIAN):
-            test = LaplaceEquationSolver(nb_relaxation_iterations)
-            test2 = BiotSavartEquationSolver()
+        with profile_stage(self._profiler, "compute"):
+            self._compute(nb_relaxation_iterations, cache, progress, cancellation_token, checkpoint)
 
+    async def compute_async(
+            self,
+            nb_relaxation_iterations: int = 1000,
+            cache: WorldCache = None,
+            checkpoint: RelaxationCheckpoint = None,
+            executor: Executor = None
+    ) -> AsyncIterator[Progress]:
+        """
+        Calculates all the fields in the world like compute, without blocking the event loop. The computation runs in
+        a worker thread of the executor, and its progress is yielded as an asynchronous iterator :
 
+            async for progress in world.compute_async(1000):
+                print(progress.stage, progress.fraction)
 
+        The solvers spend most of their time in numpy, which releases the GIL, so the event loop and other computations
+        keep running. If the task iterating over the progress is cancelled, the computation is cancelled with its
+        cancellation token, and the cancellation waits for the worker thread to stop, so the world is never modified
+        after the task ends. The world then keeps the fields computed so far, as after a cancelled compute.
 
-            self._potential = test._solve_in_cartesian_coordinate(self._circuit_voltage, self.delta_q1, self.delta_q2)
+        Parameters
+        ----------
+        nb_relaxation_iterations : int
+            Number of iterations performed to obtain the potential by the relaxation method (default = 1000).
+        cache : WorldCache
+            Disk cache of computed worlds, see compute (default = None).
+        checkpoint : RelaxationCheckpoint
+            Checkpoint of the relaxation, see compute (default = None).
+        executor : Executor
+            Thread pool in which the computation runs. Uses the event loop's default executor when it is not given
+            (default = None).
+
+        Yields
+        ------
+        progress : Progress
+            The progress of the relaxation ("laplace" stage) and of the Biot–Savart sum ("biot_savart" stage).
+        """
+        loop = asyncio.get_running_loop()
+        reports = asyncio.Queue()
+        cancellation_token = CancellationToken()
+
+        computation = loop.run_in_executor(executor, functools.partial(
+            self.compute, nb_relaxation_iterations, cache,
+            progress=lambda report: loop.call_soon_threadsafe(reports.put_nowait, report),
+            cancellation_token=cancellation_token, checkpoint=checkpoint
+        ))
+        next_report = None
+        try:
+            while True:
+                next_report = asyncio.ensure_future(reports.get())
+                await asyncio.wait({next_report, computation}, return_when=asyncio.FIRST_COMPLETED)
+                if next_report.done():
+                    yield next_report.result()
+                    continue
+
+                # The reports are queued before the end of the computation, so none is left behind
+                while not reports.empty():
+                    yield reports.get_nowait()
+                computation.result()
+                return
+        finally:
+            if next_report is not None:
+                next_report.cancel()
+            if not computation.done():
+                cancellation_token.cancel()
+                with contextlib.suppress(ComputationCancelled):
+                    await asyncio.shield(computation)
+
+    def _compute(
+            self,
+            nb_relaxation_iterations: int,
+            cache: WorldCache,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None,
+            checkpoint: RelaxationCheckpoint = None
+    ):
+        """
+        Calculates all the fields in the world, see compute.
+        """
+        if cache is not None:
+            with profile_stage(self._profiler, "cache_lookup"):
+                key = cache.key(self, nb_relaxation_iterations=nb_relaxation_iterations, dtype=self._dtype.name)
+                cached_world = cache.get(key)
+            if cached_world is not None:
+                self._potential = cached_world._potential
+                self._electric_field = cached_world._electric_field
+                self._magnetic_field = cached_world._magnetic_field
+                self._energy_flux = cached_world._energy_flux
+                return
+
+        laplace_solver = LaplaceEquationSolver(nb_relaxation_iterations)
+
+        self._electric_field = self._magnetic_field = self._energy_flux = None
+        with profile_stage(self._profiler, "laplace"):
+            try:
+                self._potential = laplace_solver.solve(
+                    self._circuit_voltage, self._coordinate_system, self.delta_q1, self.delta_q2,
+                    storage=self._storage, grid=self._grid,
+                    dirichlet_mask=self._get_wire_mask() if self._storage is None else None, profiler=self._profiler,
+                    progress=progress, cancellation_token=cancellation_token, checkpoint=checkpoint
+                )
+            except ComputationCancelled as cancellation:
+                self._potential = cancellation.partial_result
+                raise
+
+        with profile_stage(self._profiler, "gradient"):
+            if self._storage is None:
+                self._electric_field = -self._potential.gradient(*self._grid_coordinates())
+            else:
+                self._electric_field = self._storage.gradient(self._potential, "electric_field", negative=True)
+
+        with profile_stage(self._profiler, "biot_savart"):
+            try:
+                self._magnetic_field = self._solve_magnetic_field(progress, cancellation_token)
+            except ComputationCancelled as cancellation:
+                self._magnetic_field = cancellation.partial_result
+                raise
+
+        with profile_stage(self._profiler, "cross_product"):
+            if self._storage is None:
+                self._energy_flux = self._electric_field.cross(self._magnetic_field)
+            else:
+                self._energy_flux = self._storage.cross(self._electric_field, self._magnetic_field, "energy_flux")
+
+        if cache is not None:
+            with profile_stage(self._profiler, "cache_store"):
+                cache.put(key, self)
+
+    def _solve_magnetic_field(
+            self,
+            progress: ProgressCallback = None,
+            cancellation_token: CancellationToken = None
+    ) -> OutOfPlaneVectorField:
+        """
+        Solves the Biot–Savart equation for the circuit's current field. If the world has a magnetic field cache, the
+        magnetic field is the sum of the components' cached unit-current magnetic fields weighted by their current, and
+        only the unit-current fields missing from the cache are solved. The progress is then reported and the
+        cancellation token checked after each component, and a cancellation gives the sum of the components done.
 
-            self._electric_field= -self._potential.gradient()
+        Returns
+        -------
+        magnetic_field : OutOfPlaneVectorField
+            The magnetic field B produced by the circuit's current.
+        """
+        biot_savart_solver = BiotSavartEquationSolver()
+
+        if self._magnetic_field_cache is None or self._storage is not None:
+            return biot_savart_solver.solve(
+                self._circuit_current, self._coordinate_system, self.delta_q1, self.delta_q2, self._storage, self._grid,
+                progress, cancellation_token
+            )
+
+        magnetic_field = np.zeros(self._shape)
+        circuit_cells = self._circuit_current.any(axis=-1)
+
+        def get_magnetic_field() -> OutOfPlaneVectorField:
+            # The solver gives a null field on the circuit's cells, the superposition must do the same
+            field = magnetic_field.astype(self._dtype)
+            field[circuit_cells] = 0
+            return OutOfPlaneVectorField(field)
+
+        unit_current_fields = self._circuit.get_unit_current_fields(
+            self._shape, self.minimum, self.maximum, self._grid
+        )
+        for k, (component, cells, unit_currents) in enumerate(unit_current_fields):
+            if unit_currents.any():
+                key = MagneticFieldCache.key(
+                    cells, unit_currents, self._shape, self._coordinate_system, self.delta_q1, self.delta_q2, self._grid
+                )
+                unit_magnetic_field = self._magnetic_field_cache.get(key)
+
+                if unit_magnetic_field is None:
+                    unit_current_field = VectorField(np.zeros((self._shape[0], self._shape[1], 2)))
+                    unit_current_field[cells[:, 0], cells[:, 1]] = unit_currents
+                    unit_magnetic_field = np.asarray(biot_savart_solver.solve(
+                        unit_current_field, self._coordinate_system, self.delta_q1, self.delta_q2, grid=self._grid
+                    ))
+                    self._magnetic_field_cache.put(key, unit_magnetic_field)
+
+                magnetic_field += component.current * unit_magnetic_field
+
+            report_progress(
+                progress, cancellation_token, "biot_savart", k + 1, len(unit_current_fields), get_magnetic_field
+            )
+
+        return get_magnetic_field()
+
+    def probe(self, points: np.ndarray, nb_relaxation_iterations: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluates the potential and the magnetic field only at some points of the world, e.g. sensor locations. The
+        magnetic field is the direct Biot–Savart sum at each point, so it costs O(P·K) for P points and K cells of the
+        circuit instead of O(N·M·K) for the whole grid. The potential is interpolated bilinearly from the computed
+        potential, or from a coarse relaxation of nb_relaxation_iterations if the world's fields are not computed.
 
-            self._magnetic_field = test2._solve_in_cartesian_coordinate(self._circuit_current, self.delta_q1, self.delta_q2)
+        Parameters
+        ----------
+        points : np.ndarray
+            The (P, 2) array of the points' positions in the world, which do not need to be on the grid.
+        nb_relaxation_iterations : int
+            Number of iterations of the coarse relaxation used when the potential is not computed (default = 100).
 
-            self._energy_flux = self._electric_field.cross(self._magnetic_field)
+        Returns
+        -------
+        potential, magnetic_field : Tuple[np.ndarray, np.ndarray]
+            The (P,) arrays of the potential and of the z component of the magnetic field at each point.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        minimum, maximum = np.asarray(self.minimum, dtype=float), np.asarray(self.maximum, dtype=float)
+        if ((points < minimum) | (points > maximum)).any():
+            raise ValueError(f"The probed points should be between {self.minimum} and {self.maximum}.")
 
+        if self._grid is None:
+            indices = (points - minimum) / (self.delta_q1, self.delta_q2)
+        else:
+            indices = np.stack(
+                [np.interp(points[:, i], values, np.arange(len(values))) for i, values in
+                 enumerate(self._grid_coordinates())],
+                axis=-1
+            )
+
+        potential = self._potential
+        if potential is None:
+            potential = LaplaceEquationSolver(nb_relaxation_iterations).solve(
+                self._circuit_voltage, self._coordinate_system, self.delta_q1, self.delta_q2, storage=self._storage,
+                grid=self._grid, dirichlet_mask=self._get_wire_mask() if self._storage is None else None
+            )
+
+        # Only the 4 neighbours of each point are read, so memory-mapped potentials are not loaded entirely
+        lower = np.minimum(np.floor(indices).astype(int), np.array(self._shape) - 2).clip(0)
+        weights = indices - lower
+        potential_values = sum(
+            np.asarray(potential[lower[:, 0] + i, lower[:, 1] + j])
+            * (weights[:, 0] if i else 1 - weights[:, 0]) * (weights[:, 1] if j else 1 - weights[:, 1])
+            for i in (0, 1) for j in (0, 1)
+        )
+
+        magnetic_field = BiotSavartEquationSolver().evaluate_at(
+            self._circuit_current, indices if self._grid is None else points, self._grid
+        )
+
+        return potential_values, magnetic_field
+
+    def _get_wire_mask(self) -> np.ndarray:
+        """
+        Boolean array of the cells of the circuit, i.e. the cells where the circuit's voltage is not null. The mask is
+        cached and shared by the relaxation of the potential, which fixes these cells, and by the display of the fields,
+        which hides them.
+        """
+        if self._wire_mask is None:
+            self._wire_mask = np.asarray(self._circuit_voltage) != 0
+        return self._wire_mask
 
+    def _grid_coordinates(self) -> Tuple[np.ndarray, ...]:
+        """
+        Coordinates of each axis of the world's non-uniform grid, or an empty tuple if the grid is uniform.
+        """
+        if self._grid is None:
+            return ()
+        return self._grid.q1_values, self._grid.q2_values
 
+    def update_component(
+            self,
+            component: ElectricalComponent,
+            voltage: float = None,
+            resistance: float = None,
+            nb_relaxation_iterations: int = 100,
+            update_magnetic_field: bool = True
+    ):
+        """
+        Changes the voltage of a voltage source or the resistance of a wire and updates the world without rebuilding
+        it. The small circuit system is solved again and the voltage and current fields are rewritten from the cached
+        rasterization of the components, so no component is rasterized again. If the fields were already computed, the
+        relaxation of the potential is warm-started from the previous potential, even if it is the partial potential of
+        a cancelled compute, and the fields which are missing are computed again.
+
+        Changing a voltage or a resistance generally changes the current of every component of the circuit, so the
+        magnetic field is only updated cheaply if the world has a magnetic field cache, from the cached unit-current
+        fields of the components. Without it, the magnetic field is updated by superposition, i.e. only the
+        contribution of the cells whose current changed is added, when the current changes on fewer cells than the
+        circuit has, and is solved again otherwise, which costs as much as in compute.
 
+        Parameters
+        ----------
+        component : ElectricalComponent
+            A component of the world's circuit.
+        voltage : float
+            New voltage of the voltage source (default = None).
+        resistance : float
+            New resistance of the wire (default = None).
+        nb_relaxation_iterations : int
+            Number of iterations performed to update the potential by the warm-started relaxation method
+            (default = 100).
+        update_magnetic_field : bool
+            Update the magnetic field and the energy flux. If False, only the potential and the electric field are
+            updated, and the magnetic field and the energy flux, which would be stale, are None until the next update
+            of the magnetic field or compute, e.g. to animate the potential cheaply (default = True).
+        """
+        if self._circuit is None:
+            raise ValueError("This world has no circuit to update, it was loaded from its saved fields.")
+        if component not in self._circuit.components:
+            raise ValueError("The given component is not part of the world's circuit.")
+        if self._storage is not None:
+            raise NotImplementedError("Updating a component is not implemented for worlds stored by tiles.")
+
+        if voltage is not None:
+            if not isinstance(component, VoltageSource):
+                raise ValueError(f"Only the voltage of a voltage source can be changed. Received a {type(component)}.")
+            component.voltage = voltage
+        if resistance is not None:
+            if not isinstance(component, Wire):
+                raise ValueError(f"Only the resistance of a wire can be changed. Received a {type(component)}.")
+            component.resistance = resistance
+
+        previous_current = self._circuit_current
+        circuit_voltage, circuit_current = self._circuit.get_voltage_and_current_fields(
+            self._shape, self.minimum, self.maximum, self._dtype, grid=self._grid, profiler=self._profiler
+        )
+        self._circuit_voltage = circuit_voltage
+        self._circuit_current = circuit_current
+        self._wire_mask = None
+
+        if self._potential is None:
+            return
+
+        with profile_stage(self._profiler, "laplace"):
+            self._potential = LaplaceEquationSolver(nb_relaxation_iterations).solve(
+                self._circuit_voltage, self._coordinate_system, self.delta_q1, self.delta_q2, self._potential,
+                grid=self._grid, dirichlet_mask=self._get_wire_mask(), profiler=self._profiler
+            )
+
+        with profile_stage(self._profiler, "gradient"):
+            self._electric_field = -self._potential.gradient(*self._grid_coordinates())
+
+        if not update_magnetic_field:
+            self._magnetic_field = self._energy_flux = None
+            return
+
+        with profile_stage(self._profiler, "biot_savart"):
+            current_variation = VectorField(self._circuit_current - previous_current)
+            nb_changed_cells = np.count_nonzero(current_variation.any(axis=-1))
+            nb_circuit_cells = np.count_nonzero(self._circuit_current.any(axis=-1))
+            # la superposition somme sur les cellules dont le courant a changé, elle ne gagne rien si ce sont toutes,
+            # et elle est impossible sans champ précédent complet, e.g. après un calcul annulé pendant la loi de
+            # Biot–Savart ; le flux d'énergie n'est calculé qu'à partir d'un champ magnétique complet
+            if (self._magnetic_field_cache is not None or self._energy_flux is None
+                    or nb_changed_cells >= nb_circuit_cells):
+                self._magnetic_field = self._solve_magnetic_field()
+            elif nb_changed_cells:
+                magnetic_field_variation = BiotSavartEquationSolver().solve(
+                    current_variation, self._coordinate_system, self.delta_q1, self.delta_q2, grid=self._grid
+                )
+                self._magnetic_field = OutOfPlaneVectorField(self._magnetic_field + magnetic_field_variation)
+                self._magnetic_field[self._circuit_current.any(axis=-1)] = 0
+
+        with profile_stage(self._profiler, "cross_product"):
+            self._energy_flux = self._electric_field.cross(self._magnetic_field)
 
+    def save(self, path: str):
+        """
+        Saves the world's fields and grid metadata in a directory. Each field is written as a raw .npy file so it can be
+        memory-mapped when the world is loaded. Fields that are not computed yet are not saved.
 
-        elif(self._coordinate_system == CoordinateSystem.POLAR):
-            test = LaplaceEquationSolver(nb_relaxation_iterations)
-            test2 = BiotSavartEquationSolver()
-            self._potential = test._solve_in_polar_coordinate(self._circuit_voltage, self.delta_q1, self.delta_q2)
-            
-            self._electric_field= -self._potential.gradient()
+        Parameters
+        ----------
+        path : str
+            Directory in which the world is saved. It is created if it does not exist.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        saved_fields = {}
+        for name, field_type in self.FIELDS.items():
+            field = getattr(self, f"_{name}")
+            if field is None:
+                continue
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(field))
+            saved_fields[name] = field_type.__name__
+
+        metadata = {
+            "shape": list(self._shape),
+            "coordinate_system": self._coordinate_system.name,
+            "dtype": self._dtype.name,
+            "minimum": [float(value) for value in self.minimum],
+            "maximum": [float(value) for value in self.maximum],
+            "fields": saved_fields
+        }
+        if self._grid is not None:
+            metadata["grid"] = [self._grid.q1_values.tolist(), self._grid.q2_values.tolist()]
+        with open(os.path.join(path, self.METADATA_FILENAME), "w") as file:
+            json.dump(metadata, file, indent=4)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str = "r") -> "World":
+        """
+        Loads a world saved with World.save. The fields are memory-mapped, so only the slices that are used are read
+        from the disk. The loaded world has no circuit, but its fields can be shown, post-processed or computed again.
+        Its components cannot be updated, so update_component and animate_sweep raise a ValueError.
 
-            self._magnetic_field = test2._solve_in_polar_coordinate(self._circuit_current, self.delta_q1, self.delta_q2)
+        Parameters
+        ----------
+        path : str
+            Directory in which the world was saved.
+        mmap_mode : str
+            Memory-map mode given to numpy.load. Use None to read the fields in memory (default = "r").
 
-            self._energy_flux = self._electric_field.cross(self._magnetic_field)
+        Returns
+        -------
+        world : World
+            The loaded world.
+        """
+        with open(os.path.join(path, cls.METADATA_FILENAME)) as file:
+            metadata = json.load(file)
+
+        world = cls.__new__(cls)
+        world._shape = tuple(metadata["shape"])
+        world._circuit = None
+        world._coordinate_system = CoordinateSystem[metadata["coordinate_system"]]
+        world._magnetic_field_cache = None
+        world._dtype = np.dtype(metadata["dtype"])
+        world._storage = None
+        world._grid = StretchedGrid(*metadata["grid"]) if "grid" in metadata else None
+        world._wire_mask = None
+        world._profiler = None
+
+        for name in cls.FIELDS:
+            field = None
+            if name in metadata["fields"]:
+                field_type = cls.FIELD_TYPES[metadata["fields"][name]]
+                field = np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode).view(field_type)
+            setattr(world, f"_{name}", field)
+
+        return world
+
+    def render(
+            self,
+            directory: str,
+            format: str = "png",
+            fields: List[str] = None,
+            renderer: FieldRenderer = None
+    ) -> List[str]:
+        """
+        Renders the world's fields to files without displaying them, e.g. for batch jobs. Each field is written as
+        <directory>/<name>.<format>, with the title used by its show method, and the electrical components are hidden
+        in the electric field as in show_electric_field. The fields are decimated to the resolution of the figure before
+        they are read, so the memory-mapped fields of a world stored by tiles or loaded from its files are never read
+        entirely.
 
+        Parameters
+        ----------
+        directory : str
+            Directory in which the files are written. It is created if it does not exist.
+        format : str
+            Format of the files, e.g. "png", "svg" or "pdf" (default = "png").
+        fields : List[str]
+            Names of the fields to render, among the keys of World.FIELD_TITLES. All the fields already computed are
+            rendered when it is not given (default = None).
+        renderer : FieldRenderer
+            Renderer whose figure is reused, e.g. to render many worlds. A new renderer is created when it is not given
+            (default = None).
 
+        Returns
+        -------
+        paths : List[str]
+            The paths of the written files.
+        """
+        if fields is None:
+            fields = [name for name in self.FIELD_TITLES if getattr(self, f"_{name}") is not None]
+        for name in fields:
+            if name not in self.FIELD_TITLES:
+                raise ValueError(f"Unknown field '{name}'. The fields are {list(self.FIELD_TITLES)}.")
+            if getattr(self, f"_{name}") is None:
+                raise ValueError(f"The field '{name}' is not computed.")
+
+        os.makedirs(directory, exist_ok=True)
+        renderer = renderer or FieldRenderer()
+
+        paths = []
+        for name in fields:
+            # le voltage du circuit sert de masque, le moteur de rendu n'en lit que les cellules sous-échantillonnées
+            mask = self._circuit_voltage if name == "electric_field" else None
+            paths.append(renderer.render(
+                getattr(self, f"_{name}"), os.path.join(directory, f"{name}.{format}"), format,
+                title=self.FIELD_TITLES[name], mask=mask
+            ))
+
+        return paths
+
+    def animate_sweep(
+            self,
+            component: ElectricalComponent,
+            values: List[float],
+            path: str,
+            format: str = None,
+            fps: float = 10,
+            nb_relaxation_iterations: int = 100
+    ) -> FieldAnimation:
+        """
+        Sweeps the voltage of a voltage source or the resistance of a wire and records an animation of the potential and
+        of the norm of the electric field. Each frame updates the world with update_component, so the potential is
+        warm-started from the previous frame, and the animation's figure is reused for all the frames. The magnetic
+        field and the energy flux are not drawn, so they are not updated and are None after the sweep.
+
+        Parameters
+        ----------
+        component : ElectricalComponent
+            A voltage source or a wire of the world's circuit.
+        values : List[float]
+            The voltages or resistances of the sweep, one per frame.
+        path : str
+            Path of the GIF file, or directory of the PNG sequence.
+        format : str
+            Either "gif" or "png", see FieldAnimation (default = None).
+        fps : float
+            Number of frames per second when the GIF is played (default = 10).
+        nb_relaxation_iterations : int
+            Number of iterations of the warm-started relaxation of each frame (default = 100).
+
+        Returns
+        -------
+        animation : FieldAnimation
+            The written animation, whose frames_per_second gives the rendering throughput.
+        """
+        if self._circuit is None:
+            raise ValueError("This world has no circuit to update, it was loaded from its saved fields.")
+
+        parameter = "voltage" if isinstance(component, VoltageSource) else "resistance"
+        if self._potential is None:
+            self.compute(nb_relaxation_iterations)
+
+        with FieldAnimation(path, ["Potential", "Electric field norm"], format, fps) as animation:
+            for value in values:
+                self.update_component(
+                    component, nb_relaxation_iterations=nb_relaxation_iterations, update_magnetic_field=False,
+                    **{parameter: value}
+                )
+                animation.add_frame(
+                    [self._potential, np.hypot(self._electric_field.x, self._electric_field.y)],
+                    title=f"{type(component).__name__} {parameter} = {value:.3g}"
+                )
+
+        return animation
 
     def show_circuit(self, nodes_position_in_figure: dict = None):
         """
         Shows circuit.
         """
+        if self._circuit is None:
+            raise ValueError("This world has no circuit to show, it was loaded from its saved fields.")
         self._circuit.display(nodes_position_in_figure)
 
     def show_circuit_voltage(self):
@@ -205,7 +822,7 @@ class World:
         """
         self._potential.show(title="Potential")
 
-    def show_electric_field(self, hide_components: bool = True):
+    def show_electric_field(self, hide_components: bool = True, max_resolution: int = 256):
         """
         Shows the electric field.
 
@@ -213,16 +830,15 @@ class World:
         ----------
         hide_components : bool
             Hide the electric field near the electrical components to produce a clearer stream plot.
+        max_resolution : int
+            Maximum number of points of the stream plot's grid along each axis. Larger worlds are decimated so the
+            display time stays bounded. Use None to plot every cell (default = 256).
         """
-        if hide_components:
-            electric_field = VectorField(self._electric_field)
-
-            for x, y in zip(np.nonzero(self._circuit_voltage)[0], np.nonzero(self._circuit_voltage)[1]):
-                electric_field[x, y] = np.array([np.nan, np.nan])
-        else:
-            electric_field = self._electric_field
-
-        electric_field.show(title="Electric field")
+        self._electric_field.show(
+            title="Electric field",
+            mask=self._get_wire_mask() if hide_components else None,
+            max_resolution=max_resolution
+        )
 
     def show_magnetic_field(self):
         """
@@ -230,11 +846,16 @@ class World:
         """
         self._magnetic_field.z.show(title="Magnetic field (z component)")
 
-    def show_energy_flux(self):
+    def show_energy_flux(self, max_resolution: int = 256):
         """
         Shows the energy flux.
+
+        Parameters
+        ----------
+        max_resolution : int
+            Maximum number of points of the stream plot's grid along each axis (default = 256).
         """
-        self._energy_flux.show(title="Energy flux")
+        self._energy_flux.show(title="Energy flux", max_resolution=max_resolution)
 
     def show_all(self):
         """
@@ -0,0 +1,219 @@
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl, the cache then relies only on atomic renames.
+    fcntl = None
+
+from src.circuit import Circuit
+from src.electrical_components import CurrentSource, ElectricalComponent, VoltageSource, Wire
+
+
+class WorldCache:
+    """
+    A content-addressed disk cache of computed worlds. A world's entry is keyed by a stable hash of its circuit (the
+    components' types, positions, parametric equations, resistances, voltages and currents), its shape, its coordinate
+    system, its grid and the solver parameters. Each entry is a directory written with World.save, so a hit loads the
+    stored fields instantly with memory-mapping.
+
+    The cache is bounded by its total size on disk and evicts the least recently used entries. Entries are written in
+    a temporary directory and atomically renamed, and evictions are serialized with a lock file, so several processes
+    of the same machine can safely share a cache directory.
+    """
+
+    VERSION = 2
+    LOCK_FILENAME = ".lock"
+    TEMPORARY_PREFIX = ".tmp-"
+
+    def __init__(self, directory: str, max_size: int = 8 * 2**30):
+        """
+        World cache constructor.
+
+        Parameters
+        ----------
+        directory : str
+            Directory in which the cache entries are stored. It is created if it does not exist.
+        max_size : int
+            Maximum total size, in bytes, of the cache entries (default = 8 GiB).
+        """
+        if max_size < 0:
+            raise ValueError(f"The cache's maximum size should be positive. Received {max_size}.")
+
+        self._directory = directory
+        self._max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def size(self) -> int:
+        """
+        Total size, in bytes, of the cache entries.
+        """
+        return sum(size for _, _, size in self._list_entries())
+
+    def key(self, world, **solver_parameters) -> str:
+        """
+        Stable key of a world's computation.
+
+        Parameters
+        ----------
+        world : World
+            A world built from a circuit.
+        **solver_parameters
+            Parameters given to the solvers, e.g. nb_relaxation_iterations.
+
+        Returns
+        -------
+        key : str
+            Hexadecimal digest identifying the computation.
+        """
+        if world._circuit is None:
+            raise ValueError("Only a world built from a circuit can be cached.")
+
+        description = {
+            "version": self.VERSION,
+            "circuit": describe_circuit(world._circuit),
+            "shape": list(world._shape),
+            "coordinate_system": world._coordinate_system.name,
+            "solver_parameters": {name: repr(value) for name, value in solver_parameters.items()}
+        }
+        if world._grid is not None:
+            description["grid"] = [world._grid.q1_values.tolist(), world._grid.q2_values.tolist()]
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str):
+        """
+        Return the world stored with the given key, or None if the key is not in the cache.
+
+        Returns
+        -------
+        world : Optional[World]
+            The cached world, loaded with memory-mapped fields.
+        """
+        from src.world import World
+
+        entry_path = os.path.join(self._directory, key)
+        try:
+            world = World.load(entry_path)
+            os.utime(entry_path)
+        except FileNotFoundError:
+            # The entry does not exist or was evicted by another process while it was loaded.
+            return None
+
+        return world
+
+    def put(self, key: str, world):
+        """
+        Store a computed world with the given key and evict the least recently used entries if the cache is too large.
+        """
+        temporary_path = os.path.join(self._directory, f"{self.TEMPORARY_PREFIX}{key}-{uuid.uuid4().hex}")
+        world.save(temporary_path)
+
+        with self._lock():
+            entry_path = os.path.join(self._directory, key)
+            if os.path.exists(entry_path):
+                shutil.rmtree(temporary_path, ignore_errors=True)
+                os.utime(entry_path)
+            else:
+                os.rename(temporary_path, entry_path)
+
+            self._evict()
+
+    def clear(self):
+        """
+        Remove all the cache entries.
+        """
+        with self._lock():
+            for entry_path, _, _ in self._list_entries():
+                self._remove(entry_path)
+
+    def _evict(self):
+        entries = sorted(self._list_entries(), key=lambda entry: entry[1])
+        total_size = sum(size for _, _, size in entries)
+
+        for entry_path, _, size in entries:
+            if total_size <= self._max_size:
+                break
+            self._remove(entry_path)
+            total_size -= size
+
+    def _list_entries(self):
+        entries = []
+        for name in os.listdir(self._directory):
+            entry_path = os.path.join(self._directory, name)
+            if name.startswith(".") or not os.path.isdir(entry_path):
+                continue
+            try:
+                last_access = os.stat(entry_path).st_mtime
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_path))
+            except FileNotFoundError:
+                continue
+            entries.append((entry_path, last_access, size))
+
+        return entries
+
+    def _remove(self, entry_path: str):
+        # The entry is renamed first so other processes never see a partially removed entry.
+        removed_path = os.path.join(self._directory, f"{self.TEMPORARY_PREFIX}removed-{uuid.uuid4().hex}")
+        try:
+            os.rename(entry_path, removed_path)
+        except FileNotFoundError:
+            return
+        shutil.rmtree(removed_path, ignore_errors=True)
+
+    @contextmanager
+    def _lock(self):
+        if fcntl is None:
+            yield
+            return
+
+        with open(os.path.join(self._directory, self.LOCK_FILENAME), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def describe_component(component: ElectricalComponent) -> dict:
+    """
+    Return a JSON-serializable description of a component which only depends on its definition.
+    """
+    description = {
+        "type": type(component).__name__,
+        "start_position": [float(value) for value in component.start_position],
+        "stop_position": [float(value) for value in component.stop_position]
+    }
+    if component.geometry is not None:
+        description["geometry"] = component.geometry.as_dict()
+    else:
+        description["wire_parametric_equations"] = [str(equation) for equation in component.wire_parametric_equations]
+        description["variables"] = [str(variable) for variable in component.variables]
+
+    if isinstance(component, Wire):
+        description["resistance"] = float(component.resistance)
+    elif isinstance(component, VoltageSource):
+        description["voltage"] = float(component.voltage)
+    elif isinstance(component, CurrentSource):
+        description["current"] = float(component.current)
+
+    return description
+
+
+def describe_circuit(circuit: Circuit) -> dict:
+    """
+    Return a JSON-serializable description of a circuit which only depends on its definition.
+    """
+    return {
+        "components": [describe_component(component) for component in circuit.components],
+        "ground_position": [float(value) for value in circuit._ground_position],
+        "increment_size": float(circuit._increment_size)
+    }